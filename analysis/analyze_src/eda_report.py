@@ -0,0 +1,496 @@
+import base64
+import html
+import io
+import math
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+import click
+import numpy as np
+import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.colors import LogNorm
+from matplotlib.figure import Figure
+
+from src.ingest_data import DataIngestorFactory
+from src.streaming_stats import (
+    HeavyHitters,
+    KLLSketch,
+    RunningMoments,
+    reservoir_sample,
+)
+
+# Batch counterpart of the interactive analyzers, for frames too large to
+# plot row by row and for headless runs. Run from the repository root:
+#   python -m analysis.analyze_src.eda_report data/archive.zip --target SalePrice
+
+QUANTILES = [0.01, 0.25, 0.5, 0.75, 0.99]
+
+
+class DatasetProfile:
+    # Everything the report shows, gathered in one pass over row chunks: exact
+    # counts, moments, min/max and missing values per block of rows, sketched
+    # quantiles and category counts, plus a uniform row sample that the binned
+    # plots and correlations are computed from
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        missing_blocks: int = 100,
+        sketch_size: int = 400,
+        max_categories: int = 1000,
+    ) -> None:
+        self.n_rows = len(df)
+        self.columns = df.columns.tolist()
+        self.dtypes = df.dtypes.astype(str).to_dict()
+        self.numeric = df.select_dtypes(include=["number"]).columns.tolist()
+        self.categorical = [c for c in self.columns if c not in self.numeric]
+
+        self.missing = np.zeros(len(self.columns), dtype=np.int64)
+        self.block_rows = max(1, math.ceil(self.n_rows / missing_blocks))
+        n_blocks = max(1, math.ceil(self.n_rows / self.block_rows))
+        self.block_missing = np.zeros((n_blocks, len(self.columns)), dtype=np.int64)
+
+        self.moments = RunningMoments(len(self.numeric))
+        self.minimum = np.full(len(self.numeric), np.nan)
+        self.maximum = np.full(len(self.numeric), np.nan)
+        self.sketches = {c: KLLSketch(sketch_size) for c in self.numeric}
+        self.categories = {c: HeavyHitters(max_categories) for c in self.categorical}
+        self.sample: Optional[pd.DataFrame] = None
+
+    def update(self, chunk: pd.DataFrame, offset: int) -> "DatasetProfile":
+        missing = chunk.isna().to_numpy()
+        self.missing += missing.sum(axis=0)
+        blocks = (offset + np.arange(len(chunk))) // self.block_rows
+        block_ids, starts = np.unique(blocks, return_index=True)
+        self.block_missing[block_ids] += np.add.reduceat(
+            missing.astype(np.int64), starts, axis=0
+        )
+
+        values = chunk[self.numeric].to_numpy(dtype=np.float64)
+        self.moments.update(values)
+        # fmin/fmax skip NaNs without warning on all-missing columns
+        self.minimum = np.fmin(self.minimum, np.fmin.reduce(values, axis=0))
+        self.maximum = np.fmax(self.maximum, np.fmax.reduce(values, axis=0))
+        for i, column in enumerate(self.numeric):
+            self.sketches[column].update(values[:, i])
+        for column in self.categorical:
+            self.categories[column].update(chunk[column])
+        return self
+
+    def missing_fractions(self) -> np.ndarray:
+        # Share of missing values per (row block, column)
+        block_sizes = np.minimum(
+            self.block_rows,
+            self.n_rows - np.arange(len(self.block_missing)) * self.block_rows,
+        )
+        return self.block_missing / np.maximum(block_sizes, 1)[:, None]
+
+    def top_categories(self, column: str, n: int) -> pd.Series:
+        counts = pd.Series(self.categories[column].counts, dtype=np.int64)
+        return counts.sort_values(ascending=False).head(n)
+
+    def summary(self) -> pd.DataFrame:
+        summary = pd.DataFrame(index=pd.Index(self.columns, name="column"))
+        summary["dtype"] = pd.Series(self.dtypes)
+        summary["count"] = self.n_rows - self.missing
+        summary["missing"] = self.missing
+        summary["missing %"] = 100 * self.missing / max(self.n_rows, 1)
+        numeric = pd.DataFrame(
+            {
+                "mean": self.moments.mean,
+                "std": self.moments.std(),
+                "min": self.minimum,
+                **{
+                    f"p{int(q * 100)}": [
+                        self.sketches[c].quantile([q])[0] for c in self.numeric
+                    ]
+                    for q in QUANTILES
+                },
+                "max": self.maximum,
+            },
+            index=self.numeric,
+        )
+        # Empty columns have no moments
+        numeric.loc[summary.loc[self.numeric, "count"].to_numpy() == 0, "mean"] = np.nan
+        categorical = pd.DataFrame(
+            {
+                "top": [self.categories[c].most_common() for c in self.categorical],
+                "top count": [
+                    self.categories[c].counts.get(self.categories[c].most_common())
+                    for c in self.categorical
+                ],
+            },
+            index=self.categorical,
+        )
+        return summary.join(numeric).join(categorical)
+
+
+def profile_frame(
+    df: pd.DataFrame,
+    chunk_size: int = 100_000,
+    sample_size: int = 200_000,
+    missing_blocks: int = 100,
+    random_state: int = 42,
+) -> DatasetProfile:
+    if chunk_size <= 0:
+        raise ValueError(f"Invalid chunk_size {chunk_size}. Must be positive.")
+    profile = DatasetProfile(df, missing_blocks)
+
+    def chunks():
+        # The sampler and the statistics consume the same single pass
+        for start in range(0, len(df), chunk_size):
+            chunk = df.iloc[start : start + chunk_size]
+            profile.update(chunk, start)
+            yield chunk
+
+    profile.sample = reservoir_sample(chunks(), sample_size, random_state)
+    return profile
+
+
+def _draw_histogram(figure: Figure, column: str, counts, edges) -> None:
+    ax = figure.subplots()
+    ax.stairs(counts, edges, fill=True, alpha=0.8)
+    ax.set_title(f"Distribution of {column}")
+    ax.set_xlabel(column)
+    ax.set_ylabel("Estimated count")
+
+
+def _draw_bar(figure: Figure, column: str, categories, counts) -> None:
+    ax = figure.subplots()
+    ax.bar(range(len(counts)), counts)
+    ax.set_xticks(range(len(counts)), categories, rotation=45, ha="right")
+    ax.set_title(f"Distribution of {column}")
+    ax.set_xlabel(column)
+    ax.set_ylabel("Count")
+
+
+def _draw_missing(figure: Figure, columns, fractions, block_rows: int) -> None:
+    ax = figure.subplots()
+    image = ax.imshow(fractions, aspect="auto", interpolation="nearest", vmin=0, vmax=1)
+    ax.set_xticks(range(len(columns)), columns, rotation=90)
+    ax.set_ylabel(f"Row block ({block_rows} rows each)")
+    ax.set_title("Missing values per row block")
+    figure.colorbar(image, ax=ax, label="Missing fraction")
+
+
+def _draw_correlation(figure: Figure, columns, matrix) -> None:
+    ax = figure.subplots()
+    image = ax.imshow(matrix, cmap="coolwarm", vmin=-1, vmax=1)
+    ax.set_xticks(range(len(columns)), columns, rotation=90)
+    ax.set_yticks(range(len(columns)), columns)
+    if len(columns) <= 20:
+        for (i, j), value in np.ndenumerate(matrix):
+            if not np.isnan(value):
+                ax.text(j, i, f"{value:.2f}", ha="center", va="center", fontsize=7)
+    ax.set_title("Correlation Heatmap")
+    figure.colorbar(image, ax=ax)
+
+
+def _draw_density(figure: Figure, x: str, y: str, counts, xedges, yedges) -> None:
+    # 2-D histogram in place of a scatter of every row
+    ax = figure.subplots()
+    counts = np.where(counts > 0, counts, np.nan)
+    vmax = np.nanmax(counts) if np.isfinite(counts).any() else 1
+    mesh = ax.pcolormesh(xedges, yedges, counts.T, norm=LogNorm(vmin=1, vmax=vmax))
+    ax.set_title(f"{x} vs {y}")
+    ax.set_xlabel(x)
+    ax.set_ylabel(y)
+    figure.colorbar(mesh, ax=ax, label="Rows (sample)")
+
+
+def _draw_boxes(figure: Figure, column: str, target: str, stats) -> None:
+    ax = figure.subplots()
+    ax.bxp(stats, showfliers=False)
+    ax.tick_params(axis="x", labelrotation=45)
+    ax.set_title(f"{column} vs {target}")
+    ax.set_xlabel(column)
+    ax.set_ylabel(target)
+
+
+DRAWERS = {
+    "histogram": _draw_histogram,
+    "bar": _draw_bar,
+    "missing": _draw_missing,
+    "correlation": _draw_correlation,
+    "density": _draw_density,
+    "boxes": _draw_boxes,
+}
+
+
+def render_figure(spec: dict) -> bytes:
+    # Runs in a worker process. Figures are drawn on the Agg canvas directly,
+    # pyplot and its interactive backends are never involved
+    figure = Figure(figsize=spec.get("figsize", (10, 6)))
+    FigureCanvasAgg(figure)
+    DRAWERS[spec["kind"]](figure, **spec["data"])
+    figure.tight_layout()
+    buffer = io.BytesIO()
+    figure.savefig(buffer, format="png", dpi=spec.get("dpi", 100))
+    return buffer.getvalue()
+
+
+class BatchEDAReport:
+    # Profiles a frame in one pass, bins the data into small arrays, renders
+    # every figure in parallel and writes one self contained HTML report next
+    # to the PNGs
+    def __init__(
+        self,
+        target: Optional[str] = None,
+        chunk_size: int = 100_000,
+        sample_size: int = 200_000,
+        missing_blocks: int = 100,
+        bins: int = 50,
+        max_pairs: int = 12,
+        top_categories: int = 20,
+        n_workers: Optional[int] = None,
+        dpi: int = 100,
+    ) -> None:
+        self.target = target
+        self.chunk_size = chunk_size
+        self.sample_size = sample_size
+        self.missing_blocks = missing_blocks
+        self.bins = bins
+        self.max_pairs = max_pairs
+        self.top_categories = top_categories
+        self.n_workers = n_workers or os.cpu_count()
+        self.dpi = dpi
+
+    def profile(self, df: pd.DataFrame) -> DatasetProfile:
+        if self.target is not None and self.target not in df.columns:
+            raise ValueError(f"Target {self.target} is not a column of the frame")
+        return profile_frame(df, self.chunk_size, self.sample_size, self.missing_blocks)
+
+    def figure_specs(self, profile: DatasetProfile) -> List[dict]:
+        specs = []
+        sample = profile.sample
+        fractions = profile.missing_fractions()
+        with_missing = np.flatnonzero(profile.missing)
+        if len(with_missing):
+            specs.append(
+                self._spec(
+                    "missing_values",
+                    "missing",
+                    columns=[profile.columns[i] for i in with_missing],
+                    fractions=fractions[:, with_missing],
+                    block_rows=profile.block_rows,
+                    figsize=(max(8, len(with_missing) * 0.3), 6),
+                )
+            )
+
+        correlation = sample[profile.numeric].corr()
+        if len(profile.numeric) > 1:
+            size = max(8, len(profile.numeric) * 0.4)
+            specs.append(
+                self._spec(
+                    "correlation",
+                    "correlation",
+                    columns=profile.numeric,
+                    matrix=correlation.to_numpy(),
+                    figsize=(size, size * 0.8),
+                )
+            )
+
+        for i, column in enumerate(profile.numeric):
+            values = sample[column].to_numpy(dtype=np.float64)
+            values = values[~np.isnan(values)]
+            if not len(values):
+                continue
+            low, high = profile.minimum[i], profile.maximum[i]
+            counts, edges = np.histogram(
+                values, bins=self.bins, range=(low, high if high > low else low + 1)
+            )
+            # Scaled from the sample to the whole frame
+            scale = profile.moments.count[i] / len(values)
+            specs.append(
+                self._spec(
+                    f"distribution_{column}",
+                    "histogram",
+                    column=column,
+                    counts=counts * scale,
+                    edges=edges,
+                )
+            )
+
+        for column in profile.categorical:
+            top = profile.top_categories(column, self.top_categories)
+            if len(top):
+                specs.append(
+                    self._spec(
+                        f"distribution_{column}",
+                        "bar",
+                        column=column,
+                        categories=[str(c) for c in top.index],
+                        counts=top.to_numpy(),
+                    )
+                )
+
+        for x, y in self._pairs(profile, correlation):
+            pair = sample[[x, y]].dropna().to_numpy(dtype=np.float64)
+            if not len(pair):
+                continue
+            counts, xedges, yedges = np.histogram2d(
+                pair[:, 0], pair[:, 1], bins=self.bins
+            )
+            specs.append(
+                self._spec(
+                    f"{x}_vs_{y}",
+                    "density",
+                    x=x,
+                    y=y,
+                    counts=counts,
+                    xedges=xedges,
+                    yedges=yedges,
+                )
+            )
+
+        if self.target in profile.numeric:
+            for column in profile.categorical:
+                stats = self._box_stats(profile, sample, column)
+                if stats:
+                    specs.append(
+                        self._spec(
+                            f"{column}_vs_{self.target}",
+                            "boxes",
+                            column=column,
+                            target=self.target,
+                            stats=stats,
+                        )
+                    )
+        return specs
+
+    def render(self, specs: List[dict]) -> Dict[str, bytes]:
+        if self.n_workers == 1 or len(specs) <= 1:
+            images = [render_figure(spec) for spec in specs]
+        else:
+            with ProcessPoolExecutor(max_workers=self.n_workers) as executor:
+                images = list(executor.map(render_figure, specs))
+        return {spec["name"]: image for spec, image in zip(specs, images)}
+
+    def generate(self, df: pd.DataFrame, output_dir: str) -> str:
+        profile = self.profile(df)
+        specs = self.figure_specs(profile)
+        images = self.render(specs)
+
+        figures_dir = os.path.join(output_dir, "figures")
+        os.makedirs(figures_dir, exist_ok=True)
+        sections = []
+        for spec in specs:
+            image = images[spec["name"]]
+            file_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", spec["name"]) + ".png"
+            with open(os.path.join(figures_dir, file_name), "wb") as f:
+                f.write(image)
+            sections.append(
+                f"<h3>{html.escape(spec['name'])}</h3>"
+                f'<img src="data:image/png;base64,{base64.b64encode(image).decode()}"'
+                f' alt="{html.escape(spec["name"])}">'
+            )
+
+        report = REPORT_TEMPLATE.format(
+            n_rows=profile.n_rows,
+            n_columns=len(profile.columns),
+            sample_rows=len(profile.sample),
+            summary=profile.summary().to_html(float_format=lambda v: f"{v:.4g}"),
+            figures="\n".join(sections),
+        )
+        path = os.path.join(output_dir, "report.html")
+        with open(path, "w") as f:
+            f.write(report)
+        return path
+
+    def _spec(self, name: str, kind: str, figsize=(10, 6), **data) -> dict:
+        return {
+            "name": name,
+            "kind": kind,
+            "figsize": figsize,
+            "dpi": self.dpi,
+            "data": data,
+        }
+
+    def _pairs(self, profile: DatasetProfile, correlation: pd.DataFrame) -> list:
+        # Every feature against the target, or the most correlated feature
+        # pairs without one, at most max_pairs by absolute correlation
+        if self.target in profile.numeric:
+            strength = correlation[self.target].drop(self.target).abs()
+            pairs = {(x, self.target): strength[x] for x in strength.index}
+        else:
+            pairs = {
+                (x, y): abs(correlation.loc[x, y])
+                for i, x in enumerate(profile.numeric)
+                for y in profile.numeric[i + 1 :]
+            }
+        ranked = sorted(pairs, key=lambda pair: -np.nan_to_num(pairs[pair], nan=-1.0))
+        return ranked[: self.max_pairs]
+
+    def _box_stats(
+        self, profile: DatasetProfile, sample: pd.DataFrame, column: str
+    ) -> List[dict]:
+        # Box plot statistics per top category, from the sample. Whiskers span
+        # the 1st to 99th percentile
+        categories = profile.top_categories(column, self.top_categories).index
+        grouped = sample.loc[sample[column].isin(categories)].groupby(column)[
+            self.target
+        ]
+        quantiles = grouped.quantile([0.01, 0.25, 0.5, 0.75, 0.99]).unstack()
+        return [
+            {
+                "label": str(category),
+                "whislo": row[0.01],
+                "q1": row[0.25],
+                "med": row[0.5],
+                "q3": row[0.75],
+                "whishi": row[0.99],
+            }
+            for category, row in quantiles.dropna().iterrows()
+        ]
+
+
+REPORT_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>EDA report</title>
+<style>
+body {{ font-family: sans-serif; margin: 2em; }}
+table {{ border-collapse: collapse; font-size: 0.85em; }}
+th, td {{ border: 1px solid #ccc; padding: 2px 6px; text-align: right; }}
+img {{ max-width: 100%; }}
+</style>
+</head>
+<body>
+<h1>EDA report</h1>
+<p>{n_rows} rows, {n_columns} columns. Statistics cover every row, quantiles
+and category counts are sketched, plots are binned from a uniform sample of
+{sample_rows} rows.</p>
+<h2>Summary statistics</h2>
+{summary}
+<h2>Figures</h2>
+{figures}
+</body>
+</html>
+"""
+
+
+@click.command()
+@click.argument("input_path")
+@click.option("--output", "output_dir", default="eda_report")
+@click.option("--target", default=None, help="Numeric column to plot features against")
+@click.option("--sample-size", default=200_000, type=int)
+@click.option("--chunk-size", default=100_000, type=int)
+@click.option("--workers", default=None, type=int)
+def main(input_path, output_dir, target, sample_size, chunk_size, workers):
+    file_extension = os.path.splitext(input_path)[1]
+    df = DataIngestorFactory.get_data_ingestor(file_extension).ingest(input_path)
+    report = BatchEDAReport(
+        target=target,
+        chunk_size=chunk_size,
+        sample_size=sample_size,
+        n_workers=workers,
+    )
+    path = report.generate(df, output_dir)
+    print(f"EDA report for {len(df)} rows written to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+import gc
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Tuple
+
+import click
+import numpy as np
+import pandas as pd
+import sklearn
+
+from benchmarks.synthetic_data import make_housing_frame, write_zip
+from src.data_splitter import SimpleTrainTestSplitStrategy
+from src.feature_engineering import (
+    LogTransformation,
+    MinMaxSclaing,
+    OneHotEncoding,
+    StandardScaling,
+)
+from src.handle_missing_values import FillMissingValuesStrategy
+from src.ingest_data import ZipDataIngestor
+from src.model_building import LinearRegressionStrategy
+from src.outlier_detection import IQROutlierDetection, ZScoreOutlierDetection
+
+# Each benchmark is (name, setup, run): setup builds the inputs from the
+# synthetic frame and is not measured, run(inputs) is.
+Benchmark = Tuple[str, Callable[[pd.DataFrame, str], tuple], Callable]
+
+
+def _numeric(df: pd.DataFrame) -> List[str]:
+    return [c for c in df.select_dtypes(include=["number"]).columns if c != "SalePrice"]
+
+
+def _categorical(df: pd.DataFrame) -> List[str]:
+    return df.select_dtypes(exclude=["number"]).columns.tolist()
+
+
+def _benchmarks() -> List[Benchmark]:
+    benchmarks = [
+        (
+            "ingest/zip",
+            lambda df, tmp_dir: (write_zip(df, tmp_dir),),
+            lambda path: ZipDataIngestor().ingest(path),
+        ),
+    ]
+    for method in ["mean", "median", "mode", "constant"]:
+        benchmarks.append(
+            (
+                f"missing_values/fill_{method}",
+                lambda df, tmp_dir, method=method: (
+                    FillMissingValuesStrategy(method, fill_value=0),
+                    df,
+                ),
+                lambda strategy, df: strategy.handle(df),
+            )
+        )
+    feature_strategies = {
+        "log": lambda df: LogTransformation(_numeric(df)),
+        "standard_scaling": lambda df: StandardScaling(_numeric(df)),
+        "min_max_scaling": lambda df: MinMaxSclaing(_numeric(df)),
+        "one_hot_encoding": lambda df: OneHotEncoding(_categorical(df)),
+    }
+    for name, make_strategy in feature_strategies.items():
+        benchmarks.append(
+            (
+                f"feature_engineering/{name}",
+                lambda df, tmp_dir, make_strategy=make_strategy: (
+                    make_strategy(df),
+                    df,
+                ),
+                lambda strategy, df: strategy.apply_transformation(df),
+            )
+        )
+    for name, strategy_cls in [
+        ("zscore", ZScoreOutlierDetection),
+        ("iqr", IQROutlierDetection),
+    ]:
+        benchmarks.append(
+            (
+                f"outlier_detection/{name}",
+                lambda df, tmp_dir, strategy_cls=strategy_cls: (
+                    strategy_cls(),
+                    df[_numeric(df)],
+                ),
+                lambda strategy, df: strategy.detect_outliers(df),
+            )
+        )
+    benchmarks += [
+        (
+            "data_splitter/simple",
+            lambda df, tmp_dir: (SimpleTrainTestSplitStrategy(), df),
+            lambda strategy, df: strategy.split(df, "SalePrice"),
+        ),
+        (
+            "model_building/linear_regression",
+            lambda df, tmp_dir: (
+                LinearRegressionStrategy(),
+                df[_numeric(df)].fillna(0),
+                df["SalePrice"],
+            ),
+            lambda strategy, X, y: strategy.build_and_train_model(X, y),
+        ),
+    ]
+    return benchmarks
+
+
+def _measure(run: Callable, inputs: tuple, repeat: int, memory: bool) -> dict:
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        run(*inputs)
+        timings.append(time.perf_counter() - start)
+    result = {"seconds": min(timings), "seconds_all": timings}
+    if memory:
+        # Separate run, tracemalloc slows allocation heavy code down
+        gc.collect()
+        tracemalloc.start()
+        run(*inputs)
+        result["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result
+
+
+def run_benchmarks(
+    scales: List[int],
+    repeat: int = 3,
+    n_numeric: int = 6,
+    n_categorical: int = 2,
+    missing_rate: float = 0.1,
+    only: str = "",
+    memory: bool = True,
+) -> dict:
+    results = []
+    for n_rows in scales:
+        df = make_housing_frame(n_rows, n_numeric, n_categorical, missing_rate)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for name, setup, run in _benchmarks():
+                if only and only not in name:
+                    continue
+                inputs = setup(df, tmp_dir)
+                result = {"name": name, "rows": n_rows}
+                result.update(_measure(run, inputs, repeat, memory))
+                result["rows_per_second"] = n_rows / result["seconds"]
+                click.echo(
+                    f"{name:<40} {n_rows:>10} rows {result['seconds']:>10.4f}s"
+                    + (
+                        f" {result['peak_bytes'] / 2**20:>10.1f} MiB peak"
+                        if memory
+                        else ""
+                    )
+                )
+                results.append(result)
+                del inputs
+        del df
+    return {
+        "metadata": {
+            "created": datetime.now(timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "sklearn": sklearn.__version__,
+            "repeat": repeat,
+            "n_numeric": n_numeric,
+            "n_categorical": n_categorical,
+            "missing_rate": missing_rate,
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float = 0.1) -> List[dict]:
+    # A benchmark regresses when its time or peak memory grew by more than
+    # threshold relative to the baseline run at the same scale
+    previous: Dict[tuple, dict] = {
+        (result["name"], result["rows"]): result for result in baseline["results"]
+    }
+    regressions = []
+    for result in current["results"]:
+        before = previous.get((result["name"], result["rows"]))
+        if before is None:
+            continue
+        for metric in ["seconds", "peak_bytes"]:
+            if metric not in result or not before.get(metric):
+                continue
+            ratio = result[metric] / before[metric]
+            if ratio > 1 + threshold:
+                regressions.append(
+                    {
+                        "name": result["name"],
+                        "rows": result["rows"],
+                        "metric": metric,
+                        "baseline": before[metric],
+                        "current": result[metric],
+                        "ratio": ratio,
+                    }
+                )
+    return regressions
+
+
+@click.command()
+@click.option(
+    "--scales",
+    default="10000",
+    help="Comma separated row counts, e.g. 10000,1000000,10000000",
+)
+@click.option("--repeat", default=3, type=int)
+@click.option("--numeric", "n_numeric", default=6, type=int)
+@click.option("--categorical", "n_categorical", default=2, type=int)
+@click.option("--missing-rate", default=0.1, type=float)
+@click.option("--only", default="", help="Only run benchmarks whose name contains this")
+@click.option("--no-memory", is_flag=True, help="Skip the tracemalloc run")
+@click.option("--output", default="benchmark_results.json")
+@click.option("--baseline", default=None, help="Results file to compare against")
+@click.option("--threshold", default=0.1, type=float, help="Allowed slowdown ratio")
+def main(
+    scales,
+    repeat,
+    n_numeric,
+    n_categorical,
+    missing_rate,
+    only,
+    no_memory,
+    output,
+    baseline,
+    threshold,
+):
+    current = run_benchmarks(
+        [int(scale) for scale in scales.split(",")],
+        repeat=repeat,
+        n_numeric=n_numeric,
+        n_categorical=n_categorical,
+        missing_rate=missing_rate,
+        only=only,
+        memory=not no_memory,
+    )
+    with open(output, "w") as f:
+        json.dump(current, f, indent=2)
+    click.echo(f"Results written to {output}")
+
+    if baseline:
+        with open(baseline) as f:
+            regressions = compare(current, json.load(f), threshold)
+        for regression in regressions:
+            click.echo(
+                f"REGRESSION {regression['name']} ({regression['rows']} rows) "
+                f"{regression['metric']}: {regression['baseline']:.4g} -> "
+                f"{regression['current']:.4g} ({regression['ratio']:.2f}x)"
+            )
+        if regressions:
+            sys.exit(1)
+        click.echo(f"No regressions against {baseline}")
+
+
+if __name__ == "__main__":
+    main()
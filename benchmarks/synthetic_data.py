@@ -0,0 +1,67 @@
+import os
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+NUMERIC_COLUMNS = [
+    "Gr Liv Area",
+    "Lot Frontage",
+    "Lot Area",
+    "Garage Yr Blt",
+    "Total Bsmt SF",
+    "Yr Sold",
+]
+CATEGORICAL_COLUMNS = ["Neighborhood", "Alley", "Garage Type", "House Style"]
+NEIGHBORHOODS = [
+    "NAmes", "CollgCr", "OldTown", "Edwards", "Somerst", "NridgHt", "Gilbert",
+    "Sawyer", "NWAmes", "SawyerW", "Mitchel", "BrkSide", "Crawfor", "IDOTRR",
+    "Timber", "NoRidge", "StoneBr", "SWISU", "ClearCr", "MeadowV", "BrDale",
+    "Blmngtn", "Veenker", "NPkVill", "Blueste",
+]  # fmt: skip
+
+
+def make_housing_frame(
+    n_rows: int,
+    n_numeric: int = 6,
+    n_categorical: int = 2,
+    missing_rate: float = 0.1,
+    seed: int = 0,
+) -> pd.DataFrame:
+    # Ames-like columns first, further columns are generic num_i / cat_i.
+    # Every feature gets missing_rate NaNs, SalePrice is linear in the numeric
+    # features plus a neighborhood effect and noise.
+    rng = np.random.default_rng(seed)
+    numeric_names = NUMERIC_COLUMNS[:n_numeric] + [
+        f"num_{i}" for i in range(len(NUMERIC_COLUMNS), n_numeric)
+    ]
+    categorical_names = CATEGORICAL_COLUMNS[:n_categorical] + [
+        f"cat_{i}" for i in range(len(CATEGORICAL_COLUMNS), n_categorical)
+    ]
+
+    columns = {}
+    price = rng.normal(50_000, 15_000, n_rows)
+    for i, name in enumerate(numeric_names):
+        values = rng.lognormal(mean=4 + i % 4, sigma=0.4, size=n_rows)
+        price += values * rng.uniform(1, 20)
+        columns[name] = values
+    for i, name in enumerate(categorical_names):
+        levels = NEIGHBORHOODS if i == 0 else [f"{name}_{j}" for j in range(6)]
+        codes = rng.integers(len(levels), size=n_rows)
+        price += codes * 2_000.0
+        columns[name] = np.asarray(levels, dtype=object)[codes]
+
+    df = pd.DataFrame(columns)
+    for name in df.columns:
+        missing = rng.random(n_rows) < missing_rate
+        df.loc[missing, name] = np.nan
+    df["SalePrice"] = price
+    return df
+
+
+def write_zip(df: pd.DataFrame, directory: str, name: str = "housing") -> str:
+    path = os.path.join(directory, f"{name}.zip")
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        with archive.open(f"{name}.csv", "w") as csv_file:
+            df.to_csv(csv_file, index=False)
+    return path
@@ -1,10 +1,11 @@
-from step.model_building_step import model_building_step
 from zenml import Model, pipeline, step
 
 from steps.data_ingestion_step import data_ingestion_step
 from steps.data_splitter_step import data_splitter_step
 from steps.feature_engineering_step import feature_engineering_step
 from steps.handling_missing_values_step import handle_missing_values_step
+from steps.model_building_step import model_building_step
+from steps.model_evaluator_step import model_evaluator_step
 from steps.outlier_detection_step import outlier_detection_step
 
 
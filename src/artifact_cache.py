@@ -0,0 +1,101 @@
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import time
+from typing import Optional
+
+import pandas as pd
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "prices_predictor")
+DATA_FILE = "data.parquet"
+TMP_PREFIX = ".tmp-"
+
+
+def hash_path(path: str, block_size: int = 1 << 20) -> str:
+    # Directories (partitioned datasets) hash every file in a stable order
+    if os.path.isdir(path):
+        files = sorted(
+            os.path.join(root, name)
+            for root, _, names in os.walk(path)
+            for name in names
+        )
+    else:
+        files = [path]
+    digest = hashlib.blake2b(digest_size=20)
+    for file in files:
+        digest.update(os.path.relpath(file, path).encode())
+        with open(file, "rb") as f:
+            while block := f.read(block_size):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+class ArtifactCache:
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = 2 << 30):
+        if max_bytes <= 0:
+            raise ValueError(f"Invalid max_bytes {max_bytes}. Must be positive.")
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def entry_dir(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        data_file = os.path.join(self.entry_dir(key), DATA_FILE)
+        try:
+            df = pd.read_parquet(data_file)
+            # mtime doubles as the last access time for LRU eviction
+            os.utime(data_file)
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        logging.info(f"Artifact cache hit for {key}")
+        return df
+
+    def put(self, key: str, df: pd.DataFrame) -> None:
+        # Write into a private directory and rename it into place, so readers
+        # and concurrent writers never see a partial entry
+        tmp_dir = tempfile.mkdtemp(prefix=TMP_PREFIX, dir=self.cache_dir)
+        try:
+            df.to_parquet(os.path.join(tmp_dir, DATA_FILE))
+            os.replace(tmp_dir, self.entry_dir(key))
+        except OSError:
+            # Another process stored the same key first
+            if not os.path.exists(os.path.join(self.entry_dir(key), DATA_FILE)):
+                raise
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        logging.info(f"Stored artifact {key} in cache")
+        self.evict()
+
+    def evict(self) -> None:
+        entries = []
+        for key in os.listdir(self.cache_dir):
+            # Entries being written by put, possibly in another process
+            if key.startswith(TMP_PREFIX):
+                continue
+            data_file = os.path.join(self.entry_dir(key), DATA_FILE)
+            try:
+                stat = os.stat(data_file)
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+            entries.append((stat.st_mtime, stat.st_size, key))
+        entries.sort(reverse=True)
+
+        total = 0
+        for i, (_, size, key) in enumerate(entries):
+            total += size
+            # The most recently used entry is always kept, even if oversized
+            if total > self.max_bytes and i > 0:
+                logging.info(f"Evicting artifact {key} from cache")
+                shutil.rmtree(self.entry_dir(key), ignore_errors=True)
+
+    def clear(self) -> None:
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        os.makedirs(self.cache_dir, exist_ok=True)
@@ -0,0 +1,203 @@
+import json
+import logging
+import os
+import shutil
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Iterator, List, Optional, Tuple
+
+import joblib
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.artifact_cache import hash_path
+from src.compiled_model import CompiledLinearModel
+from src.ingest_data import DataIngestorFactory
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+_MODEL = None
+MANIFEST_FILE = "manifest.json"
+
+
+def load_model(model_path: str):
+    if model_path.endswith(".npz"):
+        return CompiledLinearModel.load(model_path)
+    return joblib.load(model_path)
+
+
+def _init_worker(model_path: str) -> None:
+    # Each worker process loads the model exactly once
+    global _MODEL
+    _MODEL = load_model(model_path)
+
+
+def _score_task(
+    index: int, source, output_dir: str, id_columns: List[str]
+) -> Tuple[int, int]:
+    if isinstance(source, pd.DataFrame):
+        df = source
+    else:
+        # (path, row groups): read straight from a memory map of the input file
+        path, row_groups = source
+        df = pq.ParquetFile(pa.memory_map(path)).read_row_groups(row_groups).to_pandas()
+
+    result = df[id_columns].copy() if id_columns else pd.DataFrame(index=df.index)
+    result["prediction"] = _MODEL.predict(df)
+    # Parts appear atomically, an existing part is always complete
+    part_path = _part_path(output_dir, index)
+    result.to_parquet(part_path + ".tmp", index=False)
+    os.replace(part_path + ".tmp", part_path)
+    return index, len(df)
+
+
+def _part_path(output_dir: str, index: int) -> str:
+    return os.path.join(output_dir, f"part-{index:08d}.parquet")
+
+
+class BatchScorer:
+    def __init__(
+        self,
+        model_path: str,
+        n_workers: Optional[int] = None,
+        chunk_size: int = 500_000,
+        id_columns: Optional[List[str]] = None,
+    ) -> None:
+        if chunk_size <= 0:
+            raise ValueError(f"Invalid chunk_size {chunk_size}. Must be positive.")
+        self.model_path = model_path
+        self.n_workers = n_workers or os.cpu_count()
+        self.chunk_size = chunk_size
+        self.id_columns = id_columns or []
+
+    def score(self, input_path: str, output_path: str) -> dict:
+        # Scored chunks land in <output_path>.parts/ and are merged in chunk order
+        # at the end, a rerun after a crash only scores the missing parts
+        parts_dir = output_path + ".parts"
+        self._prepare_parts_dir(parts_dir, self._manifest(input_path))
+        start = time.perf_counter()
+        rows = skipped = 0
+        max_in_flight = 2 * self.n_workers
+
+        with ProcessPoolExecutor(
+            max_workers=self.n_workers,
+            initializer=_init_worker,
+            initargs=(self.model_path,),
+        ) as executor:
+            pending = set()
+            for index, source in self._chunks(input_path):
+                if os.path.exists(_part_path(parts_dir, index)):
+                    skipped += 1
+                    continue
+                # Bound the chunks held in memory while workers catch up
+                if len(pending) >= max_in_flight:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    rows += self._collect(done, start)
+                pending.add(
+                    executor.submit(
+                        _score_task, index, source, parts_dir, self.id_columns
+                    )
+                )
+            rows += self._collect(wait(pending).done, start)
+
+        self._merge(parts_dir, output_path)
+        elapsed = time.perf_counter() - start
+        stats = {
+            "rows": rows,
+            "skipped_chunks": skipped,
+            "seconds": elapsed,
+            "rows_per_second": rows / elapsed if elapsed else 0.0,
+        }
+        logging.info(f"Batch scoring completed: {stats}")
+        return stats
+
+    def _manifest(self, input_path: str) -> dict:
+        # Everything that decides the content and numbering of the parts. The
+        # model is identified by its content, not its path, a model dumped to a
+        # fresh temporary file on every run still resumes
+        stat = os.stat(input_path)
+        return {
+            "input_path": os.path.abspath(input_path),
+            "input_size": stat.st_size,
+            "input_mtime": stat.st_mtime,
+            "chunk_size": self.chunk_size,
+            "id_columns": self.id_columns,
+            "model_hash": hash_path(self.model_path),
+        }
+
+    @staticmethod
+    def _prepare_parts_dir(parts_dir: str, manifest: dict) -> None:
+        # Parts are only resumed when they were written by the same job, parts
+        # of another input, model or chunking are discarded
+        manifest_path = os.path.join(parts_dir, MANIFEST_FILE)
+        try:
+            with open(manifest_path) as f:
+                previous = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            previous = None
+        if os.path.exists(parts_dir) and previous != manifest:
+            logging.info(f"Discarding parts of a different scoring run in {parts_dir}")
+            shutil.rmtree(parts_dir)
+        os.makedirs(parts_dir, exist_ok=True)
+        if previous != manifest:
+            with open(manifest_path + ".tmp", "w") as f:
+                json.dump(manifest, f)
+            os.replace(manifest_path + ".tmp", manifest_path)
+
+    def _collect(self, futures, start: float) -> int:
+        rows = 0
+        for future in futures:
+            index, n_rows = future.result()
+            rows += n_rows
+        if rows:
+            logging.info(
+                f"Scored {rows} rows, {rows / (time.perf_counter() - start):.0f} rows/s"
+            )
+        return rows
+
+    def _chunks(self, input_path: str) -> Iterator[Tuple[int, object]]:
+        if os.path.isfile(input_path) and input_path.endswith((".parquet", ".pq")):
+            # Workers read their own row groups, only (path, groups) is sent
+            metadata = pq.ParquetFile(input_path).metadata
+            groups, group_rows = [], 0
+            index = 0
+            for group in range(metadata.num_row_groups):
+                groups.append(group)
+                group_rows += metadata.row_group(group).num_rows
+                if group_rows >= self.chunk_size:
+                    yield index, (input_path, groups)
+                    index, groups, group_rows = index + 1, [], 0
+            if groups:
+                yield index, (input_path, groups)
+            return
+
+        file_extension = os.path.splitext(input_path)[1] or ".parquet"
+        if file_extension == ".csv":
+            reader = pd.read_csv(input_path, chunksize=self.chunk_size)
+        else:
+            ingestor = DataIngestorFactory.get_data_ingestor(file_extension)
+            reader = ingestor.ingest_chunks(input_path, self.chunk_size)
+        for index, chunk in enumerate(reader):
+            yield index, chunk
+
+    @staticmethod
+    def _merge(parts_dir: str, output_path: str) -> None:
+        parts = sorted(
+            name for name in os.listdir(parts_dir) if name.endswith(".parquet")
+        )
+        writer = None
+        try:
+            for name in parts:
+                table = pq.read_table(os.path.join(parts_dir, name))
+                if writer is None:
+                    writer = pq.ParquetWriter(output_path + ".tmp", table.schema)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+        if writer is not None:
+            os.replace(output_path + ".tmp", output_path)
+        shutil.rmtree(parts_dir)
@@ -0,0 +1,187 @@
+import numbers
+
+import numpy as np
+
+# Serving-side scorer for the model_building_step pipeline
+# (ColumnTransformer[SimpleImputer | SimpleImputer + OneHotEncoder | to_csr]
+# + LinearRegression).
+# Only numpy is needed to load and score; compile_pipeline reads the fitted
+# sklearn attributes by duck typing so this module never imports sklearn.
+
+
+def _is_missing(values: np.ndarray) -> np.ndarray:
+    if values.dtype.kind == "f":
+        return np.isnan(values)
+    if values.dtype.kind == "O":
+        # Only float NaN, as SimpleImputer(missing_values=np.nan): None passes
+        # the imputer and is looked up as a category like any other value
+        return np.array([isinstance(v, float) and v != v for v in values], dtype=bool)
+    return np.zeros(len(values), dtype=bool)
+
+
+def _category_keys(values) -> np.ndarray:
+    # Categories are looked up by string, numbers by their float value so that
+    # 1, 1.0 and np.int64(1) all match the category "1.0"
+    values = np.asarray(values, dtype=object)
+    keys = values.astype(str).astype(object)
+    numeric = np.array(
+        [isinstance(v, numbers.Number) and not isinstance(v, bool) for v in values],
+        dtype=bool,
+    )
+    if numeric.any():
+        keys[numeric] = values[numeric].astype(np.float64).astype(str)
+    return keys
+
+
+class CompiledLinearModel:
+    def __init__(
+        self,
+        intercept: float,
+        numeric_columns: np.ndarray,
+        numeric_fill: np.ndarray,
+        numeric_coef: np.ndarray,
+        categorical_columns: np.ndarray,
+        categorical_fill: np.ndarray,
+        category_offsets: np.ndarray,
+        category_values: np.ndarray,
+        category_coef: np.ndarray,
+    ) -> None:
+        # Categories of column i are category_values[offsets[i]:offsets[i + 1]],
+        # sorted, with their coefficients at the same positions in category_coef
+        self.intercept = float(intercept)
+        self.numeric_columns = np.asarray(numeric_columns, dtype=str)
+        self.numeric_fill = np.asarray(numeric_fill, dtype=np.float64)
+        self.numeric_coef = np.asarray(numeric_coef, dtype=np.float64)
+        self.categorical_columns = np.asarray(categorical_columns, dtype=str)
+        self.categorical_fill = np.asarray(categorical_fill, dtype=str)
+        self.category_offsets = np.asarray(category_offsets, dtype=np.int64)
+        self.category_values = np.asarray(category_values, dtype=str)
+        self.category_coef = np.asarray(category_coef, dtype=np.float64)
+
+    @property
+    def columns(self) -> list:
+        return self.numeric_columns.tolist() + self.categorical_columns.tolist()
+
+    def predict(self, X) -> np.ndarray:
+        # X is anything indexable by column name: a DataFrame, a dict of arrays
+        first = self.columns[0]
+        n_rows = len(X[first])
+        predictions = np.full(n_rows, self.intercept)
+
+        if len(self.numeric_columns):
+            values = np.empty((n_rows, len(self.numeric_columns)))
+            for j, column in enumerate(self.numeric_columns):
+                values[:, j] = np.asarray(X[column], dtype=np.float64)
+            missing = np.isnan(values)
+            values[missing] = np.broadcast_to(self.numeric_fill, values.shape)[missing]
+            predictions += values @ self.numeric_coef
+
+        for i, column in enumerate(self.categorical_columns):
+            start, stop = self.category_offsets[i], self.category_offsets[i + 1]
+            categories = self.category_values[start:stop]
+            raw = np.asarray(X[column], dtype=object)
+            values = np.where(
+                _is_missing(raw), self.categorical_fill[i], _category_keys(raw)
+            ).astype(str)
+            # Sorted lookup table, unknown categories contribute nothing as
+            # with handle_unknown="ignore"
+            positions = np.searchsorted(categories, values)
+            positions = np.minimum(positions, len(categories) - 1)
+            known = categories[positions] == values
+            predictions[known] += self.category_coef[start + positions[known]]
+        return predictions
+
+    def save(self, path: str) -> None:
+        np.savez(
+            path,
+            intercept=np.array(self.intercept),
+            numeric_columns=self.numeric_columns,
+            numeric_fill=self.numeric_fill,
+            numeric_coef=self.numeric_coef,
+            categorical_columns=self.categorical_columns,
+            categorical_fill=self.categorical_fill,
+            category_offsets=self.category_offsets,
+            category_values=self.category_values,
+            category_coef=self.category_coef,
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "CompiledLinearModel":
+        with np.load(path, allow_pickle=False) as arrays:
+            return cls(**{name: arrays[name] for name in arrays.files})
+
+
+def compile_pipeline(pipeline) -> CompiledLinearModel:
+    preprocessor = pipeline.named_steps["preprocessor"]
+    model = pipeline.named_steps["model"]
+    coef = np.ravel(model.coef_)
+
+    numeric_columns, numeric_fill, numeric_coef = [], [], []
+    categorical_columns, categorical_fill = [], []
+    category_offsets, category_values, category_coef = [0], [], []
+    offset = 0
+    # Output columns of a ColumnTransformer follow the order of transformers_
+    for name, transformer, columns in preprocessor.transformers_:
+        columns = list(columns)
+        if transformer == "drop" or not columns:
+            continue
+        steps = getattr(transformer, "named_steps", {})
+        if "onehot" in steps:
+            encoder = steps["onehot"]
+            if getattr(encoder, "drop_idx_", None) is not None:
+                raise ValueError("Only OneHotEncoder without drop can be compiled")
+            fills = steps["imputer"].statistics_ if "imputer" in steps else None
+            for i, (column, categories) in enumerate(zip(columns, encoder.categories_)):
+                categories = _category_keys(categories).astype(str)
+                order = np.argsort(categories, kind="stable")
+                categorical_columns.append(column)
+                categorical_fill.append(
+                    _category_keys([fills[i]])[0] if fills is not None else ""
+                )
+                category_values.extend(categories[order])
+                category_coef.extend(coef[offset : offset + len(categories)][order])
+                category_offsets.append(len(category_values))
+                offset += len(categories)
+        elif (
+            hasattr(transformer, "statistics_")
+            or transformer == "passthrough"
+            or getattr(getattr(transformer, "func", None), "__name__", None) == "to_csr"
+        ):
+            # SimpleImputer, already numeric passthrough columns, or sparse one
+            # hot columns the pipeline only converts to CSR
+            fills = getattr(transformer, "statistics_", np.full(len(columns), np.nan))
+            numeric_columns.extend(columns)
+            numeric_fill.extend(np.asarray(fills, dtype=np.float64))
+            numeric_coef.extend(coef[offset : offset + len(columns)])
+            offset += len(columns)
+        else:
+            raise ValueError(f"Cannot compile transformer {name}: {transformer!r}")
+
+    if offset != len(coef):
+        raise ValueError(
+            f"Compiled {offset} features but the model has {len(coef)} coefficients"
+        )
+    return CompiledLinearModel(
+        intercept=model.intercept_,
+        numeric_columns=numeric_columns,
+        numeric_fill=numeric_fill,
+        numeric_coef=numeric_coef,
+        categorical_columns=categorical_columns,
+        categorical_fill=categorical_fill,
+        category_offsets=category_offsets,
+        category_values=category_values,
+        category_coef=category_coef,
+    )
+
+
+def check_parity(
+    pipeline, compiled: CompiledLinearModel, X, rtol: float = 1e-6, atol: float = 1e-6
+) -> float:
+    expected = pipeline.predict(X)
+    actual = compiled.predict(X)
+    max_error = float(np.max(np.abs(expected - actual))) if len(expected) else 0.0
+    if not np.allclose(expected, actual, rtol=rtol, atol=atol):
+        raise ValueError(
+            f"Compiled model diverges from the pipeline, max abs error {max_error}"
+        )
+    return max_error
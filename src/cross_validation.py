@@ -0,0 +1,110 @@
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.data_splitter import DataSplitter, SimpleTrainTestSplitStrategy
+from src.model_building import ModelBuilder, ModelBuildingStrategy
+from src.model_evaluator import METRICS, RegressionMetricsAccumulator
+from src.shared_data import SharedArrays, load_shared
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+
+def _run_fold(
+    paths: Dict[str, str],
+    columns: List[str],
+    target: str,
+    strategy: ModelBuildingStrategy,
+    fold: int,
+) -> dict:
+    # Runs in a worker process, the data arrives as read-only memory maps and
+    # only this fold's rows are gathered
+    data = load_shared(paths)
+    train_idx, test_idx = data[f"train_{fold}"], data[f"test_{fold}"]
+    X_train = pd.DataFrame(data["X"][train_idx], columns=columns)
+    y_train = pd.Series(data["y"][train_idx], name=target)
+
+    start = time.perf_counter()
+    model = ModelBuilder(strategy).build_model(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+
+    accumulator = RegressionMetricsAccumulator()
+    accumulator.update(
+        data["y"][test_idx],
+        model.predict(pd.DataFrame(data["X"][test_idx], columns=columns)),
+    )
+    return {"fold": fold, **accumulator.result(), "fit_seconds": fit_seconds}
+
+
+class CrossValidator:
+    # Folds come from the DataSplitter strategy as index arrays, the feature
+    # matrix is written once to memory mapped files and every fold is fitted
+    # with the ModelBuilder strategy in its own worker process
+    def __init__(
+        self,
+        strategy: ModelBuildingStrategy,
+        splitter: Optional[DataSplitter] = None,
+        n_folds: int = 5,
+        n_workers: Optional[int] = None,
+    ) -> None:
+        if n_folds < 2:
+            raise ValueError(f"Invalid n_folds {n_folds}. Must be at least 2.")
+        self.strategy = strategy
+        self.splitter = splitter or DataSplitter(SimpleTrainTestSplitStrategy())
+        self.n_folds = n_folds
+        self.n_workers = n_workers or os.cpu_count()
+        self.results_ = None
+
+    def cross_validate(self, df: pd.DataFrame, target: str) -> dict:
+        features = df.columns.drop(target)
+        non_numeric = features.difference(
+            df[features].select_dtypes(include=["number"]).columns
+        )
+        if len(non_numeric):
+            raise TypeError(
+                f"Cross validation needs numeric features, got {list(non_numeric)}"
+            )
+
+        folds = self.splitter.fold_indices(df, target, self.n_folds)
+        arrays = {
+            "X": df[features].to_numpy(dtype=np.float64),
+            "y": df[target].to_numpy(dtype=np.float64),
+        }
+        for fold, (train_idx, test_idx) in enumerate(folds):
+            arrays[f"train_{fold}"] = train_idx
+            arrays[f"test_{fold}"] = test_idx
+        logging.info(f"Cross validating {len(folds)} folds on {self.n_workers} workers")
+        with SharedArrays(arrays) as paths:
+            del arrays
+            with ProcessPoolExecutor(
+                max_workers=min(self.n_workers, len(folds))
+            ) as executor:
+                futures = [
+                    executor.submit(
+                        _run_fold, paths, features.tolist(), target, self.strategy, fold
+                    )
+                    for fold in range(len(folds))
+                ]
+                results = [future.result() for future in futures]
+
+        self.results_ = pd.DataFrame(results).set_index("fold")
+        summary = {
+            metric: {
+                "mean": float(self.results_[metric].mean()),
+                "std": float(self.results_[metric].std(ddof=1)),
+            }
+            for metric in METRICS
+        }
+        summary["n_folds"] = len(folds)
+        logging.info(
+            f"Cross validation completed: rmse={summary['rmse']['mean']:.4f}"
+            f" ± {summary['rmse']['std']:.4f}"
+        )
+        return summary
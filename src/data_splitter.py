@@ -1,36 +1,201 @@
 import logging
 from abc import ABC, abstractmethod
+from typing import List, Tuple
 
+import numpy as np
 import pandas as pd
-from sklearn.model_selection import train_test_split
+from sklearn.model_selection import (
+    GroupKFold,
+    GroupShuffleSplit,
+    KFold,
+    StratifiedKFold,
+    TimeSeriesSplit,
+    train_test_split,
+)
+
+from src.instrumentation import instrumented
 
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
 )
 
 
+def _as_slice(positions):
+    # A contiguous increasing run of positions as the equivalent slice
+    if np.ndim(positions) == 0 or not len(positions):
+        return positions
+    if (
+        positions[-1] - positions[0] == len(positions) - 1
+        and (np.diff(positions) > 0).all()
+    ):
+        return slice(positions[0], positions[-1] + 1)
+    return positions
+
+
+def _take(df: pd.DataFrame, rows: np.ndarray, columns) -> pd.DataFrame:
+    # Contiguous runs of rows and columns are passed to iloc as slices. A row
+    # slice with a single column, or with a column slice inside one dtype
+    # block (e.g. an all-float frame whose target is the last column), is a
+    # view of df. Anything else is gathered into one copy
+    return df.iloc[_as_slice(rows), _as_slice(columns)]
+
+
 class DataSplitterStrategy(ABC):
     @abstractmethod
-    def split(self, df: pd.DataFrame, target: str, test_size: float = 0.2) -> tuple:
+    def split_indices(
+        self, df: pd.DataFrame, target: str, test_size: float = 0.2
+    ) -> Tuple[np.ndarray, np.ndarray]:
         pass
 
-
-class SimpleTrainTestSplitStrategy(DataSplitterStrategy):
+    def fold_indices(
+        self, df: pd.DataFrame, target: str, n_folds: int = 5
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        folds = KFold(
+            n_splits=n_folds,
+            shuffle=True,
+            random_state=getattr(self, "random_state", 42),
+        )
+        return list(folds.split(np.empty(len(df))))
 
     def split(self, df: pd.DataFrame, target: str, test_size: float = 0.2) -> tuple:
+        # Splits are materialized from integer positions, df itself is never
+        # copied as a whole
         logging.info(f"Splitting data with test size {test_size} and target {target}")
+        train_idx, test_idx = self.split_indices(df, target, test_size)
+        target_position = df.columns.get_loc(target)
+        feature_positions = np.flatnonzero(df.columns != target)
 
-        X = df.drop(columns=[target])
-        y = df[target]
-
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=test_size, random_state=42
-        )
+        X_train = _take(df, train_idx, feature_positions)
+        X_test = _take(df, test_idx, feature_positions)
+        y_train = _take(df, train_idx, target_position)
+        y_test = _take(df, test_idx, target_position)
 
         logging.info("Data splitting completed")
         return X_train, X_test, y_train, y_test
 
 
+class SimpleTrainTestSplitStrategy(DataSplitterStrategy):
+    def __init__(self, random_state: int = 42) -> None:
+        self.random_state = random_state
+
+    def split_indices(
+        self, df: pd.DataFrame, target: str, test_size: float = 0.2
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        return train_test_split(
+            np.arange(len(df)), test_size=test_size, random_state=self.random_state
+        )
+
+
+class StratifiedTrainTestSplitStrategy(DataSplitterStrategy):
+    # Stratifies on quantile bins of the (continuous) target so both splits
+    # cover the whole price range
+    def __init__(self, n_bins: int = 10, random_state: int = 42) -> None:
+        self.n_bins = n_bins
+        self.random_state = random_state
+
+    def split_indices(
+        self, df: pd.DataFrame, target: str, test_size: float = 0.2
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        bins = pd.qcut(df[target], self.n_bins, labels=False, duplicates="drop")
+        return train_test_split(
+            np.arange(len(df)),
+            test_size=test_size,
+            random_state=self.random_state,
+            stratify=bins.fillna(-1).to_numpy(),
+        )
+
+    def fold_indices(
+        self, df: pd.DataFrame, target: str, n_folds: int = 5
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        bins = pd.qcut(df[target], self.n_bins, labels=False, duplicates="drop")
+        folds = StratifiedKFold(
+            n_splits=n_folds, shuffle=True, random_state=self.random_state
+        )
+        return list(folds.split(np.empty(len(df)), bins.fillna(-1).to_numpy()))
+
+
+class GroupTrainTestSplitStrategy(DataSplitterStrategy):
+    # All rows of a group (e.g. the same property sold several times) end up
+    # on the same side, test_size is the fraction of groups
+    def __init__(self, group_column: str = "PID", random_state: int = 42) -> None:
+        self.group_column = group_column
+        self.random_state = random_state
+
+    def split_indices(
+        self, df: pd.DataFrame, target: str, test_size: float = 0.2
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        splitter = GroupShuffleSplit(
+            n_splits=1, test_size=test_size, random_state=self.random_state
+        )
+        train_idx, test_idx = next(
+            splitter.split(np.empty(len(df)), groups=df[self.group_column])
+        )
+        return np.sort(train_idx), np.sort(test_idx)
+
+    def fold_indices(
+        self, df: pd.DataFrame, target: str, n_folds: int = 5
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        folds = GroupKFold(n_splits=n_folds)
+        return list(folds.split(np.empty(len(df)), groups=df[self.group_column]))
+
+
+class TimeBasedTrainTestSplitStrategy(DataSplitterStrategy):
+    # The most recent test_size of the rows form the test set. Rows sharing the
+    # cutoff time all go to test, so no timestamp is on both sides
+    def __init__(self, time_column: str = "Yr Sold") -> None:
+        self.time_column = time_column
+
+    def split_indices(
+        self, df: pd.DataFrame, target: str, test_size: float = 0.2
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        times = df[self.time_column].to_numpy()
+        n_test = max(1, int(np.ceil(len(df) * test_size)))
+        cutoff = np.partition(times, len(times) - n_test)[len(times) - n_test]
+        is_test = times >= cutoff
+        train_indices, test_indices = np.flatnonzero(~is_test), np.flatnonzero(is_test)
+        # All rows at or after a cutoff on the earliest time leave nothing to
+        # train on
+        if len(train_indices) == 0 or len(test_indices) == 0:
+            raise ValueError(
+                f"Time based split on {self.time_column} with test_size "
+                f"{test_size} leaves {len(train_indices)} train and "
+                f"{len(test_indices)} test rows. Both sides must be non-empty."
+            )
+        return train_indices, test_indices
+
+    def fold_indices(
+        self, df: pd.DataFrame, target: str, n_folds: int = 5
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        # Expanding window over the distinct times, each fold trains on the
+        # past and tests on the following period
+        times = df[self.time_column].to_numpy()
+        distinct = np.unique(times)
+        # Every fold needs at least one period to train on and one to test on,
+        # and TimeSeriesSplit at least 2 folds
+        if len(distinct) < 3:
+            raise ValueError(
+                f"Time column {self.time_column} has {len(distinct)} distinct "
+                "values. Must have at least 3 for time based folds."
+            )
+        if n_folds > len(distinct) - 1:
+            logging.warning(
+                f"Time column {self.time_column} has {len(distinct)} distinct "
+                f"values, using {len(distinct) - 1} folds instead of {n_folds}"
+            )
+            n_folds = len(distinct) - 1
+        folds = []
+        for train_times, test_times in TimeSeriesSplit(n_splits=n_folds).split(
+            distinct
+        ):
+            folds.append(
+                (
+                    np.flatnonzero(times <= distinct[train_times[-1]]),
+                    np.flatnonzero(np.isin(times, distinct[test_times])),
+                )
+            )
+        return folds
+
+
 class DataSplitter:
     def __init__(self, strategy: DataSplitterStrategy) -> None:
         self.strategy = strategy
@@ -38,6 +203,19 @@ class DataSplitter:
     def set_strategy(self, strategy: DataSplitterStrategy) -> None:
         self.strategy = strategy
 
+    @instrumented
+    def split_indices(
+        self, df: pd.DataFrame, target: str, test_size: float = 0.2
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        return self.strategy.split_indices(df, target, test_size)
+
+    @instrumented
+    def fold_indices(
+        self, df: pd.DataFrame, target: str, n_folds: int = 5
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        return self.strategy.fold_indices(df, target, n_folds)
+
+    @instrumented
     def apply_split(
         self, df: pd.DataFrame, target: str, test_size: float = 0.2
     ) -> tuple:
@@ -0,0 +1,148 @@
+import json
+import logging
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+INTEGER_DTYPES = ["int8", "int16", "int32", "int64"]
+
+
+class DtypeOptimizer:
+    def __init__(
+        self,
+        max_category_ratio: float = 0.5,
+        downcast_floats: bool = True,
+        schema: Optional[Dict[str, str]] = None,
+    ) -> None:
+        if not 0 < max_category_ratio <= 1:
+            raise ValueError(
+                f"Invalid max_category_ratio {max_category_ratio}. Must be in (0, 1]."
+            )
+        self.max_category_ratio = max_category_ratio
+        self.downcast_floats = downcast_floats
+        self.schema = schema
+
+    def infer_schema(self, df: pd.DataFrame) -> Dict[str, str]:
+        logging.info("Inferring optimized dtypes")
+        schema = {}
+        for column in df.columns:
+            schema[column] = self._infer_dtype(df[column])
+        self.schema = schema
+        return schema
+
+    def optimize(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        if self.schema is None:
+            self.infer_schema(df)
+        bytes_before = df.memory_usage(index=False, deep=True)
+
+        df_optimized = df.copy()
+        for column, dtype in self.schema.items():
+            if column not in df_optimized.columns:
+                continue
+            if self._is_safe_cast(df_optimized[column], dtype):
+                df_optimized[column] = df_optimized[column].astype(dtype)
+            else:
+                logging.warning(
+                    f"Column {column} no longer fits {dtype}, keeping {df[column].dtype}"
+                )
+
+        bytes_after = df_optimized.memory_usage(index=False, deep=True)
+        report = pd.DataFrame(
+            {
+                "original_dtype": df.dtypes.astype(str),
+                "optimized_dtype": df_optimized.dtypes.astype(str),
+                "bytes_before": bytes_before,
+                "bytes_after": bytes_after,
+                "bytes_saved": bytes_before - bytes_after,
+            }
+        )
+        logging.info(
+            f"Dtype optimization saved {report['bytes_saved'].sum()} of "
+            f"{report['bytes_before'].sum()} bytes"
+        )
+        return df_optimized, report
+
+    def save_schema(self, path: str) -> None:
+        if self.schema is None:
+            raise ValueError("No schema to save, call infer_schema or optimize first")
+        with open(path, "w") as f:
+            json.dump(self.schema, f, indent=2)
+
+    @classmethod
+    def from_schema_file(cls, path: str, **kwargs) -> "DtypeOptimizer":
+        with open(path) as f:
+            return cls(schema=json.load(f), **kwargs)
+
+    def _infer_dtype(self, series: pd.Series) -> str:
+        if pd.api.types.is_bool_dtype(series):
+            return "bool"
+        if pd.api.types.is_integer_dtype(series):
+            return self._smallest_integer(series)
+        if pd.api.types.is_float_dtype(series):
+            if self.downcast_floats and self._is_lossless_float32(series):
+                return "float32"
+            return str(series.dtype)
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            return "category"
+        if pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series):
+            n_values = series.count()
+            if n_values and series.nunique() / n_values <= self.max_category_ratio:
+                return "category"
+        return str(series.dtype)
+
+    @staticmethod
+    def _smallest_integer(series: pd.Series) -> str:
+        if series.empty:
+            return str(series.dtype)
+        low, high = series.min(), series.max()
+        for dtype in INTEGER_DTYPES:
+            info = np.iinfo(dtype)
+            if info.min <= low and high <= info.max:
+                return dtype
+        return str(series.dtype)
+
+    @staticmethod
+    def _is_lossless_float32(series: pd.Series) -> bool:
+        values = series.to_numpy(dtype=np.float64)
+        with np.errstate(over="ignore"):
+            roundtrip = values.astype(np.float32).astype(np.float64)
+        return bool(np.array_equal(values, roundtrip, equal_nan=True))
+
+    def _is_safe_cast(self, series: pd.Series, dtype: str) -> bool:
+        # A stored schema may meet data it was not inferred from, never wrap
+        # integers or silently round floats
+        if dtype in INTEGER_DTYPES:
+            if not pd.api.types.is_integer_dtype(series):
+                return False
+            return INTEGER_DTYPES.index(self._smallest_integer(series)) <= (
+                INTEGER_DTYPES.index(dtype)
+            )
+        if dtype == "float32":
+            return pd.api.types.is_numeric_dtype(series) and self._is_lossless_float32(
+                series
+            )
+        if dtype == "bool":
+            # astype(bool) turns NaN and any other value into True
+            if pd.api.types.is_bool_dtype(series):
+                return True
+            return not series.isna().any() and bool(series.isin([True, False]).all())
+        if dtype == "category":
+            # Numeric columns would drop out of select_dtypes("number"), and a
+            # column that became high cardinality would grow instead
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                return True
+            if not (
+                pd.api.types.is_object_dtype(series)
+                or pd.api.types.is_string_dtype(series)
+            ):
+                return False
+            n_values = series.count()
+            return not n_values or series.nunique() / n_values <= (
+                self.max_category_ratio
+            )
+        return True
@@ -1,88 +1,566 @@
+import copy
+import json
 import logging
 from abc import ABC, abstractmethod
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 import numpy as np
 import pandas as pd
-from sklearn.preprocessing import MinMaxScaler, OneHotEncoder, StandardScaler
+import scipy.sparse as sp
+
+from src.instrumentation import instrumented
+from src.parallel import ColumnParallelExecutor
+from src.streaming_stats import RunningMoments
 
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
 )
 
+_STRATEGIES: Dict[str, type] = {}
+
 
 class FeatureEngineerStrategy(ABC):
+    requires_fit = True
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        _STRATEGIES[cls.__name__] = cls
+
+    def __init__(self, features) -> None:
+        self.features = list(features)
+        self.state_ = None
+        self._partial = None
+
+    def fit(self, df: pd.DataFrame) -> "FeatureEngineerStrategy":
+        return self
+
+    def partial_fit(self, df: pd.DataFrame) -> "FeatureEngineerStrategy":
+        if self.requires_fit:
+            raise ValueError(f"{type(self).__name__} cannot be fitted incrementally")
+        return self
+
+    def fit_chunks(self, chunks: Iterable[pd.DataFrame]) -> "FeatureEngineerStrategy":
+        # One pass over any number of chunks, the fitted state is the same as
+        # fitting on all of them at once
+        self.state_, self._partial = None, None
+        for chunk in chunks:
+            self.partial_fit(chunk)
+        return self
+
     @abstractmethod
+    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        pass
+
     def apply_transformation(self, df: pd.DataFrame) -> pd.DataFrame:
+        return self.fit(df).transform(df)
+
+    def get_params(self) -> dict:
+        return {"features": self.features}
+
+    def get_state(self) -> dict:
+        return self.state_
+
+    def set_state(self, state: dict) -> None:
+        self.state_ = state
+
+    def to_dict(self) -> dict:
+        self._check_is_fitted()
+        return {
+            "strategy": type(self).__name__,
+            "params": self.get_params(),
+            "state": self.get_state(),
+        }
+
+    @staticmethod
+    def from_dict(config: dict) -> "FeatureEngineerStrategy":
+        strategy_cls = _STRATEGIES.get(config["strategy"])
+        if strategy_cls is None:
+            raise ValueError(
+                f"Unknown Feature Engineering strategy {config['strategy']}"
+            )
+        strategy = strategy_cls(**config["params"])
+        strategy.set_state(config["state"])
+        return strategy
+
+    def save(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f)
+
+    @staticmethod
+    def load(path: str) -> "FeatureEngineerStrategy":
+        with open(path) as f:
+            return FeatureEngineerStrategy.from_dict(json.load(f))
+
+    def _check_is_fitted(self) -> None:
+        if self.requires_fit and self.state_ is None:
+            raise ValueError(
+                f"{type(self).__name__} is not fitted, call fit before transform"
+            )
+
+
+class NumericFeatureEngineerStrategy(FeatureEngineerStrategy):
+    # Fitted state is a dict of per-feature arrays, transforming a batch is a few
+    # vectorized operations over one float64 block of the features
+    def fit(self, df: pd.DataFrame) -> "NumericFeatureEngineerStrategy":
+        # Column-major like the parallel path, the reductions then sum every
+        # column in the same order and both fit the same state
+        self.state_ = self._fit_array(
+            np.asfortranarray(df[self.features].to_numpy(dtype=np.float64))
+        )
+        return self
+
+    def partial_fit(self, df: pd.DataFrame) -> "NumericFeatureEngineerStrategy":
+        if self.requires_fit:
+            self.state_ = self._partial_fit_array(
+                df[self.features].to_numpy(dtype=np.float64)
+            )
+        return self
+
+    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        self._check_is_fitted()
+        values = df[self.features].to_numpy(dtype=np.float64, copy=True)
+        df_transformed = df.copy()
+        df_transformed[self.features] = self._transform_array(values)
+        return df_transformed
+
+    def get_state(self) -> dict:
+        return {key: value.tolist() for key, value in self.state_.items()}
+
+    def set_state(self, state: dict) -> None:
+        self.state_ = {
+            key: np.asarray(value, dtype=np.float64) for key, value in state.items()
+        }
+
+    def _fit_array(self, values: np.ndarray) -> Dict[str, np.ndarray]:
+        return {}
+
+    def _partial_fit_array(self, values: np.ndarray) -> Dict[str, np.ndarray]:
+        raise ValueError(f"{type(self).__name__} cannot be fitted incrementally")
+
+    @abstractmethod
+    def _transform_array(self, values: np.ndarray) -> np.ndarray:
         pass
 
 
-class LogTransformation(FeatureEngineerStrategy):
-    def __init__(self, features) -> None:
-        self.features = features
+class LogTransformation(NumericFeatureEngineerStrategy):
+    requires_fit = False
 
-    def apply_transformation(self, df: pd.DataFrame) -> pd.DataFrame:
+    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
         logging.info(f"Applying log transformation to features {self.features}")
-        df_transformed = df.copy()
-        for feature in self.features:
-            df_transformed[feature] = np.log1p(df[feature])
+        df_transformed = super().transform(df)
         logging.info("Log Transformation Completed")
         return df_transformed
 
+    def get_state(self) -> dict:
+        return {}
 
-class StandardScaling(FeatureEngineerStrategy):
-    def __init__(self, features) -> None:
-        self.features = features
-        self.scalar = StandardScaler()
+    def _transform_array(self, values: np.ndarray) -> np.ndarray:
+        return np.log1p(values, out=values)
 
-    def apply_transformation(self, df: pd.DataFrame) -> pd.DataFrame:
+
+class StandardScaling(NumericFeatureEngineerStrategy):
+    def fit(self, df: pd.DataFrame) -> "StandardScaling":
+        logging.info(f"Fitting Standard Scaling on features {self.features}")
+        return super().fit(df)
+
+    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
         logging.info(f"Applying Standard Scaling to features {self.features}")
-        df_transformed = df.copy()
-        df_transformed[self.features] = self.scalar.fit_transform(
-            df[self.features].to_xarray()
-        )
+        df_transformed = super().transform(df)
         logging.info("Standard Scaling Completed")
         return df_transformed
 
+    def _fit_array(self, values: np.ndarray) -> Dict[str, np.ndarray]:
+        scale = np.nanstd(values, axis=0)
+        # Constant features are left unscaled, as sklearn's StandardScaler does
+        scale[scale == 0] = 1.0
+        return {"mean": np.nanmean(values, axis=0), "scale": scale}
 
-class MinMaxSclaing(FeatureEngineerStrategy):
+    def _partial_fit_array(self, values: np.ndarray) -> Dict[str, np.ndarray]:
+        if self._partial is None:
+            self._partial = RunningMoments(values.shape[1])
+        moments = self._partial.update(values)
+        scale = moments.std(ddof=0)
+        scale[scale == 0] = 1.0
+        return {
+            "mean": np.where(moments.count > 0, moments.mean, np.nan),
+            "scale": scale,
+        }
+
+    def _transform_array(self, values: np.ndarray) -> np.ndarray:
+        values -= self.state_["mean"]
+        values /= self.state_["scale"]
+        return values
+
+
+class MinMaxSclaing(NumericFeatureEngineerStrategy):
     def __init__(self, features, feature_range=(0, 1)) -> None:
-        self.features = features
-        self.scalar = MinMaxScaler(feature_range=feature_range)
+        super().__init__(features)
+        self.feature_range = tuple(feature_range)
 
-    def apply_transformation(self, df: pd.DataFrame) -> pd.DataFrame:
+    def fit(self, df: pd.DataFrame) -> "MinMaxSclaing":
+        logging.info(f"Fitting Min Max Scaling on features {self.features}")
+        return super().fit(df)
+
+    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
         logging.info(f"Applying Min Max Scaling to features {self.features}")
-        df_transformed = df.copy()
-        df_transformed[self.features] = self.scalar.fit_transform(
-            df[self.features].to_xarray()
-        )
+        df_transformed = super().transform(df)
         logging.info("Min Max Scaling Completed")
         return df_transformed
 
+    def get_params(self) -> dict:
+        return {"features": self.features, "feature_range": list(self.feature_range)}
+
+    def _fit_array(self, values: np.ndarray) -> Dict[str, np.ndarray]:
+        return self._range_state(np.nanmin(values, axis=0), np.nanmax(values, axis=0))
+
+    def _partial_fit_array(self, values: np.ndarray) -> Dict[str, np.ndarray]:
+        data_min, data_max = np.nanmin(values, axis=0), np.nanmax(values, axis=0)
+        if self._partial is not None:
+            data_min = np.fmin(self._partial[0], data_min)
+            data_max = np.fmax(self._partial[1], data_max)
+        self._partial = (data_min, data_max)
+        return self._range_state(data_min, data_max)
+
+    def _range_state(
+        self, data_min: np.ndarray, data_max: np.ndarray
+    ) -> Dict[str, np.ndarray]:
+        data_range = data_max - data_min
+        data_range[data_range == 0] = 1.0
+        low, high = self.feature_range
+        scale = (high - low) / data_range
+        return {"scale": scale, "min": low - data_min * scale}
+
+    def _transform_array(self, values: np.ndarray) -> np.ndarray:
+        values *= self.state_["scale"]
+        values += self.state_["min"]
+        return values
+
 
 class OneHotEncoding(FeatureEngineerStrategy):
-    def __init__(self, features) -> None:
-        self.features = features
-        self.encoder = OneHotEncoder(sparse=False, drop="first")
+    def __init__(self, features, sparse: bool = False) -> None:
+        super().__init__(features)
+        self.sparse = sparse
 
-    def apply_transformation(self, df: pd.DataFrame) -> pd.DataFrame:
+    def fit(self, df: pd.DataFrame) -> "OneHotEncoding":
+        logging.info(f"Fitting One hot encoding on features {self.features}")
+        self.state_ = {
+            feature: sorted(df[feature].dropna().unique().tolist())
+            for feature in self.features
+        }
+        return self
+
+    def partial_fit(self, df: pd.DataFrame) -> "OneHotEncoding":
+        if self._partial is None:
+            self._partial = {feature: set() for feature in self.features}
+        for feature in self.features:
+            self._partial[feature].update(df[feature].dropna().unique().tolist())
+        self.state_ = {
+            feature: sorted(categories) for feature, categories in self._partial.items()
+        }
+        return self
+
+    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        self._check_is_fitted()
         logging.info(f"Applying One hot encoding to features {self.features}")
-        df_transformed = df.copy()
-        encoded_df = pd.DataFrame(
-            self.encoder.fit_transform(df[self.features].to_xarray()),
-            columns=self.encoder.get_feature_names_out(self.features),
-        )
+        encoded_df = _encode_frame([self], df, self.sparse)
         df_transformed = df.drop(columns=self.features)
-        df_transformed = pd.concat([df_transformed, encoded_df], axis=1)
+        df_transformed = pd.concat([df_transformed, encoded_df], axis=1, copy=False)
         logging.info("One hot encoding Completed")
         return df_transformed
 
+    def get_params(self) -> dict:
+        return {"features": self.features, "sparse": self.sparse}
+
+    def get_feature_names_out(self) -> list:
+        # The first category of each feature is dropped, matching drop="first"
+        return [
+            f"{feature}_{category}"
+            for feature in self.features
+            for category in self.state_[feature][1:]
+        ]
+
+    def _encode_indices(
+        self, df: pd.DataFrame, offset: int = 0
+    ) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        # (row, column) positions of the ones, per feature. Unknown and missing
+        # values get code -1 and the dropped first category code 0, both encode
+        # as all zeros
+        for feature in self.features:
+            categories = self.state_[feature]
+            codes = pd.Categorical(df[feature], categories=categories).codes
+            rows = np.flatnonzero(codes > 0)
+            yield rows, offset + codes[rows] - 1
+            offset += len(categories) - 1
+
+
+def _encode_frame(
+    encoders: List[OneHotEncoding], df: pd.DataFrame, sparse: bool
+) -> pd.DataFrame:
+    names, indices = [], []
+    for encoder in encoders:
+        indices.extend(encoder._encode_indices(df, len(names)))
+        names.extend(encoder.get_feature_names_out())
+
+    if sparse:
+        rows = np.concatenate([r for r, _ in indices] + [np.empty(0, np.intp)])
+        cols = np.concatenate([c for _, c in indices] + [np.empty(0, np.intp)])
+        matrix = sp.csr_matrix(
+            (np.ones(len(rows), dtype=np.uint8), (rows, cols)),
+            shape=(len(df), len(names)),
+        )
+        return pd.DataFrame.sparse.from_spmatrix(matrix, index=df.index, columns=names)
+
+    encoded = np.zeros((len(df), len(names)), dtype=np.uint8)
+    for rows, cols in indices:
+        encoded[rows, cols] = 1
+    return pd.DataFrame(encoded, columns=names, index=df.index)
+
+
+def sparse_columns(df: pd.DataFrame) -> list:
+    return [
+        column
+        for column, dtype in df.dtypes.items()
+        if isinstance(dtype, pd.SparseDtype)
+    ]
+
+
+def to_csr(df: pd.DataFrame) -> sp.csr_matrix:
+    # Sparse extension columns to CSR without materializing a dense block
+    return df.sparse.to_coo().tocsr()
+
+
+class CompositeFeatureEngineering(FeatureEngineerStrategy):
+    # Runs an ordered list of strategies as one fused plan: the frame is copied
+    # once, all numeric strategies run over a single column-major float64 block
+    # and all encoded columns land in one preallocated (or sparse) array
+    def __init__(self, strategies: List[Union[FeatureEngineerStrategy, dict]]) -> None:
+        self.strategies = [
+            (
+                FeatureEngineerStrategy.from_dict(strategy)
+                if isinstance(strategy, dict)
+                else strategy
+            )
+            for strategy in strategies
+        ]
+        self._validate_plan()
+        self.features = list(
+            dict.fromkeys(f for s in self.strategies for f in s.features)
+        )
+        self.state_ = None
+
+    def fit(self, df: pd.DataFrame) -> "CompositeFeatureEngineering":
+        self._run(df, fit=True)
+        return self
+
+    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        self._check_is_fitted()
+        return self._run(df, fit=False)
+
+    def apply_transformation(self, df: pd.DataFrame) -> pd.DataFrame:
+        return self._run(df, fit=True)
+
+    def get_params(self) -> dict:
+        return {"strategies": [strategy.to_dict() for strategy in self.strategies]}
+
+    def get_state(self) -> dict:
+        return {}
+
+    def set_state(self, state: dict) -> None:
+        pass
+
+    def _check_is_fitted(self) -> None:
+        for strategy in self.strategies:
+            strategy._check_is_fitted()
+
+    def _validate_plan(self) -> None:
+        # Encoding is deferred to the end of the plan and reads the input
+        # frame, which is only equivalent when no column is both transformed
+        # by a numeric strategy and one hot encoded, in either order
+        encoded, transformed = set(), set()
+        for strategy in self.strategies:
+            if not strategy.features:
+                raise ValueError(
+                    f"{type(strategy).__name__} in composite plan has no features"
+                )
+            if isinstance(strategy, OneHotEncoding):
+                encoded.update(strategy.features)
+            elif isinstance(strategy, NumericFeatureEngineerStrategy):
+                transformed.update(strategy.features)
+            else:
+                raise ValueError(
+                    f"Unsupported strategy {type(strategy).__name__} in composite plan"
+                )
+        if encoded & transformed:
+            raise ValueError(
+                f"Columns {sorted(encoded & transformed)} are both transformed and "
+                "one hot encoded in the composite plan"
+            )
+
+    def _run(self, df: pd.DataFrame, fit: bool) -> pd.DataFrame:
+        logging.info(
+            f"Applying fused feature engineering plan of {len(self.strategies)} strategies"
+        )
+        numeric = [
+            s for s in self.strategies if isinstance(s, NumericFeatureEngineerStrategy)
+        ]
+        encoders = [s for s in self.strategies if isinstance(s, OneHotEncoding)]
+        numeric_features = list(dict.fromkeys(f for s in numeric for f in s.features))
+        encoded_features = list(dict.fromkeys(f for s in encoders for f in s.features))
+
+        # Column-major so every feature is a contiguous run for the ufuncs
+        block = np.asfortranarray(df[numeric_features].to_numpy(dtype=np.float64))
+        positions = {feature: i for i, feature in enumerate(numeric_features)}
+        for strategy in numeric:
+            columns = [positions[feature] for feature in strategy.features]
+            contiguous = columns == list(range(columns[0], columns[0] + len(columns)))
+            values = (
+                block[:, columns[0] : columns[0] + len(columns)]
+                if contiguous
+                else block[:, columns]
+            )
+            if fit and strategy.requires_fit:
+                strategy.state_ = strategy._fit_array(values)
+            values = strategy._transform_array(values)
+            if not contiguous:
+                block[:, columns] = values
+
+        if fit:
+            for strategy in encoders:
+                strategy.fit(df)
+        sparse = any(strategy.sparse for strategy in encoders)
+        encoded_df = _encode_frame(encoders, df, sparse) if encoders else None
+
+        # The one copy of the frame
+        df_transformed = (
+            df.drop(columns=encoded_features) if encoded_features else df.copy()
+        )
+        if numeric_features:
+            df_transformed[numeric_features] = block
+        if encoded_df is not None:
+            df_transformed = pd.concat([df_transformed, encoded_df], axis=1, copy=False)
+        self.state_ = {}
+        logging.info("Fused feature engineering plan Completed")
+        return df_transformed
+
+
+def _fit_block(
+    block: np.ndarray, columns: slice, strategy: NumericFeatureEngineerStrategy
+) -> Dict[str, np.ndarray]:
+    return strategy._fit_array(block)
+
+
+def _transform_block(
+    block: np.ndarray, columns: slice, strategy: NumericFeatureEngineerStrategy
+) -> np.ndarray:
+    # A shallow copy holding only this block's state, so blocks can be
+    # transformed concurrently
+    block_strategy = copy.copy(strategy)
+    block_strategy.state_ = {
+        key: value[columns] for key, value in (strategy.state_ or {}).items()
+    }
+    return block_strategy._transform_array(block)
+
 
 class FeatureEngineer:
-    def __init__(self, strategy: FeatureEngineerStrategy) -> None:
+    def __init__(
+        self,
+        strategy: Union[FeatureEngineerStrategy, List[FeatureEngineerStrategy]],
+        executor: Optional[ColumnParallelExecutor] = None,
+    ) -> None:
+        # An ordered list of strategies runs as one fused plan
+        if isinstance(strategy, list):
+            strategy = CompositeFeatureEngineering(strategy)
         self.strategy = strategy
+        # Numeric strategies are column-wise, with an executor they fit and
+        # transform column blocks of the features in parallel
+        self.executor = executor
 
     def set_strategey(self, strategy: FeatureEngineerStrategy) -> None:
         self.strategy = strategy
 
+    @instrumented
+    def fit(
+        self, data: Union[pd.DataFrame, Iterable[pd.DataFrame]]
+    ) -> "FeatureEngineer":
+        if not isinstance(data, pd.DataFrame):
+            self.strategy.fit_chunks(data)
+        elif self._parallel():
+            self._fit_parallel(self._values(data))
+        else:
+            self.strategy.fit(data)
+        return self
+
+    @instrumented
+    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        if self._parallel():
+            return self._transform_parallel(df, self._values(df))
+        return self.strategy.transform(df)
+
+    @instrumented
     def apply_feature_engineering(self, df: pd.DataFrame) -> pd.DataFrame:
+        if self._parallel():
+            values = self._values(df)
+            if self.strategy.requires_fit:
+                self._fit_parallel(values)
+            return self._transform_parallel(df, values)
         return self.strategy.apply_transformation(df)
+
+    def apply_feature_engineering_chunks(
+        self, chunks: Iterable[pd.DataFrame]
+    ) -> Iterator[pd.DataFrame]:
+        # Every chunk is transformed with the same fitted state, fit over the
+        # stream first (see fit), an unfitted strategy raises
+        for chunk in chunks:
+            yield self.strategy.transform(chunk)
+
+    def save(self, path: str) -> None:
+        self.strategy.save(path)
+
+    @classmethod
+    def load(cls, path: str) -> "FeatureEngineer":
+        return cls(FeatureEngineerStrategy.load(path))
+
+    def _parallel(self) -> bool:
+        return self.executor is not None and isinstance(
+            self.strategy, NumericFeatureEngineerStrategy
+        )
+
+    def _values(self, df: pd.DataFrame) -> np.ndarray:
+        # The one copy of the features, column-major so every block is a
+        # contiguous view that is transformed in place
+        return np.asfortranarray(
+            df[self.strategy.features].to_numpy(dtype=np.float64, copy=True)
+        )
+
+    def _fit_parallel(self, values: np.ndarray) -> None:
+        logging.info(
+            f"Fitting {type(self.strategy).__name__} on features "
+            f"{self.strategy.features} in parallel"
+        )
+        states = self.executor.map_blocks(_fit_block, values, self.strategy)
+        self.strategy.state_ = {
+            key: np.concatenate([state[key] for state in states]) for key in states[0]
+        }
+
+    def _transform_parallel(self, df: pd.DataFrame, values: np.ndarray) -> pd.DataFrame:
+        self.strategy._check_is_fitted()
+        logging.info(
+            f"Applying {type(self.strategy).__name__} to features "
+            f"{self.strategy.features} in parallel"
+        )
+        self.executor.apply_blocks(_transform_block, values, self.strategy)
+        # The transformed features are taken as columns of values, only the
+        # other columns are copied
+        positions = {feature: i for i, feature in enumerate(self.strategy.features)}
+        return pd.DataFrame(
+            {
+                column: (
+                    values[:, positions[column]]
+                    if column in positions
+                    else df[column].copy()
+                )
+                for column in df.columns
+            },
+            index=df.index,
+            copy=False,
+        )
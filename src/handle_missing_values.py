@@ -1,8 +1,24 @@
+import json
 import logging
 from abc import ABC, abstractmethod
-from typing import Literal, Union
+from typing import Iterable, Iterator, Literal, Optional, Union
 
+import joblib
+import numpy as np
 import pandas as pd
+from joblib import Parallel, delayed
+from scipy.spatial import cKDTree
+from sklearn.experimental import enable_iterative_imputer  # noqa: F401
+from sklearn.impute import IterativeImputer
+
+from src.instrumentation import instrumented
+from src.parallel import ColumnParallelExecutor
+from src.streaming_stats import (
+    HeavyHitters,
+    KLLSketch,
+    RunningMoments,
+    reservoir_sample,
+)
 
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
@@ -10,10 +26,22 @@ logging.basicConfig(
 
 
 class MissingValuesHandlingStrategy(ABC):
+    # Strategies whose handle treats every column on its own can run over
+    # column blocks in parallel
+    columnwise = False
+
+    def fit(
+        self, data: Union[pd.DataFrame, Iterable[pd.DataFrame]]
+    ) -> "MissingValuesHandlingStrategy":
+        return self
+
     @abstractmethod
     def handle(self, df: pd.DataFrame) -> pd.DataFrame:
         pass
 
+    def _check_is_fitted(self) -> None:
+        pass
+
 
 class DropMissingValuesStrategy(MissingValuesHandlingStrategy):
     def __init__(self, axis: Literal[0, 1] = 0, thresh: Union[int, None] = None):
@@ -35,12 +63,18 @@ class DropMissingValuesStrategy(MissingValuesHandlingStrategy):
             f"\nDropping Missing values with axis={self.axis} and thres={self.thresh}"
         )
 
-        df_cleaned = df.dropna(axis=self.axis, thresh=self.thresh)  # type: ignore
+        # pandas 2 treats an explicit thresh=None as a threshold every row fails
+        if self.thresh is None:
+            df_cleaned = df.dropna(axis=self.axis)  # type: ignore
+        else:
+            df_cleaned = df.dropna(axis=self.axis, thresh=self.thresh)  # type: ignore
         logging.info("Missing Values Dropped")
         return df_cleaned
 
 
 class FillMissingValuesStrategy(MissingValuesHandlingStrategy):
+    columnwise = True
+
     def __init__(self, method="mean", fill_value=None):
         self.method = method
         self.fill_value = fill_value
@@ -60,9 +94,13 @@ class FillMissingValuesStrategy(MissingValuesHandlingStrategy):
             )
         elif self.method == "mode":
             numeric_columns = df_cleaned.select_dtypes(include=["number"]).columns
-            df_cleaned[numeric_columns] = df_cleaned[numeric_columns].fillna(
-                df_cleaned[numeric_columns].mode()
-            )
+            # Without rows or numeric values there is no mode, and a column
+            # that is entirely NaN has a NaN mode, those are left as they are
+            modes = df_cleaned[numeric_columns].mode()
+            if len(modes):
+                df_cleaned[numeric_columns] = df_cleaned[numeric_columns].fillna(
+                    modes.iloc[0]
+                )
         elif self.method == "constant":
             numeric_columns = df_cleaned.select_dtypes(include=["number"]).columns
             df_cleaned[numeric_columns] = df_cleaned[numeric_columns].fillna(
@@ -74,13 +112,405 @@ class FillMissingValuesStrategy(MissingValuesHandlingStrategy):
         return df_cleaned
 
 
+class StreamingImputer(MissingValuesHandlingStrategy):
+    # Fill values are fitted in one pass over a frame or any number of chunks
+    # (exact means, KLL medians, Misra-Gries modes) and partial fits from
+    # parallel workers combine with merge. Numeric columns use method,
+    # categorical columns use their mode. Once fitted, every batch is filled
+    # with a single fillna, an unfitted imputer fits on the frame it is asked
+    # to fill. Chunked input must be fitted over the stream first. Fill values
+    # are per column, a fitted imputer fills any subset of its columns.
+    columnwise = True
+
+    def __init__(
+        self,
+        method: str = "mean",
+        fill_value=None,
+        fill_categorical: bool = True,
+        sketch_size: int = 400,
+        max_categories: int = 1000,
+    ) -> None:
+        if method not in ("mean", "median", "mode", "constant"):
+            raise ValueError(f"Unsupported imputation method {method}")
+        self.method = method
+        self.fill_value = fill_value
+        self.fill_categorical = fill_categorical
+        self.sketch_size = sketch_size
+        self.max_categories = max_categories
+        self.numeric_columns_: Optional[list] = None
+        self.categorical_columns_: list = []
+        self._fill_values: Optional[dict] = None
+
+    def partial_fit(self, df: pd.DataFrame) -> "StreamingImputer":
+        if self.numeric_columns_ is None:
+            numeric = df.select_dtypes(include=["number"]).columns
+            self._init_stats(
+                numeric.tolist(),
+                (
+                    df.columns.difference(numeric, sort=False).tolist()
+                    if self.fill_categorical
+                    else []
+                ),
+            )
+        values = df[self.numeric_columns_].to_numpy(dtype=np.float64)
+        if self.method == "mean":
+            self.moments_.update(values)
+        elif self.method == "median":
+            for sketch, column in zip(self.sketches_, values.T):
+                sketch.update(column)
+        for column, heavy_hitters in self.heavy_hitters_.items():
+            heavy_hitters.update(df[column])
+        self._fill_values = None
+        return self
+
+    def fit(
+        self, data: Union[pd.DataFrame, Iterable[pd.DataFrame]]
+    ) -> "StreamingImputer":
+        logging.info(f"Fitting {self.method} imputation values")
+        self.numeric_columns_ = None
+        chunks = [data] if isinstance(data, pd.DataFrame) else data
+        for chunk in chunks:
+            self.partial_fit(chunk)
+        return self
+
+    def merge(self, other: "StreamingImputer") -> "StreamingImputer":
+        if other.numeric_columns_ is None:
+            return self
+        if self.numeric_columns_ is None:
+            self._init_stats(other.numeric_columns_, other.categorical_columns_)
+        if (
+            other.numeric_columns_ != self.numeric_columns_
+            or other.categorical_columns_ != self.categorical_columns_
+        ):
+            raise ValueError("Cannot merge imputers fitted on different columns")
+        self.moments_.merge(other.moments_)
+        for sketch, other_sketch in zip(self.sketches_, other.sketches_):
+            sketch.merge(other_sketch)
+        for column, heavy_hitters in self.heavy_hitters_.items():
+            heavy_hitters.merge(other.heavy_hitters_[column])
+        self._fill_values = None
+        return self
+
+    @property
+    def fill_values_(self) -> dict:
+        if self._fill_values is None:
+            self._check_is_fitted()
+            if self.method == "mean":
+                values = self.moments_.mean
+                values = np.where(self.moments_.count > 0, values, np.nan)
+            elif self.method == "median":
+                values = [sketch.quantile([0.5])[0] for sketch in self.sketches_]
+            elif self.method == "constant":
+                values = [self.fill_value] * len(self.numeric_columns_)
+            else:
+                values = [
+                    self.heavy_hitters_[column].most_common()
+                    for column in self.numeric_columns_
+                ]
+            fill_values = {
+                column: value.item() if isinstance(value, np.generic) else value
+                for column, value in zip(self.numeric_columns_, values)
+            }
+            for column in self.categorical_columns_:
+                fill_values[column] = self.heavy_hitters_[column].most_common()
+            # Columns without a single observed value are left as they are
+            self._fill_values = {
+                column: value
+                for column, value in fill_values.items()
+                if value is not None and value == value
+            }
+        return self._fill_values
+
+    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        fill_values = {
+            column: value
+            for column, value in self.fill_values_.items()
+            if column in df.columns
+        }
+        return df.fillna(fill_values)
+
+    def handle(self, df: pd.DataFrame) -> pd.DataFrame:
+        if not self._is_fitted():
+            self.fit(df)
+        logging.info(f"\nFilling missing values with fitted {self.method} values")
+        df_cleaned = self.transform(df)
+        logging.info("Missing Values filled")
+        return df_cleaned
+
+    def save(self, path: str) -> None:
+        state = {
+            "params": {
+                "method": self.method,
+                "fill_value": self.fill_value,
+                "fill_categorical": self.fill_categorical,
+                "sketch_size": self.sketch_size,
+                "max_categories": self.max_categories,
+            },
+            "fill_values": self.fill_values_,
+        }
+        with open(path, "w") as f:
+            json.dump(state, f)
+
+    @classmethod
+    def load(cls, path: str) -> "StreamingImputer":
+        # Only the fill values are restored, enough to transform but not to
+        # continue fitting
+        with open(path) as f:
+            state = json.load(f)
+        imputer = cls(**state["params"])
+        imputer._fill_values = state["fill_values"]
+        return imputer
+
+    def _init_stats(self, numeric_columns: list, categorical_columns: list) -> None:
+        self.numeric_columns_ = list(numeric_columns)
+        self.categorical_columns_ = list(categorical_columns)
+        self.moments_ = RunningMoments(len(self.numeric_columns_))
+        self.sketches_ = (
+            [
+                KLLSketch(self.sketch_size, seed=i)
+                for i in range(len(self.numeric_columns_))
+            ]
+            if self.method == "median"
+            else []
+        )
+        mode_columns = self.categorical_columns_ + (
+            self.numeric_columns_ if self.method == "mode" else []
+        )
+        self.heavy_hitters_ = {
+            column: HeavyHitters(self.max_categories) for column in mode_columns
+        }
+
+    def _is_fitted(self) -> bool:
+        # Loaded imputers only carry their fill values
+        return self.numeric_columns_ is not None or self._fill_values is not None
+
+    def _check_is_fitted(self) -> None:
+        if not self._is_fitted():
+            raise ValueError(
+                "StreamingImputer is not fitted, call fit or partial_fit first"
+            )
+
+
+class ModelBasedImputationStrategy(MissingValuesHandlingStrategy):
+    # Imputes numeric columns from the other numeric columns of the same row.
+    # Fitted on a uniform sample of at most sample_size rows, only rows with a
+    # missing value are imputed, in blocks of block_size across n_jobs threads
+    def __init__(
+        self,
+        sample_size: Optional[int] = 100_000,
+        block_size: int = 10_000,
+        n_jobs: int = -1,
+        random_state: int = 42,
+    ) -> None:
+        if block_size <= 0:
+            raise ValueError(f"Invalid block_size {block_size}. Must be positive.")
+        self.sample_size = sample_size
+        self.block_size = block_size
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+        self.columns_: Optional[list] = None
+
+    def fit(
+        self, data: Union[pd.DataFrame, Iterable[pd.DataFrame]]
+    ) -> "ModelBasedImputationStrategy":
+        chunks = [data] if isinstance(data, pd.DataFrame) else data
+        sample = reservoir_sample(
+            (self._fit_rows(chunk) for chunk in chunks),
+            self.sample_size,
+            self.random_state,
+        )
+        logging.info(f"Fitting {type(self).__name__} on {len(sample)} sampled rows")
+        self.columns_ = sample.select_dtypes(include=["number"]).columns.tolist()
+        self._fit_sample(sample[self.columns_].to_numpy(dtype=np.float64))
+        return self
+
+    def handle(self, df: pd.DataFrame) -> pd.DataFrame:
+        if self.columns_ is None:
+            self.fit(df)
+        logging.info(f"\nImputing missing values using {type(self).__name__}")
+        values = df[self.columns_].to_numpy(dtype=np.float64)
+        missing = np.isnan(values)
+        rows = np.flatnonzero(missing.any(axis=1))
+        df_cleaned = df.copy()
+        if len(rows):
+            blocks = Parallel(n_jobs=self.n_jobs, prefer="threads")(
+                delayed(self._impute_block)(
+                    values[rows[start : start + self.block_size]]
+                )
+                for start in range(0, len(rows), self.block_size)
+            )
+            values[rows] = np.concatenate(blocks)
+            # Complete columns keep their dtype
+            imputed = missing.any(axis=0)
+            columns = [c for c, flag in zip(self.columns_, imputed) if flag]
+            df_cleaned[columns] = values[:, imputed]
+        logging.info("Missing Values imputed")
+        return df_cleaned
+
+    def save(self, path: str) -> None:
+        if self.columns_ is None:
+            raise ValueError(f"{type(self).__name__} is not fitted, call fit first")
+        joblib.dump(self, path)
+
+    @staticmethod
+    def load(path: str) -> "ModelBasedImputationStrategy":
+        return joblib.load(path)
+
+    def _check_is_fitted(self) -> None:
+        if self.columns_ is None:
+            raise ValueError(f"{type(self).__name__} is not fitted, call fit first")
+
+    def _fit_rows(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        return chunk
+
+    @abstractmethod
+    def _fit_sample(self, values: np.ndarray) -> None:
+        pass
+
+    @abstractmethod
+    def _impute_block(self, block: np.ndarray) -> np.ndarray:
+        pass
+
+
+class KNNImputationStrategy(ModelBasedImputationStrategy):
+    # Donors are sampled complete rows. Rows of a block are grouped by their
+    # missingness pattern and each pattern queries a KD-tree over the donors'
+    # observed (standardized) columns, so memory is O(block_size * n_neighbors)
+    # and no pairwise distance matrix is built. Trees are cached per pattern.
+    def __init__(
+        self,
+        n_neighbors: int = 5,
+        max_donors: Optional[int] = 100_000,
+        block_size: int = 10_000,
+        n_jobs: int = -1,
+        random_state: int = 42,
+    ) -> None:
+        super().__init__(max_donors, block_size, n_jobs, random_state)
+        self.n_neighbors = n_neighbors
+
+    def _fit_rows(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        return chunk.dropna(subset=chunk.select_dtypes(include=["number"]).columns)
+
+    def _fit_sample(self, values: np.ndarray) -> None:
+        if not len(values):
+            raise ValueError("KNN imputation needs at least one complete row")
+        self.donors_ = values
+        self.mean_ = values.mean(axis=0)
+        scale = values.std(axis=0)
+        self.scale_ = np.where(scale > 0, scale, 1.0)
+        self._trees = {}
+
+    def _impute_block(self, block: np.ndarray) -> np.ndarray:
+        block = block.copy()
+        missing = np.isnan(block)
+        scaled = (block - self.mean_) / self.scale_
+        k = min(self.n_neighbors, len(self.donors_))
+        patterns, inverse = np.unique(missing, axis=0, return_inverse=True)
+        for pattern_index, pattern in enumerate(patterns):
+            members = np.flatnonzero(inverse.ravel() == pattern_index)
+            observed = ~pattern
+            if not observed.any():
+                block[np.ix_(members, pattern)] = self.mean_
+                continue
+            _, neighbors = self._tree(observed).query(
+                scaled[np.ix_(members, observed)], k=k
+            )
+            neighbors = neighbors.reshape(len(members), k)
+            block[np.ix_(members, pattern)] = self.donors_[:, pattern][neighbors].mean(
+                axis=1
+            )
+        return block
+
+    def _tree(self, observed: np.ndarray) -> cKDTree:
+        key = observed.tobytes()
+        tree = self._trees.get(key)
+        if tree is None:
+            donors = (self.donors_[:, observed] - self.mean_[observed]) / self.scale_[
+                observed
+            ]
+            tree = self._trees[key] = cKDTree(donors)
+        return tree
+
+
+class IterativeImputationStrategy(ModelBasedImputationStrategy):
+    # Round-robin regression of each column on the others (IterativeImputer),
+    # fitted on the sample and applied block by block
+    def __init__(
+        self,
+        max_iter: int = 10,
+        sample_size: Optional[int] = 100_000,
+        block_size: int = 100_000,
+        n_jobs: int = -1,
+        random_state: int = 42,
+    ) -> None:
+        super().__init__(sample_size, block_size, n_jobs, random_state)
+        self.max_iter = max_iter
+
+    def _fit_sample(self, values: np.ndarray) -> None:
+        self.imputer_ = IterativeImputer(
+            max_iter=self.max_iter,
+            random_state=self.random_state,
+            keep_empty_features=True,
+        ).fit(values)
+
+    def _impute_block(self, block: np.ndarray) -> np.ndarray:
+        return self.imputer_.transform(block)
+
+
 class MissingValuesHandler:
-    def __init__(self, strategy: MissingValuesHandlingStrategy):
+    def __init__(
+        self,
+        strategy: MissingValuesHandlingStrategy,
+        executor: Optional[ColumnParallelExecutor] = None,
+    ):
         self._strategy = strategy
+        self.executor = executor
 
     def set_strategy(self, strategy: MissingValuesHandlingStrategy):
         self._strategy = strategy
 
+    @instrumented
+    def fit(
+        self, data: Union[pd.DataFrame, Iterable[pd.DataFrame]]
+    ) -> "MissingValuesHandler":
+        self._strategy.fit(data)
+        return self
+
+    def save(self, path: str) -> None:
+        if not isinstance(
+            self._strategy, (StreamingImputer, ModelBasedImputationStrategy)
+        ):
+            raise ValueError(
+                f"{type(self._strategy).__name__} has no fitted state to save"
+            )
+        self._strategy.save(path)
+
+    @classmethod
+    def load(cls, path: str) -> "MissingValuesHandler":
+        # Streaming imputers are saved as JSON, model based ones with joblib
+        if path.endswith(".json"):
+            return cls(StreamingImputer.load(path))
+        return cls(ModelBasedImputationStrategy.load(path))
+
+    @instrumented
     def handle_missing_values(self, df: pd.DataFrame) -> pd.DataFrame:
         logging.info("Executing Handling Missing Values Strategy")
+        if self.executor is not None and self._strategy.columnwise:
+            # An imputer fitting itself would fit on every block on its own,
+            # fit it on the whole frame before it is shared between the blocks
+            try:
+                self._strategy._check_is_fitted()
+            except ValueError:
+                self._strategy.fit(df)
+            return self.executor.map_frame(self._strategy.handle, df)
         return self._strategy.handle(df)
+
+    def handle_missing_values_chunks(
+        self, chunks: Iterable[pd.DataFrame]
+    ) -> Iterator[pd.DataFrame]:
+        # Fill strategies compute statistics per chunk. Fitted strategies fill
+        # every chunk with the same values and must be fitted over the stream
+        # beforehand (see fit), fitting on the first chunk would not
+        logging.info("Executing Handling Missing Values Strategy on chunked input")
+        self._strategy._check_is_fitted()
+        return (self._strategy.handle(chunk) for chunk in chunks)
@@ -1,8 +1,20 @@
+import hashlib
+import logging
 import os
 import zipfile
 from abc import ABC, abstractmethod
+from typing import Dict, Iterator, List, Optional, Sequence
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from src.artifact_cache import DEFAULT_CACHE_DIR, ArtifactCache, hash_path
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
 
 
 class DataIngestor(ABC):
@@ -10,6 +22,13 @@ class DataIngestor(ABC):
     def ingest(self, file_path: str) -> pd.DataFrame:
         pass
 
+    def ingest_chunks(
+        self, file_path: str, chunk_size: int = 100_000
+    ) -> Iterator[pd.DataFrame]:
+        df = self.ingest(file_path)
+        for start in range(0, len(df), chunk_size):
+            yield df.iloc[start : start + chunk_size]
+
 
 class ZipDataIngestor(DataIngestor):
     def ingest(self, file_path: str) -> pd.DataFrame:
@@ -17,25 +36,206 @@ class ZipDataIngestor(DataIngestor):
             raise ValueError(
                 f"{file_path.split('.')[0]} is not a supported extension for zip ingestor"
             )
-        # TODO IMPLEMENT THIS. should support a single csv from extracted zip
-        output_dir = "extracted_data"
+        # Read the csv member in place, extracting into a shared directory races
+        # with concurrent pipelines on the same host
+        with zipfile.ZipFile(file_path, "r") as zip_ref:
+            csv_member = self._find_csv_member(zip_ref)
+            with zip_ref.open(csv_member) as csv_file:
+                return pd.read_csv(csv_file)
+
+    def ingest_chunks(
+        self, file_path: str, chunk_size: int = 100_000
+    ) -> Iterator[pd.DataFrame]:
+        if not file_path.endswith(".zip"):
+            raise ValueError(
+                f"{file_path.split('.')[0]} is not a supported extension for zip ingestor"
+            )
+        if chunk_size <= 0:
+            raise ValueError(f"Invalid chunk_size {chunk_size}. Must be positive.")
+        # Stream the csv member straight out of the archive, nothing is extracted
         with zipfile.ZipFile(file_path, "r") as zip_ref:
-            zip_ref.extractall(output_dir)
-        extracted_files = os.listdir(output_dir)
-        csv_files = [f for f in extracted_files if f.endswith(".csv")]
-        if len(csv_files) == 0:
-            raise ValueError("NO CSV FOUND in extracted data")
-        if len(csv_files) > 1:
-            raise ValueError("more than 1 csv file found in the extracted data")
-        return pd.read_csv(csv_files[0])
+            csv_member = self._find_csv_member(zip_ref)
+            with zip_ref.open(csv_member) as csv_file:
+                for chunk in pd.read_csv(csv_file, chunksize=chunk_size):
+                    yield chunk
+
+    @staticmethod
+    def _find_csv_member(zip_ref: zipfile.ZipFile) -> str:
+        csv_members = [
+            name
+            for name in zip_ref.namelist()
+            if name.endswith(".csv") and not name.startswith("__MACOSX/")
+        ]
+        if len(csv_members) == 0:
+            raise ValueError("NO CSV FOUND in zip archive")
+        if len(csv_members) > 1:
+            raise ValueError("more than 1 csv file found in the zip archive")
+        return csv_members[0]
+
+
+class CachedDataIngestor(DataIngestor):
+    def __init__(
+        self,
+        ingestor: DataIngestor,
+        cache_dir: str = os.path.join(DEFAULT_CACHE_DIR, "ingestion"),
+        max_bytes: int = 2 << 30,
+    ) -> None:
+        self.ingestor = ingestor
+        self.cache = ArtifactCache(cache_dir, max_bytes)
+
+    def ingest(self, file_path: str) -> pd.DataFrame:
+        key = self.cache_key(file_path)
+        df = self.cache.get(key)
+        if df is not None:
+            return df
+        logging.info(f"Ingestion cache miss for {file_path}")
+        df = self.ingestor.ingest(file_path)
+        self.cache.put(key, df)
+        return df
+
+    def cache_key(self, file_path: str) -> str:
+        # Same archive read with a different projection/filter is a different entry
+        params = repr(sorted(vars(self.ingestor).items()))
+        return hashlib.blake2b(
+            f"{type(self.ingestor).__name__}:{params}:{hash_path(file_path)}".encode(),
+            digest_size=20,
+        ).hexdigest()
+
+
+class ArrowDatasetIngestor(DataIngestor):
+    file_format: str = ""
+    extensions: tuple = ()
+
+    def __init__(
+        self,
+        columns: Optional[List[str]] = None,
+        filters: Optional[Sequence] = None,
+    ) -> None:
+        self.columns = columns
+        self.filters = filters
+
+    def ingest(self, file_path: str) -> pd.DataFrame:
+        table = self._dataset(file_path).to_table(
+            columns=self.columns, filter=self._filter_expression()
+        )
+        return table.to_pandas()
+
+    def ingest_chunks(
+        self, file_path: str, chunk_size: int = 100_000
+    ) -> Iterator[pd.DataFrame]:
+        if chunk_size <= 0:
+            raise ValueError(f"Invalid chunk_size {chunk_size}. Must be positive.")
+        batches = self._dataset(file_path).to_batches(
+            columns=self.columns,
+            filter=self._filter_expression(),
+            batch_size=chunk_size,
+        )
+        for batch in batches:
+            yield batch.to_pandas()
+
+    def _dataset(self, file_path: str) -> ds.Dataset:
+        # A directory is a (possibly hive partitioned) dataset written by
+        # convert_zip_to_parquet, anything else must carry a known extension
+        if not os.path.isdir(file_path) and not file_path.endswith(self.extensions):
+            raise ValueError(
+                f"{file_path} is not a supported extension for {self.file_format} ingestor"
+            )
+        return ds.dataset(file_path, format=self.file_format, partitioning="hive")
+
+    def _filter_expression(self) -> Optional[ds.Expression]:
+        if not self.filters:
+            return None
+        # Step parameters arrive as JSON, which turns ("col", "op", value) into lists
+        filters = [
+            tuple(f) if isinstance(f, list) and isinstance(f[0], str) else f
+            for f in self.filters
+        ]
+        return pq.filters_to_expression(filters)
+
+
+class ParquetDataIngestor(ArrowDatasetIngestor):
+    file_format = "parquet"
+    extensions = (".parquet", ".pq")
+
+
+class FeatherDataIngestor(ArrowDatasetIngestor):
+    file_format = "feather"
+    extensions = (".feather", ".arrow", ".ipc")
+
+
+def convert_zip_to_parquet(
+    file_path: str,
+    output_dir: str,
+    partition_cols: Optional[List[str]] = None,
+    chunk_size: int = 100_000,
+) -> str:
+    ingestor = ZipDataIngestor()
+    # First pass settles one dtype per column, csv chunks infer them independently
+    # (an int column turns float in a chunk with missing values)
+    dtypes: Dict[str, str] = {}
+    for chunk in ingestor.ingest_chunks(file_path, chunk_size):
+        for column, dtype in chunk.dtypes.items():
+            dtypes[column] = _promote_dtype(dtypes.get(column), chunk[column], dtype)
+    schema = pa.schema(
+        [(column, _ARROW_TYPES[dtype]) for column, dtype in dtypes.items()]
+    )
+
+    for i, chunk in enumerate(ingestor.ingest_chunks(file_path, chunk_size)):
+        table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+        pq.write_to_dataset(
+            table,
+            output_dir,
+            partition_cols=partition_cols,
+            basename_template=f"part-{i:06d}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+        )
+    return output_dir
+
+
+_ARROW_TYPES = {
+    "int64": pa.int64(),
+    "float64": pa.float64(),
+    "bool": pa.bool_(),
+    "string": pa.string(),
+}
+
+
+def _promote_dtype(current: Optional[str], values: pd.Series, dtype) -> str:
+    if pd.api.types.is_bool_dtype(dtype):
+        kind = "bool"
+    elif pd.api.types.is_integer_dtype(dtype):
+        kind = "int64"
+    elif pd.api.types.is_float_dtype(dtype):
+        # An all missing chunk parses as float whatever the real type is
+        kind = None if values.isna().all() else "float64"
+    else:
+        kind = "string"
+
+    if current is None or kind is None or current == kind:
+        return current or kind or "float64"
+    if {current, kind} <= {"int64", "float64"}:
+        return "float64"
+    return "string"
 
 
 class DataIngestorFactory:
     @staticmethod
-    def get_data_ingestor(file_extension: str) -> DataIngestor:
+    def get_data_ingestor(
+        file_extension: str,
+        columns: Optional[List[str]] = None,
+        filters: Optional[Sequence] = None,
+    ) -> DataIngestor:
         match file_extension:
             case ".zip":
+                if columns or filters:
+                    raise ValueError(
+                        "column projection and filters are only supported by columnar ingestors"
+                    )
                 return ZipDataIngestor()
+            case ".parquet" | ".pq":
+                return ParquetDataIngestor(columns=columns, filters=filters)
+            case ".feather" | ".arrow" | ".ipc":
+                return FeatherDataIngestor(columns=columns, filters=filters)
             case _:
                 raise ValueError(
                     f"{file_extension} is not a supported extension for data ingestion"
@@ -0,0 +1,216 @@
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Callable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+# JSONL file that events are appended to when set, so pipeline runs can be
+# instrumented without code changes
+ENV_VAR = "PRICES_PREDICTOR_INSTRUMENTATION"
+
+
+class InstrumentationSink(ABC):
+    @abstractmethod
+    def emit(self, event: dict) -> None:
+        pass
+
+
+class InMemorySink(InstrumentationSink):
+    def __init__(self) -> None:
+        self.events: List[dict] = []
+        self._lock = threading.Lock()
+
+    def emit(self, event: dict) -> None:
+        with self._lock:
+            self.events.append(event)
+
+    def to_frame(self) -> pd.DataFrame:
+        with self._lock:
+            return pd.DataFrame(self.events)
+
+
+class JSONLSink(InstrumentationSink):
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+
+    def emit(self, event: dict) -> None:
+        line = json.dumps(event, default=str)
+        with self._lock, open(self.path, "a") as f:
+            f.write(line + "\n")
+
+
+class MLflowSink(InstrumentationSink):
+    # Numeric fields become metrics "<prefix><stage>.<field>" on the active run,
+    # events outside a run are dropped
+    def __init__(self, prefix: str = "") -> None:
+        self.prefix = prefix
+        self._steps = {}
+        self._lock = threading.Lock()
+
+    def emit(self, event: dict) -> None:
+        import mlflow
+
+        if mlflow.active_run() is None:
+            return
+        stage = f"{self.prefix}{event['stage']}"
+        with self._lock:
+            step = self._steps.get(stage, 0)
+            self._steps[stage] = step + 1
+        mlflow.log_metrics(
+            {
+                f"{stage}.{name}": float(value)
+                for name, value in event.items()
+                if isinstance(value, (int, float)) and not isinstance(value, bool)
+            },
+            step=step,
+        )
+
+
+_config = {"sink": None, "trace_memory": False}
+# Instrumented calls currently running in this context
+_depth: ContextVar[int] = ContextVar("instrumentation_depth", default=0)
+
+
+def configure(sink: Optional[InstrumentationSink], trace_memory: bool = False) -> None:
+    # sink=None turns instrumentation off. trace_memory adds the tracemalloc
+    # peak of each call, at the cost of slowing allocation heavy code down
+    _config["sink"] = sink
+    _config["trace_memory"] = trace_memory
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+@contextmanager
+def instrumentation(sink: InstrumentationSink, trace_memory: bool = False):
+    previous = dict(_config)
+    configure(sink, trace_memory)
+    try:
+        yield sink
+    finally:
+        if trace_memory and not previous["trace_memory"]:
+            tracemalloc.stop()
+        _config.update(previous)
+
+
+def _peak_rss() -> Optional[int]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def data_stats(data) -> dict:
+    if isinstance(data, pd.DataFrame):
+        return {
+            "rows": len(data),
+            "columns": data.shape[1],
+            "bytes": int(data.memory_usage(index=False).sum()),
+        }
+    if isinstance(data, pd.Series):
+        return {"rows": len(data), "columns": 1, "bytes": int(data.memory_usage())}
+    if isinstance(data, np.ndarray):
+        return {
+            "rows": data.shape[0] if data.ndim else 1,
+            "columns": data.shape[1] if data.ndim > 1 else 1,
+            "bytes": int(data.nbytes),
+        }
+    if isinstance(data, tuple):
+        # e.g. (X_train, X_test, y_train, y_test): rows and bytes add up,
+        # columns are those of the first frame
+        parts = [data_stats(item) for item in data]
+        parts = [part for part in parts if part]
+        if parts:
+            return {
+                "rows": sum(part["rows"] for part in parts),
+                "columns": parts[0]["columns"],
+                "bytes": sum(part["bytes"] for part in parts),
+            }
+    return {}
+
+
+def instrumented(method: Callable) -> Callable:
+    # Wraps a context class method. The strategy name comes from the context's
+    # strategy attribute, the input is the first positional argument. Only the
+    # outermost instrumented call emits an event, calls nested in it (e.g.
+    # handle_outliers calling detect_outliers) are part of its measurements and
+    # must not reset its tracemalloc peak
+    stage = method.__qualname__
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        sink = _config["sink"]
+        if sink is None or _depth.get() > 0:
+            return method(self, *args, **kwargs)
+
+        strategy = getattr(self, "strategy", getattr(self, "_strategy", None))
+        event = {
+            "stage": stage,
+            "strategy": type(strategy).__name__,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+        }
+        if args:
+            event.update({f"input_{k}": v for k, v in data_stats(args[0]).items()})
+        tracing = _config["trace_memory"] and tracemalloc.is_tracing()
+        if tracing:
+            traced_before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        rss_before = _peak_rss()
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        token = _depth.set(1)
+        try:
+            result = method(self, *args, **kwargs)
+        except Exception as e:
+            event["error"] = repr(e)
+            raise
+        else:
+            event.update({f"output_{k}": v for k, v in data_stats(result).items()})
+            return result
+        finally:
+            _depth.reset(token)
+            event["wall_seconds"] = time.perf_counter() - wall_start
+            event["cpu_seconds"] = time.process_time() - cpu_start
+            if rss_before is not None:
+                # Growth of the process high-water mark, 0 when the call stayed
+                # below an earlier peak
+                event["peak_rss_growth_bytes"] = _peak_rss() - rss_before
+            if tracing:
+                event["traced_peak_bytes"] = (
+                    tracemalloc.get_traced_memory()[1] - traced_before
+                )
+            try:
+                sink.emit(event)
+            except Exception as e:
+                logging.warning(f"Instrumentation sink failed: {e}")
+
+    return wrapper
+
+
+def configure_from_env() -> None:
+    path = os.environ.get(ENV_VAR)
+    if path:
+        configure(JSONLSink(path))
+
+
+configure_from_env()
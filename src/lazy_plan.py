@@ -0,0 +1,697 @@
+import logging
+import operator
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Sequence, Set, Union
+
+import pandas as pd
+
+from src.feature_engineering import (
+    CompositeFeatureEngineering,
+    FeatureEngineer,
+    FeatureEngineerStrategy,
+    LogTransformation,
+    MinMaxSclaing,
+    NumericFeatureEngineerStrategy,
+    OneHotEncoding,
+    StandardScaling,
+)
+from src.handle_missing_values import (
+    DropMissingValuesStrategy,
+    FillMissingValuesStrategy,
+    MissingValuesHandler,
+    MissingValuesHandlingStrategy,
+    StreamingImputer,
+)
+from src.outlier_detection import (
+    IQROutlierDetection,
+    OutlierDetectionStrategy,
+    OutlierDetector,
+    ZScoreOutlierDetection,
+)
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+# Column name -> "number", "other" or "encoded". One hot encoded columns are
+# only known once the encoder is fitted, the schema holds one "<feature>_"
+# prefix entry standing for all of them
+Schema = Dict[str, str]
+
+NUMERIC_KINDS = ("number", "encoded")
+
+# Same (column, op, value) operators as the ingestor filters
+PREDICATE_OPS = {
+    "=": operator.eq,
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "in": None,
+    "not in": None,
+}
+
+
+def frame_schema(df: pd.DataFrame) -> Schema:
+    numeric = set(df.select_dtypes(include=["number"]).columns)
+    return {column: "number" if column in numeric else "other" for column in df.columns}
+
+
+def _encoded_key(feature: str) -> str:
+    return f"{feature}_"
+
+
+def _numeric_columns(schema: Schema) -> Set[str]:
+    return {column for column, kind in schema.items() if kind in NUMERIC_KINDS}
+
+
+class PlanNode(ABC):
+    # One recorded operation. The optimizer only looks at the column footprint:
+    # which columns the node reads, which it modifies or creates, and whether a
+    # row's result depends on that row alone (row_local) or on the whole frame
+    is_filter = False
+
+    def row_local(self, schema: Schema) -> bool:
+        return False
+
+    def reads(self, schema: Schema) -> Set[str]:
+        return set(schema)
+
+    def writes(self, schema: Schema) -> Set[str]:
+        return set()
+
+    def output_schema(self, schema: Schema) -> Schema:
+        return dict(schema)
+
+    def requires(self, needed: Set[str], schema: Schema) -> Set[str]:
+        # Input columns needed to produce the needed output columns
+        return needed | self.reads(schema)
+
+    def prune(self, needed: Set[str], schema: Schema) -> Optional["PlanNode"]:
+        # The node restricted to what later nodes need, None when it has no
+        # effect on them
+        return self
+
+    @abstractmethod
+    def run(self, df: pd.DataFrame) -> pd.DataFrame:
+        pass
+
+    @abstractmethod
+    def describe(self) -> str:
+        pass
+
+
+class SelectNode(PlanNode):
+    def __init__(
+        self, columns: Optional[Sequence[str]] = None, numeric: bool = False
+    ) -> None:
+        if columns is None and not numeric:
+            raise ValueError("Select needs columns or numeric=True")
+        self.columns = list(columns) if columns is not None else None
+        self.numeric = numeric
+
+    def row_local(self, schema: Schema) -> bool:
+        return True
+
+    def reads(self, schema: Schema) -> Set[str]:
+        return set()
+
+    def output_schema(self, schema: Schema) -> Schema:
+        if self.columns is None:
+            return {c: k for c, k in schema.items() if k in NUMERIC_KINDS}
+        return {
+            # Names the schema does not know are one hot encoded columns
+            column: schema.get(column, "encoded")
+            for column in self.columns
+        }
+
+    def requires(self, needed: Set[str], schema: Schema) -> Set[str]:
+        return set(needed)
+
+    def run(self, df: pd.DataFrame) -> pd.DataFrame:
+        if self.columns is None:
+            return df.select_dtypes(include=["number"])
+        return df[self.columns]
+
+    def describe(self) -> str:
+        if self.columns is None:
+            return "Select numeric columns"
+        return f"Select {self.columns}"
+
+
+class MissingValuesNode(PlanNode):
+    def __init__(self, strategy: MissingValuesHandlingStrategy) -> None:
+        self.strategy = strategy
+        self.is_filter = isinstance(
+            strategy, DropMissingValuesStrategy
+        ) and strategy.axis in [0, "index"]
+
+    def _columnwise(self) -> bool:
+        # Each column is filled from its own values only
+        return isinstance(self.strategy, (FillMissingValuesStrategy, StreamingImputer))
+
+    def row_local(self, schema: Schema) -> bool:
+        return self.is_filter or (
+            isinstance(self.strategy, FillMissingValuesStrategy)
+            and self.strategy.method == "constant"
+        )
+
+    def reads(self, schema: Schema) -> Set[str]:
+        if isinstance(self.strategy, DropMissingValuesStrategy):
+            return set(schema)
+        return self.writes(schema)
+
+    def writes(self, schema: Schema) -> Set[str]:
+        if self.is_filter:
+            return set()
+        if isinstance(self.strategy, StreamingImputer) and (
+            self.strategy.fill_categorical
+        ):
+            return set(schema)
+        if isinstance(self.strategy, DropMissingValuesStrategy):
+            return set(schema)
+        return _numeric_columns(schema)
+
+    def requires(self, needed: Set[str], schema: Schema) -> Set[str]:
+        if self._columnwise():
+            return set(needed)
+        return needed | self.reads(schema)
+
+    def prune(self, needed: Set[str], schema: Schema) -> Optional[PlanNode]:
+        if self._columnwise() and not needed & self.writes(schema):
+            return None
+        return self
+
+    def run(self, df: pd.DataFrame) -> pd.DataFrame:
+        return MissingValuesHandler(self.strategy).handle_missing_values(df)
+
+    def describe(self) -> str:
+        params = {
+            k: v
+            for k, v in vars(self.strategy).items()
+            if not k.startswith("_") and not k.endswith("_")
+        }
+        return f"MissingValues {type(self.strategy).__name__}({params})"
+
+
+class FeatureEngineeringNode(PlanNode):
+    def __init__(self, strategy: FeatureEngineerStrategy) -> None:
+        self.strategy = strategy
+
+    def _members(self) -> List[FeatureEngineerStrategy]:
+        if isinstance(self.strategy, CompositeFeatureEngineering):
+            return self.strategy.strategies
+        return [self.strategy]
+
+    def _encoders(self) -> List[OneHotEncoding]:
+        return [s for s in self._members() if isinstance(s, OneHotEncoding)]
+
+    def row_local(self, schema: Schema) -> bool:
+        return all(
+            isinstance(s, NumericFeatureEngineerStrategy) and not s.requires_fit
+            for s in self._members()
+        )
+
+    def reads(self, schema: Schema) -> Set[str]:
+        return set(self.strategy.features)
+
+    def writes(self, schema: Schema) -> Set[str]:
+        return set(self.strategy.features) | {
+            _encoded_key(f) for encoder in self._encoders() for f in encoder.features
+        }
+
+    def output_schema(self, schema: Schema) -> Schema:
+        encoded = [f for encoder in self._encoders() for f in encoder.features]
+        output = {c: k for c, k in schema.items() if c not in encoded}
+        for strategy in self._members():
+            if isinstance(strategy, NumericFeatureEngineerStrategy):
+                output.update({f: "number" for f in strategy.features})
+        output.update({_encoded_key(f): "encoded" for f in encoded})
+        return output
+
+    def requires(self, needed: Set[str], schema: Schema) -> Set[str]:
+        if isinstance(self.strategy, NumericFeatureEngineerStrategy):
+            # Column-wise, every feature only depends on itself
+            return set(needed)
+        if isinstance(self.strategy, OneHotEncoding):
+            produced = {
+                name
+                for name in needed
+                for f in self.strategy.features
+                if name.startswith(_encoded_key(f))
+            }
+            return (needed - produced) | set(self.strategy.features)
+        return needed | set(self.strategy.features)
+
+    def prune(self, needed: Set[str], schema: Schema) -> Optional[PlanNode]:
+        strategy = self.strategy
+        if isinstance(strategy, NumericFeatureEngineerStrategy):
+            features = [f for f in strategy.features if f in needed]
+        elif isinstance(strategy, OneHotEncoding):
+            features = [
+                f
+                for f in strategy.features
+                if any(name.startswith(_encoded_key(f)) for name in needed)
+            ]
+        else:
+            return self
+        if not features:
+            return None
+        if features == strategy.features:
+            return self
+        return FeatureEngineeringNode(
+            type(strategy)(**{**strategy.get_params(), "features": features})
+        )
+
+    def run(self, df: pd.DataFrame) -> pd.DataFrame:
+        return FeatureEngineer(self.strategy).apply_feature_engineering(df)
+
+    def describe(self) -> str:
+        if isinstance(self.strategy, CompositeFeatureEngineering):
+            members = ", ".join(
+                f"{type(s).__name__}({s.features})" for s in self.strategy.strategies
+            )
+            return f"FeatureEngineering fused [{members}]"
+        return (
+            f"FeatureEngineering {type(self.strategy).__name__}"
+            f"({self.strategy.features})"
+        )
+
+
+class OutlierFilterNode(PlanNode):
+    # Removes the rows flagged on columns, by default every numeric column the
+    # node sees, as the outlier detection step does
+    is_filter = True
+
+    def __init__(
+        self,
+        strategy: OutlierDetectionStrategy,
+        columns: Optional[Sequence[str]] = None,
+    ) -> None:
+        self.strategy = strategy
+        self.columns = list(columns) if columns is not None else None
+
+    def reads(self, schema: Schema) -> Set[str]:
+        if self.columns is not None:
+            return set(self.columns)
+        return _numeric_columns(schema)
+
+    def resolve(self, schema: Schema) -> "OutlierFilterNode":
+        # Pins the default columns so the node can move across nodes that
+        # change the set of numeric columns. Encoded columns have no names yet
+        if self.columns is not None or "encoded" in schema.values():
+            return self
+        return OutlierFilterNode(
+            self.strategy, [c for c, k in schema.items() if k == "number"]
+        )
+
+    def run(self, df: pd.DataFrame) -> pd.DataFrame:
+        columns = (
+            self.columns
+            if self.columns is not None
+            else df.select_dtypes(include=["number"]).columns
+        )
+        outliers = OutlierDetector(self.strategy).detect_outliers(df[columns])
+        return df[(~outliers).all(axis=1)]
+
+    def describe(self) -> str:
+        columns = "numeric columns" if self.columns is None else self.columns
+        return f"RemoveOutliers {type(self.strategy).__name__} on {columns}"
+
+
+class PredicateFilterNode(PlanNode):
+    is_filter = True
+
+    def __init__(self, column: str, op: str, value) -> None:
+        if op not in PREDICATE_OPS:
+            raise ValueError(
+                f"Unsupported filter operator {op}. Must be one of {list(PREDICATE_OPS)}"
+            )
+        self.column = column
+        self.op = op
+        self.value = value
+
+    def row_local(self, schema: Schema) -> bool:
+        return True
+
+    def reads(self, schema: Schema) -> Set[str]:
+        return {self.column}
+
+    def mask(self, values: pd.Series) -> pd.Series:
+        if self.op == "in":
+            return values.isin(self.value)
+        if self.op == "not in":
+            return ~values.isin(self.value)
+        return PREDICATE_OPS[self.op](values, self.value)
+
+    def run(self, df: pd.DataFrame) -> pd.DataFrame:
+        return df[self.mask(df[self.column]).to_numpy(dtype=bool)]
+
+    def describe(self) -> str:
+        return f"Filter {self.column} {self.op} {self.value!r}"
+
+
+def _schemas(nodes: List[PlanNode], schema: Schema) -> List[Schema]:
+    # Input schema of every node, plus the output schema of the plan
+    schemas = [schema]
+    for node in nodes:
+        schemas.append(node.output_schema(schemas[-1]))
+    return schemas
+
+
+def prune_columns(nodes: List[PlanNode], schema: Schema) -> List[PlanNode]:
+    # Walks back from the plan's output columns, restricting every node to what
+    # later nodes need and dropping the nodes that no longer do anything. Input
+    # columns nobody needs are dropped by a leading projection
+    schemas = _schemas(nodes, schema)
+    needed = set(schemas[-1])
+    pruned = []
+    for node, node_schema in zip(reversed(nodes), reversed(schemas[:-1])):
+        node = node.prune(needed, node_schema)
+        if node is None:
+            continue
+        needed = node.requires(needed, node_schema)
+        pruned.append(node)
+    pruned.reverse()
+    columns = [column for column in schema if column in needed]
+    if len(columns) < len(schema):
+        pruned.insert(0, SelectNode(columns))
+    return pruned
+
+
+def _can_swap(previous: PlanNode, node: PlanNode, schema: Schema) -> bool:
+    # node is a filter, schema the input schema of previous. Moving the filter
+    # ahead is safe when previous treats every row on its own and does not touch
+    # what the filter reads, a frame-dependent filter (outlier statistics) then
+    # still sees the same rows and values. Filters keep their recorded order
+    # among themselves
+    if previous.is_filter or not previous.row_local(schema):
+        return False
+    after = previous.output_schema(schema)
+    reads = node.reads(after)
+    return (
+        reads == node.reads(schema)
+        and reads <= set(schema)
+        and not reads & previous.writes(schema)
+    )
+
+
+def push_down_filters(nodes: List[PlanNode], schema: Schema) -> List[PlanNode]:
+    nodes = list(nodes)
+    schemas = _schemas(nodes, schema)
+    for i in range(len(nodes)):
+        if isinstance(nodes[i], OutlierFilterNode):
+            nodes[i] = nodes[i].resolve(schemas[i])
+    for i in range(1, len(nodes)):
+        if not nodes[i].is_filter:
+            continue
+        j = i
+        while j > 0:
+            schemas = _schemas(nodes, schema)
+            if not _can_swap(nodes[j - 1], nodes[j], schemas[j - 1]):
+                break
+            nodes[j - 1], nodes[j] = nodes[j], nodes[j - 1]
+            j -= 1
+    return nodes
+
+
+def _fusable(node: PlanNode) -> bool:
+    return isinstance(node, FeatureEngineeringNode) and all(
+        isinstance(s, (NumericFeatureEngineerStrategy, OneHotEncoding))
+        for s in node._members()
+    )
+
+
+def fuse_feature_engineering(nodes: List[PlanNode]) -> List[PlanNode]:
+    # Adjacent feature engineering nodes run as one CompositeFeatureEngineering
+    # (one copy of the frame, one float64 block), unless the composite's plan
+    # validation rejects the combination
+    fused: List[PlanNode] = []
+    for node in nodes:
+        if fused and _fusable(fused[-1]) and _fusable(node):
+            try:
+                composite = CompositeFeatureEngineering(
+                    fused[-1]._members() + node._members()
+                )
+            except ValueError:
+                fused.append(node)
+            else:
+                fused[-1] = FeatureEngineeringNode(composite)
+            continue
+        fused.append(node)
+    return fused
+
+
+def optimize(nodes: List[PlanNode], schema: Schema) -> List[PlanNode]:
+    nodes = prune_columns(nodes, schema)
+    nodes = push_down_filters(nodes, schema)
+    return fuse_feature_engineering(nodes)
+
+
+class ExecutionBackend(ABC):
+    @abstractmethod
+    def execute(self, nodes: List[PlanNode], df: pd.DataFrame) -> pd.DataFrame:
+        pass
+
+
+class PandasBackend(ExecutionBackend):
+    # Runs every node through the context classes of its strategy
+    def execute(self, nodes: List[PlanNode], df: pd.DataFrame) -> pd.DataFrame:
+        for node in nodes:
+            df = node.run(df)
+        return df
+
+
+class PolarsBackend(ExecutionBackend):
+    # Translates the plan into one Polars lazy query. Covers the column-wise
+    # fills, drop of missing rows, the log, standard and min max transforms,
+    # dense one hot encoding, z score and IQR outlier removal, predicate
+    # filters and selects. The result has a fresh RangeIndex and strategies
+    # are not left fitted.
+    def __init__(self) -> None:
+        try:
+            import polars
+        except ImportError as e:
+            raise ImportError(
+                "The polars backend needs polars, install it with pip install polars"
+            ) from e
+        self.pl = polars
+
+    def execute(self, nodes: List[PlanNode], df: pd.DataFrame) -> pd.DataFrame:
+        pl = self.pl
+        schema = frame_schema(df)
+        query = pl.from_pandas(df, include_index=False).lazy()
+        for node in nodes:
+            query = self._translate(node, query, schema)
+            schema = node.output_schema(schema)
+        return query.collect().to_pandas()
+
+    def _translate(self, node: PlanNode, query, schema: Schema):
+        if isinstance(node, SelectNode):
+            if node.columns is None:
+                return query.select(self.pl.selectors.numeric())
+            return query.select(node.columns)
+        if isinstance(node, PredicateFilterNode):
+            return query.filter(self._predicate(node))
+        if isinstance(node, MissingValuesNode):
+            return self._missing_values(node.strategy, query, schema)
+        if isinstance(node, FeatureEngineeringNode):
+            for strategy in node._members():
+                query = self._feature_engineering(strategy, query)
+            return query
+        if isinstance(node, OutlierFilterNode):
+            columns = (
+                node.columns
+                if node.columns is not None
+                else query.select(self.pl.selectors.numeric()).collect_schema().names()
+            )
+            return self._remove_outliers(node.strategy, query, columns)
+        raise NotImplementedError(f"The polars backend cannot run {node.describe()}")
+
+    def _predicate(self, node: PredicateFilterNode):
+        column = self.pl.col(node.column)
+        if node.op == "in":
+            return column.is_in(list(node.value)).fill_null(False)
+        if node.op == "not in":
+            return column.is_in(list(node.value)).not_().fill_null(True)
+        # Missing values compare like NaN does in pandas: only != holds
+        return PREDICATE_OPS[node.op](column, node.value).fill_null(node.op == "!=")
+
+    def _missing_values(self, strategy, query, schema: Schema):
+        pl = self.pl
+        if isinstance(strategy, DropMissingValuesStrategy) and strategy.axis in [
+            0,
+            "index",
+        ]:
+            if strategy.thresh is None:
+                return query.drop_nulls()
+            return query.filter(
+                pl.sum_horizontal(pl.all().is_not_null()) >= strategy.thresh
+            )
+        if isinstance(strategy, FillMissingValuesStrategy):
+            columns = query.select(pl.selectors.numeric()).collect_schema().names()
+            fills = {
+                "mean": lambda c: pl.col(c).mean(),
+                "median": lambda c: pl.col(c).median(),
+                "mode": lambda c: pl.col(c).drop_nulls().mode().sort().first(),
+                "constant": lambda c: pl.lit(strategy.fill_value),
+            }
+            if strategy.method not in fills:
+                logging.warning(f"Unknown method {strategy.method}")
+                return query
+            return query.with_columns(
+                [pl.col(c).fill_null(fills[strategy.method](c)) for c in columns]
+            )
+        raise NotImplementedError(
+            f"The polars backend cannot run {type(strategy).__name__}"
+        )
+
+    def _feature_engineering(self, strategy: FeatureEngineerStrategy, query):
+        pl = self.pl
+        columns = [pl.col(f).cast(pl.Float64) for f in strategy.features]
+        if isinstance(strategy, LogTransformation):
+            return query.with_columns([c.log1p() for c in columns])
+        if isinstance(strategy, StandardScaling):
+            return query.with_columns(
+                [
+                    (c - c.mean())
+                    / pl.when(c.std(ddof=0) == 0).then(1.0).otherwise(c.std(ddof=0))
+                    for c in columns
+                ]
+            )
+        if isinstance(strategy, MinMaxSclaing):
+            low, high = strategy.feature_range
+            expressions = []
+            for c in columns:
+                data_range = c.max() - c.min()
+                data_range = pl.when(data_range == 0).then(1.0).otherwise(data_range)
+                scale = (high - low) / data_range
+                expressions.append(c * scale + (low - c.min() * scale))
+            return query.with_columns(expressions)
+        if isinstance(strategy, OneHotEncoding) and not strategy.sparse:
+            # Categories have to be known to name the columns, the query so far
+            # is materialized once to find them
+            frame = query.collect()
+            dummies = []
+            for feature in strategy.features:
+                categories = sorted(frame[feature].drop_nulls().unique().to_list())
+                dummies += [
+                    (pl.col(feature) == category)
+                    .fill_null(False)
+                    .cast(pl.UInt8)
+                    .alias(f"{feature}_{category}")
+                    for category in categories[1:]
+                ]
+            return frame.lazy().with_columns(dummies).drop(strategy.features)
+        raise NotImplementedError(
+            f"The polars backend cannot run {type(strategy).__name__}"
+        )
+
+    def _remove_outliers(self, strategy, query, columns: List[str]):
+        pl = self.pl
+        if isinstance(strategy, ZScoreOutlierDetection):
+            flags = []
+            for column in columns:
+                c = pl.col(column)
+                z_scores = (c - c.mean()).abs() / c.std()
+                flags.append(
+                    ((z_scores > strategy.threshold) & z_scores.is_not_nan()).fill_null(
+                        False
+                    )
+                )
+        elif type(strategy) is IQROutlierDetection:
+            flags = []
+            for column in columns:
+                c = pl.col(column)
+                q1 = c.quantile(0.25, interpolation="linear")
+                q3 = c.quantile(0.75, interpolation="linear")
+                iqr = q3 - q1
+                flags.append(
+                    ((c < q1 - 1.5 * iqr) | (c > q3 + 1.5 * iqr)).fill_null(False)
+                )
+        else:
+            raise NotImplementedError(
+                f"The polars backend cannot run {type(strategy).__name__}"
+            )
+        if not flags:
+            return query
+        return query.filter(~pl.any_horizontal(flags))
+
+
+BACKENDS = {"pandas": PandasBackend, "polars": PolarsBackend}
+
+
+class LazyPlan:
+    # Records preprocessing operations over the src strategies without running
+    # them. collect optimizes the recorded plan against the input's schema
+    # (column pruning, filter push down, fusion of feature engineering) and
+    # runs it on a backend
+    def __init__(self) -> None:
+        self.nodes: List[PlanNode] = []
+
+    def _add(self, node: PlanNode) -> "LazyPlan":
+        self.nodes.append(node)
+        return self
+
+    def handle_missing_values(
+        self, strategy: MissingValuesHandlingStrategy
+    ) -> "LazyPlan":
+        return self._add(MissingValuesNode(strategy))
+
+    def apply_feature_engineering(
+        self,
+        strategy: Union[FeatureEngineerStrategy, List[FeatureEngineerStrategy]],
+    ) -> "LazyPlan":
+        strategies = strategy if isinstance(strategy, list) else [strategy]
+        for item in strategies:
+            self._add(FeatureEngineeringNode(item))
+        return self
+
+    def handle_outliers(
+        self,
+        strategy: OutlierDetectionStrategy,
+        columns: Optional[Sequence[str]] = None,
+    ) -> "LazyPlan":
+        return self._add(OutlierFilterNode(strategy, columns))
+
+    def filter(self, column: str, op: str, value) -> "LazyPlan":
+        return self._add(PredicateFilterNode(column, op, value))
+
+    def select(
+        self, columns: Optional[Sequence[str]] = None, numeric: bool = False
+    ) -> "LazyPlan":
+        return self._add(SelectNode(columns, numeric))
+
+    def optimized(self, df: pd.DataFrame) -> List[PlanNode]:
+        return optimize(self.nodes, frame_schema(df))
+
+    def explain(self, df: Optional[pd.DataFrame] = None) -> str:
+        lines = ["Recorded plan:"]
+        lines += [f"  {i}. {node.describe()}" for i, node in enumerate(self.nodes)]
+        if df is not None:
+            lines.append("Optimized plan:")
+            lines += [
+                f"  {i}. {node.describe()}" for i, node in enumerate(self.optimized(df))
+            ]
+        return "\n".join(lines)
+
+    def collect(
+        self,
+        df: pd.DataFrame,
+        backend: Union[str, ExecutionBackend] = "pandas",
+        optimize_plan: bool = True,
+    ) -> pd.DataFrame:
+        if isinstance(backend, str):
+            if backend not in BACKENDS:
+                raise ValueError(
+                    f"Unknown backend {backend}. Must be one of {list(BACKENDS)}"
+                )
+            backend = BACKENDS[backend]()
+        nodes = self.optimized(df) if optimize_plan else list(self.nodes)
+        logging.info(
+            f"Running a plan of {len(nodes)} operations "
+            f"({len(self.nodes)} recorded) on {type(backend).__name__}"
+        )
+        return backend.execute(nodes, df)
@@ -1,12 +1,18 @@
 import logging
 from abc import ABC, abstractmethod
+from typing import Callable, Iterable, Optional, Tuple, Union
 
 import numpy as np
 import pandas as pd
-from sklearn.base import RegressorMixin
-from sklearn.linear_model import LinearRegression
+import scipy.sparse as sp
+from sklearn.base import BaseEstimator, RegressorMixin
+from sklearn.compose import ColumnTransformer
+from sklearn.linear_model import LinearRegression, SGDRegressor
 from sklearn.pipeline import Pipeline
-from sklearn.preprocessing import StandardScaler
+from sklearn.preprocessing import FunctionTransformer, StandardScaler
+
+from src.feature_engineering import sparse_columns, to_csr
+from src.instrumentation import instrumented
 
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
@@ -30,14 +36,221 @@ class LinearRegressionStrategy(ModelBuildingStrategy):
         if not isinstance(y_train, pd.Series):
             raise TypeError("X_train must be a pd.Series")
         logging.info("Initializing linear regression model ")
-        pipeline = Pipeline(
-            [("scalar", StandardScaler()), ("model", LinearRegression())]
-        )
+        sparse_cols = sparse_columns(X_train)
+        if sparse_cols:
+            # Sparse one hot columns go to the model as CSR. Centering would
+            # densify them, LinearRegression fits the intercept on its own
+            logging.info(f"Keeping {len(sparse_cols)} sparse columns sparse")
+            dense_cols = X_train.columns.difference(sparse_cols, sort=False)
+            to_sparse = ColumnTransformer(
+                [
+                    ("dense", "passthrough", dense_cols),
+                    (
+                        "sparse",
+                        FunctionTransformer(to_csr, accept_sparse=True),
+                        sparse_cols,
+                    ),
+                ],
+                sparse_threshold=1.0,
+            )
+            pipeline = Pipeline(
+                [
+                    ("to_sparse", to_sparse),
+                    ("scalar", StandardScaler(with_mean=False)),
+                    ("model", LinearRegression()),
+                ]
+            )
+        else:
+            pipeline = Pipeline(
+                [("scalar", StandardScaler()), ("model", LinearRegression())]
+            )
         logging.info("Training linear regression model ")
         pipeline.fit(X_train, y_train)
         return pipeline
 
 
+def _split_matrix(X) -> Tuple[np.ndarray, Optional[sp.csr_matrix]]:
+    # The dense columns and the sparse columns (None without any), in the
+    # column order of _as_matrix. One hot blocks are uint8, their products are
+    # taken in float64 or the counts would wrap at 256
+    if sp.issparse(X):
+        return np.empty((X.shape[0], 0)), sp.csr_matrix(X, dtype=np.float64)
+    if not isinstance(X, pd.DataFrame):
+        return np.asarray(X, dtype=np.float64), None
+    sparse_cols = sparse_columns(X)
+    if not sparse_cols:
+        return X.to_numpy(dtype=np.float64), None
+    dense = X.drop(columns=sparse_cols).to_numpy(dtype=np.float64)
+    return dense, to_csr(X[sparse_cols]).astype(np.float64)
+
+
+def _as_matrix(X) -> Union[np.ndarray, sp.csr_matrix]:
+    # Frames with sparse columns become CSR with the dense columns first
+    if not isinstance(X, pd.DataFrame):
+        return X
+    sparse_cols = sparse_columns(X)
+    if not sparse_cols:
+        return X.to_numpy(dtype=np.float64)
+    dense = X.drop(columns=sparse_cols).to_numpy(dtype=np.float64)
+    return sp.hstack(
+        [sp.csr_matrix(dense), to_csr(X[sparse_cols]).astype(np.float64)],
+        format="csr",
+    )
+
+
+class NormalEquationRegressor(RegressorMixin, BaseEstimator):
+    # Exact least squares from sufficient statistics merged batch by batch: the
+    # running mean of [X, y] and its centered co-moment matrix (Chan et al.),
+    # which stays well conditioned where raw XᵀX sums would not. Coefficients
+    # are solved on first use after the last batch
+    def partial_fit(self, X, y) -> "NormalEquationRegressor":
+        dense, sparse = _split_matrix(X)
+        y = np.asarray(y, dtype=np.float64)
+        n_batch = dense.shape[0]
+        if n_batch == 0:
+            return self
+
+        # Dense columns and y are centered on the batch mean before their
+        # products are summed. Sparse (one hot) columns stay uncentered, the
+        # centered dense block sums to zero so their cross products need no
+        # correction and only the bounded sparse block is corrected
+        Z = np.column_stack([dense, y])
+        mean_dense = Z.mean(axis=0)
+        Z -= mean_dense
+        if sparse is None:
+            mean_batch = mean_dense
+            comoment = Z.T @ Z
+        else:
+            mean_sparse = np.asarray(sparse.mean(axis=0), dtype=np.float64).ravel()
+            mean_batch = np.concatenate([mean_dense[:-1], mean_sparse, mean_dense[-1:]])
+            d = dense.shape[1]
+            # Positions in [dense columns, sparse columns, y]
+            dense_y = np.append(np.arange(d), len(mean_batch) - 1)
+            sparse_x = np.arange(d, len(mean_batch) - 1)
+            comoment = np.empty((len(mean_batch), len(mean_batch)))
+            comoment[np.ix_(dense_y, dense_y)] = Z.T @ Z
+            cross = np.asarray((sparse.T @ Z).T)
+            comoment[np.ix_(dense_y, sparse_x)] = cross
+            comoment[np.ix_(sparse_x, dense_y)] = cross.T
+            comoment[np.ix_(sparse_x, sparse_x)] = (
+                sparse.T @ sparse
+            ).toarray() - n_batch * np.outer(mean_sparse, mean_sparse)
+
+        if getattr(self, "n_samples_seen_", 0) == 0:
+            self.n_samples_seen_ = n_batch
+            self.mean_ = mean_batch
+            self.comoment_ = comoment
+        else:
+            n_total = self.n_samples_seen_ + n_batch
+            delta = mean_batch - self.mean_
+            self.mean_ = self.mean_ + delta * n_batch / n_total
+            self.comoment_ = self.comoment_ + comoment
+            self.comoment_ += np.outer(delta, delta) * (
+                self.n_samples_seen_ * n_batch / n_total
+            )
+            self.n_samples_seen_ = n_total
+        self._solution = None
+        return self
+
+    def fit(self, X, y) -> "NormalEquationRegressor":
+        self.n_samples_seen_ = 0
+        return self.partial_fit(X, y)
+
+    @property
+    def coef_(self) -> np.ndarray:
+        return self._solve()[0]
+
+    @property
+    def intercept_(self) -> float:
+        return self._solve()[1]
+
+    def predict(self, X) -> np.ndarray:
+        coef, intercept = self._solve()
+        return np.asarray(_as_matrix(X) @ coef).ravel() + intercept
+
+    def _solve(self) -> Tuple[np.ndarray, float]:
+        if getattr(self, "_solution", None) is not None:
+            return self._solution
+        if getattr(self, "n_samples_seen_", 0) == 0:
+            raise AttributeError("NormalEquationRegressor is not fitted")
+        cov_xx = self.comoment_[:-1, :-1]
+        cov_xy = self.comoment_[:-1, -1]
+        # Solve in standardized coordinates, constant columns get zero weight
+        scale = np.sqrt(np.clip(np.diag(cov_xx), 0, None))
+        scale[scale == 0] = 1.0
+        coef, *_ = np.linalg.lstsq(
+            cov_xx / np.outer(scale, scale), cov_xy / scale, rcond=None
+        )
+        coef = coef / scale
+        self._solution = (coef, self.mean_[-1] - self.mean_[:-1] @ coef)
+        return self._solution
+
+
+class IncrementalLinearRegressionStrategy(ModelBuildingStrategy):
+    def __init__(
+        self, method: str = "normal_equation", batch_size: int = 100_000, n_epochs=5
+    ) -> None:
+        if method not in ["normal_equation", "sgd"]:
+            raise ValueError(
+                f"Invalid method {method}. Must be 'normal_equation' or 'sgd'."
+            )
+        if batch_size <= 0:
+            raise ValueError(f"Invalid batch_size {batch_size}. Must be positive.")
+        self.method = method
+        self.batch_size = batch_size
+        self.n_epochs = n_epochs
+
+    def build_and_train_model(
+        self, X_train: pd.DataFrame, y_train: pd.Series
+    ) -> Pipeline:
+        if not isinstance(X_train, pd.DataFrame):
+            raise TypeError("X_train must be a pd.DataFrame")
+        if not isinstance(y_train, pd.Series):
+            raise TypeError("y_train must be a pd.Series")
+
+        def chunks():
+            for start in range(0, len(X_train), self.batch_size):
+                stop = start + self.batch_size
+                yield X_train.iloc[start:stop], y_train.iloc[start:stop]
+
+        return self.build_and_train_model_from_chunks(chunks)
+
+    def build_and_train_model_from_chunks(
+        self, chunks: Callable[[], Iterable[Tuple[pd.DataFrame, pd.Series]]]
+    ) -> Pipeline:
+        # chunks is called once per pass over the data
+        if self.method == "normal_equation":
+            logging.info("Training linear regression from normal equation statistics")
+            model = NormalEquationRegressor()
+            for X_chunk, y_chunk in chunks():
+                model.partial_fit(X_chunk, y_chunk)
+            logging.info(f"Trained on {model.n_samples_seen_} rows")
+            return Pipeline([("model", model)])
+
+        logging.info("Fitting streaming scaler")
+        scalar = None
+        for X_chunk, _ in chunks():
+            X_chunk = _as_matrix(X_chunk)
+            if scalar is None:
+                scalar = StandardScaler(with_mean=not sp.issparse(X_chunk))
+            scalar.partial_fit(X_chunk)
+        if scalar is None:
+            raise ValueError("No training data in chunks")
+
+        logging.info(f"Training SGD regressor for {self.n_epochs} epochs")
+        model = SGDRegressor(random_state=42)
+        for _ in range(self.n_epochs):
+            for X_chunk, y_chunk in chunks():
+                model.partial_fit(
+                    scalar.transform(_as_matrix(X_chunk)),
+                    np.asarray(y_chunk, dtype=np.float64),
+                )
+        to_matrix = FunctionTransformer(_as_matrix, accept_sparse=True)
+        return Pipeline(
+            [("to_matrix", to_matrix), ("scalar", scalar), ("model", model)]
+        )
+
+
 class ModelBuilder:
     def __init__(self, strategy: ModelBuildingStrategy) -> None:
         self.strategy = strategy
@@ -45,5 +258,17 @@ class ModelBuilder:
     def set_strategy(self, strategy: ModelBuildingStrategy) -> None:
         self.strategy = strategy
 
+    @instrumented
     def build_model(self, X_train: pd.DataFrame, y_train: pd.Series):
         return self.strategy.build_and_train_model(X_train, y_train)
+
+    @instrumented
+    def build_model_from_chunks(
+        self, chunks: Callable[[], Iterable[Tuple[pd.DataFrame, pd.Series]]]
+    ):
+        if not isinstance(self.strategy, IncrementalLinearRegressionStrategy):
+            raise ValueError(
+                f"{type(self.strategy).__name__} does not support training on "
+                "chunked input"
+            )
+        return self.strategy.build_and_train_model_from_chunks(chunks)
@@ -0,0 +1,286 @@
+import logging
+import time
+from abc import ABC, abstractmethod
+
+import numpy as np
+import pandas as pd
+from sklearn.base import RegressorMixin
+
+from src.instrumentation import instrumented
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+METRICS = ["mse", "rmse", "mae", "r2", "mape"]
+
+
+class RegressionMetricsAccumulator:
+    # Streaming sums for MSE/MAE/MAPE plus a Welford/Chan mean and M2 of y_true
+    # for R², batches can arrive in any order and accumulators can be merged
+    def __init__(self) -> None:
+        self.n = 0
+        self.sum_squared_error = 0.0
+        self.sum_absolute_error = 0.0
+        self.sum_absolute_percentage_error = 0.0
+        self.n_nonzero = 0
+        self.mean_true = 0.0
+        self.m2_true = 0.0
+
+    def update(self, y_true: np.ndarray, y_pred: np.ndarray) -> None:
+        y_true = np.asarray(y_true, dtype=np.float64)
+        errors = np.asarray(y_pred, dtype=np.float64) - y_true
+        batch = RegressionMetricsAccumulator()
+        batch.n = len(y_true)
+        if batch.n == 0:
+            return
+        batch.sum_squared_error = float(errors @ errors)
+        batch.sum_absolute_error = float(np.abs(errors).sum())
+        # MAPE is undefined where y_true is 0, those rows are left out
+        nonzero = y_true != 0
+        batch.n_nonzero = int(nonzero.sum())
+        batch.sum_absolute_percentage_error = float(
+            np.abs(errors[nonzero] / y_true[nonzero]).sum()
+        )
+        batch.mean_true = float(y_true.mean())
+        batch.m2_true = float(((y_true - batch.mean_true) ** 2).sum())
+        self.merge(batch)
+
+    def merge(self, other: "RegressionMetricsAccumulator") -> None:
+        n_total = self.n + other.n
+        if n_total == 0:
+            return
+        delta = other.mean_true - self.mean_true
+        self.m2_true += other.m2_true + delta**2 * self.n * other.n / n_total
+        self.mean_true += delta * other.n / n_total
+        self.n = n_total
+        self.sum_squared_error += other.sum_squared_error
+        self.sum_absolute_error += other.sum_absolute_error
+        self.sum_absolute_percentage_error += other.sum_absolute_percentage_error
+        self.n_nonzero += other.n_nonzero
+
+    def result(self) -> dict:
+        if self.n == 0:
+            raise ValueError("No samples to compute metrics on")
+        mse = self.sum_squared_error / self.n
+        return {
+            "mse": mse,
+            "rmse": float(np.sqrt(mse)),
+            "mae": self.sum_absolute_error / self.n,
+            "r2": (
+                1 - self.sum_squared_error / self.m2_true
+                if self.m2_true > 0
+                else float("nan")
+            ),
+            "mape": (
+                self.sum_absolute_percentage_error / self.n_nonzero
+                if self.n_nonzero
+                else float("nan")
+            ),
+            "n_samples": self.n,
+        }
+
+
+class BootstrapMetricsAccumulator:
+    # Poisson bootstrap: every row enters each of the n_bootstrap replicates
+    # with an independent Poisson(1) weight, so replicates are built from
+    # running weighted sums batch by batch and predictions are never kept.
+    # y_true is shifted by the first batch mean before its squares are summed,
+    # which keeps the replicate R² free of cancellation
+    def __init__(
+        self,
+        n_bootstrap: int = 1000,
+        random_state: int = 42,
+        max_elements: int = 5_000_000,
+    ) -> None:
+        if n_bootstrap <= 0:
+            raise ValueError(f"Invalid n_bootstrap {n_bootstrap}. Must be positive.")
+        self.n_bootstrap = n_bootstrap
+        self.max_elements = max_elements
+        self.rng = np.random.default_rng(random_state)
+        self.shift = None
+        self.weight = np.zeros(n_bootstrap)
+        self.weight_nonzero = np.zeros(n_bootstrap)
+        self.sum_squared_error = np.zeros(n_bootstrap)
+        self.sum_absolute_error = np.zeros(n_bootstrap)
+        self.sum_absolute_percentage_error = np.zeros(n_bootstrap)
+        self.sum_true = np.zeros(n_bootstrap)
+        self.sum_squared_true = np.zeros(n_bootstrap)
+
+    def update(self, y_true: np.ndarray, y_pred: np.ndarray) -> None:
+        y_true = np.asarray(y_true, dtype=np.float64)
+        errors = np.asarray(y_pred, dtype=np.float64) - y_true
+        if len(y_true) == 0:
+            return
+        if self.shift is None:
+            self.shift = float(y_true.mean())
+        true = y_true - self.shift
+        nonzero = y_true != 0
+        percentage = np.divide(
+            np.abs(errors),
+            np.abs(y_true),
+            out=np.zeros_like(errors),
+            where=nonzero,
+        )
+        # Rows x per-row terms, weighted by one (replicates x rows) block of
+        # Poisson draws at a time
+        terms = np.column_stack(
+            [
+                np.ones_like(true),
+                nonzero.astype(np.float64),
+                errors**2,
+                np.abs(errors),
+                percentage,
+                true,
+                true**2,
+            ]
+        )
+        block = max(1, self.max_elements // self.n_bootstrap)
+        sums = np.zeros((self.n_bootstrap, terms.shape[1]))
+        for start in range(0, len(terms), block):
+            rows = terms[start : start + block]
+            weights = self.rng.poisson(1.0, size=(self.n_bootstrap, len(rows)))
+            sums += weights.astype(np.float64) @ rows
+        self.weight += sums[:, 0]
+        self.weight_nonzero += sums[:, 1]
+        self.sum_squared_error += sums[:, 2]
+        self.sum_absolute_error += sums[:, 3]
+        self.sum_absolute_percentage_error += sums[:, 4]
+        self.sum_true += sums[:, 5]
+        self.sum_squared_true += sums[:, 6]
+
+    def merge(self, other: "BootstrapMetricsAccumulator") -> None:
+        if other.shift is None:
+            return
+        if self.shift is None:
+            self.shift = other.shift
+        # Move other's shifted sums onto this shift
+        delta = other.shift - self.shift
+        self.sum_squared_true += (
+            other.sum_squared_true
+            + 2 * delta * other.sum_true
+            + delta**2 * other.weight
+        )
+        self.sum_true += other.sum_true + delta * other.weight
+        self.weight += other.weight
+        self.weight_nonzero += other.weight_nonzero
+        self.sum_squared_error += other.sum_squared_error
+        self.sum_absolute_error += other.sum_absolute_error
+        self.sum_absolute_percentage_error += other.sum_absolute_percentage_error
+
+    def samples(self) -> dict:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mse = self.sum_squared_error / self.weight
+            ss_tot = self.sum_squared_true - self.sum_true**2 / self.weight
+            return {
+                "mse": mse,
+                "rmse": np.sqrt(mse),
+                "mae": self.sum_absolute_error / self.weight,
+                "r2": 1 - self.sum_squared_error / ss_tot,
+                "mape": self.sum_absolute_percentage_error / self.weight_nonzero,
+            }
+
+    def result(self, confidence: float = 0.95) -> dict:
+        if self.shift is None:
+            raise ValueError("No samples to compute confidence intervals on")
+        alpha = (1 - confidence) / 2
+        intervals = {}
+        for metric, values in self.samples().items():
+            values = values[np.isfinite(values)]
+            low, high = (
+                np.quantile(values, [alpha, 1 - alpha])
+                if len(values)
+                else (np.nan, np.nan)
+            )
+            intervals[metric] = [float(low), float(high)]
+        return intervals
+
+
+def bootstrap_confidence_intervals(
+    y_true: np.ndarray,
+    y_pred: np.ndarray,
+    n_bootstrap: int = 1000,
+    confidence: float = 0.95,
+    random_state: int = 42,
+    max_elements: int = 5_000_000,
+) -> dict:
+    accumulator = BootstrapMetricsAccumulator(n_bootstrap, random_state, max_elements)
+    accumulator.update(y_true, y_pred)
+    return accumulator.result(confidence)
+
+
+class ModelEvaluationStrategy(ABC):
+    @abstractmethod
+    def evaluate_model(
+        self, model: RegressorMixin, X_test: pd.DataFrame, y_test: pd.Series
+    ) -> dict:
+        pass
+
+
+class RegressionModelEvaluationStrategy(ModelEvaluationStrategy):
+    def __init__(
+        self,
+        batch_size: int = 100_000,
+        n_bootstrap: int = 1000,
+        confidence: float = 0.95,
+        random_state: int = 42,
+    ) -> None:
+        if batch_size <= 0:
+            raise ValueError(f"Invalid batch_size {batch_size}. Must be positive.")
+        if not 0 < confidence < 1:
+            raise ValueError(f"Invalid confidence {confidence}. Must be in (0, 1).")
+        self.batch_size = batch_size
+        self.n_bootstrap = n_bootstrap
+        self.confidence = confidence
+        self.random_state = random_state
+
+    def evaluate_model(
+        self, model: RegressorMixin, X_test: pd.DataFrame, y_test: pd.Series
+    ) -> dict:
+        logging.info(f"Evaluating model on {len(X_test)} rows")
+        timings = {"predict": 0.0, "metrics": 0.0, "bootstrap": 0.0}
+        accumulator = RegressionMetricsAccumulator()
+        bootstrap = (
+            BootstrapMetricsAccumulator(self.n_bootstrap, self.random_state)
+            if self.n_bootstrap > 0
+            else None
+        )
+        y_true = y_test.to_numpy(dtype=np.float64)
+
+        for start in range(0, len(X_test), self.batch_size):
+            stop = start + self.batch_size
+            tick = time.perf_counter()
+            batch_pred = model.predict(X_test.iloc[start:stop])
+            timings["predict"] += time.perf_counter() - tick
+
+            tick = time.perf_counter()
+            accumulator.update(y_true[start:stop], batch_pred)
+            timings["metrics"] += time.perf_counter() - tick
+
+            if bootstrap is not None:
+                tick = time.perf_counter()
+                bootstrap.update(y_true[start:stop], batch_pred)
+                timings["bootstrap"] += time.perf_counter() - tick
+
+        metrics = accumulator.result()
+        if bootstrap is not None:
+            metrics["confidence_intervals"] = bootstrap.result(self.confidence)
+        metrics["timings"] = timings
+        logging.info(
+            f"Evaluation completed: rmse={metrics['rmse']:.4f} r2={metrics['r2']:.4f}"
+        )
+        return metrics
+
+
+class ModelEvaluator:
+    def __init__(self, strategy: ModelEvaluationStrategy) -> None:
+        self.strategy = strategy
+
+    def set_strategy(self, strategy: ModelEvaluationStrategy) -> None:
+        self.strategy = strategy
+
+    @instrumented
+    def evaluate(
+        self, model: RegressorMixin, X_test: pd.DataFrame, y_test: pd.Series
+    ) -> dict:
+        return self.strategy.evaluate_model(model, X_test, y_test)
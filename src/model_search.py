@@ -0,0 +1,162 @@
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+from sklearn.linear_model import Lasso, Ridge
+from sklearn.model_selection import ParameterGrid
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from src.model_building import ModelBuildingStrategy
+from src.shared_data import SharedArrays, load_shared
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+MODEL_FAMILIES = {
+    "ridge": Ridge,
+    "lasso": Lasso,
+    "gradient_boosting": GradientBoostingRegressor,
+    "random_forest": RandomForestRegressor,
+}
+
+DEFAULT_PARAM_GRIDS = {
+    "ridge": {"alpha": [0.01, 0.1, 1.0, 10.0, 100.0]},
+    "lasso": {"alpha": [0.0001, 0.001, 0.01, 0.1, 1.0], "max_iter": [5000]},
+    "gradient_boosting": {
+        "n_estimators": [100, 300],
+        "learning_rate": [0.05, 0.1],
+        "max_depth": [2, 3],
+    },
+    "random_forest": {
+        "n_estimators": [100, 300],
+        "max_depth": [None, 12],
+        "min_samples_leaf": [1, 5],
+    },
+}
+
+
+def _make_pipeline(family: str, params: dict) -> Pipeline:
+    return Pipeline(
+        [("scalar", StandardScaler()), ("model", MODEL_FAMILIES[family](**params))]
+    )
+
+
+def _evaluate_candidate(
+    paths: Dict[str, str], n_val: int, family: str, params: dict
+) -> dict:
+    # Runs in a worker process, the data arrives as read-only memory maps with
+    # the validation rows first, so both sets are slices of the maps
+    data = load_shared(paths)
+    X, y = data["X"], data["y"]
+    pipeline = _make_pipeline(family, params)
+    start = time.perf_counter()
+    pipeline.fit(X[n_val:], y[n_val:])
+    fit_seconds = time.perf_counter() - start
+
+    y_val = y[:n_val]
+    errors = pipeline.predict(X[:n_val]) - y_val
+    return {
+        "family": family,
+        "params": params,
+        "rmse": float(np.sqrt(np.mean(errors**2))),
+        "mae": float(np.mean(np.abs(errors))),
+        "r2": float(1 - np.sum(errors**2) / np.sum((y_val - y_val.mean()) ** 2)),
+        "fit_seconds": fit_seconds,
+    }
+
+
+class ModelSearchStrategy(ModelBuildingStrategy):
+    def __init__(
+        self,
+        families: Optional[List[str]] = None,
+        param_grids: Optional[Dict[str, dict]] = None,
+        search: str = "grid",
+        n_iter: int = 20,
+        n_workers: Optional[int] = None,
+        validation_size: float = 0.2,
+        random_state: int = 42,
+    ) -> None:
+        families = families or list(MODEL_FAMILIES)
+        unknown = set(families) - set(MODEL_FAMILIES)
+        if unknown:
+            raise ValueError(f"Unsupported model families {sorted(unknown)}")
+        if search not in ["grid", "random"]:
+            raise ValueError(f"Invalid search {search}. Must be 'grid' or 'random'.")
+        self.families = families
+        self.param_grids = {**DEFAULT_PARAM_GRIDS, **(param_grids or {})}
+        self.search = search
+        self.n_iter = n_iter
+        self.n_workers = n_workers or os.cpu_count()
+        self.validation_size = validation_size
+        self.random_state = random_state
+        self.leaderboard_ = None
+
+    def build_and_train_model(
+        self, X_train: pd.DataFrame, y_train: pd.Series
+    ) -> Pipeline:
+        if not isinstance(X_train, pd.DataFrame):
+            raise TypeError("X_train must be a pd.DataFrame")
+        if not isinstance(y_train, pd.Series):
+            raise TypeError("y_train must be a pd.Series")
+        non_numeric = X_train.columns.difference(
+            X_train.select_dtypes(include=["number"]).columns
+        )
+        if len(non_numeric):
+            raise TypeError(
+                f"Model search needs numeric features, got {list(non_numeric)}"
+            )
+
+        candidates = self._candidates()
+        rng = np.random.default_rng(self.random_state)
+        order = rng.permutation(len(X_train))
+        n_val = int(len(X_train) * self.validation_size)
+        logging.info(
+            f"Searching {len(candidates)} candidates on {self.n_workers} workers"
+        )
+        # Rows are permuted once here instead of gathered by every candidate
+        rows = np.concatenate([np.sort(order[:n_val]), np.sort(order[n_val:])])
+        shared = SharedArrays(
+            {
+                "X": X_train.to_numpy(dtype=np.float64)[rows],
+                "y": y_train.to_numpy(dtype=np.float64)[rows],
+            }
+        )
+        with shared as paths:
+            with ProcessPoolExecutor(max_workers=self.n_workers) as executor:
+                futures = [
+                    executor.submit(_evaluate_candidate, paths, n_val, family, params)
+                    for family, params in candidates
+                ]
+                results = [future.result() for future in futures]
+
+        results.sort(key=lambda result: result["rmse"])
+        best = results[0]
+        self.leaderboard_ = pd.DataFrame(results).assign(
+            params=lambda df: df["params"].map(str)
+        )
+        self.leaderboard_.index.name = "rank"
+        logging.info(
+            f"Best candidate {best['family']} {best['params']} rmse={best['rmse']:.4f}"
+        )
+        pipeline = _make_pipeline(best["family"], best["params"])
+        pipeline.fit(X_train, y_train)
+        return pipeline
+
+    def _candidates(self) -> List[tuple]:
+        candidates = [
+            (family, params)
+            for family in self.families
+            for params in ParameterGrid(self.param_grids[family])
+        ]
+        if self.search == "random" and self.n_iter < len(candidates):
+            rng = np.random.default_rng(self.random_state)
+            picked = rng.choice(len(candidates), size=self.n_iter, replace=False)
+            candidates = [candidates[i] for i in sorted(picked)]
+        return candidates
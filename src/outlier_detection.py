@@ -1,10 +1,23 @@
+import functools
+import json
 import logging
+import warnings
 from abc import ABC, abstractmethod
+from typing import Iterable, Iterator, Optional, Sequence, Union
 
+import joblib
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 import seaborn as sns
+from joblib import Parallel, delayed
+from scipy.stats import chi2
+from sklearn.covariance import MinCovDet
+from sklearn.ensemble import IsolationForest
+
+from src.instrumentation import instrumented
+from src.parallel import ColumnParallelExecutor
+from src.streaming_stats import KLLSketch, RunningMoments, reservoir_sample
 
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
@@ -12,58 +25,395 @@ logging.basicConfig(
 
 
 class OutlierDetectionStrategy(ABC):
+    # Strategies flagging every column from its own values only can run over
+    # column blocks in parallel
+    columnwise = False
+
+    def fit(
+        self, data: Union[pd.DataFrame, Iterable[pd.DataFrame]]
+    ) -> "OutlierDetectionStrategy":
+        return self
+
+    def quantiles(self, df: pd.DataFrame, q: Sequence[float]) -> pd.DataFrame:
+        return df.quantile(list(q))
+
     @abstractmethod
     def detect_outliers(self, df: pd.DataFrame) -> pd.DataFrame:
         pass
 
+    def _check_is_fitted(self) -> None:
+        pass
+
 
 class ZScoreOutlierDetection(OutlierDetectionStrategy):
+    columnwise = True
+
     def __init__(self, threshold=3) -> None:
         self.threshold = threshold
 
     def detect_outliers(self, df: pd.DataFrame) -> pd.DataFrame:
         logging.info("Detecting outlier using Z Score method")
-        z_scores = np.abs((df - df.mean)) / df.std()
+        z_scores = np.abs(df - df.mean()) / df.std()
         outliers = z_scores > self.threshold
         logging.info("Outlier detected with Z score threshold")
         return pd.DataFrame(outliers)
 
 
 class IQROutlierDetection(OutlierDetectionStrategy):
+    columnwise = True
 
     def detect_outliers(self, df: pd.DataFrame) -> pd.DataFrame:
         logging.info("Detecting outlier using IQR method")
-        Q1 = df.quantile(0.25)
-        Q3 = df.quantile(0.75)
-        IQR = Q1 - Q3
+        quartiles = df.quantile([0.25, 0.75])
+        Q1, Q3 = quartiles.iloc[0], quartiles.iloc[1]
+        IQR = Q3 - Q1
         outliers = (df < (Q1 - 1.5 * IQR)) | (df > (Q3 + 1.5 * IQR))
         logging.info("Outlier detected with IQR threshold")
         return pd.DataFrame(outliers)
 
 
+class StreamingOutlierDetection(OutlierDetectionStrategy):
+    # Fits per-column bounds in a single pass over one frame or any number of
+    # chunks: Welford mean/std for "zscore", KLL quartiles for "iqr". Partial
+    # fits from parallel workers are combined with merge, and once fitted the
+    # bounds flag new data without rescanning the training data. An unfitted
+    # detector fits on the frame it is asked to check, chunked input must be
+    # fitted over the stream first. Bounds are per column, a fitted detector
+    # checks any subset of its columns.
+    columnwise = True
+
+    def __init__(
+        self,
+        method: str = "zscore",
+        threshold: float = 3,
+        iqr_multiplier: float = 1.5,
+        sketch_size: int = 400,
+    ) -> None:
+        if method not in ("zscore", "iqr"):
+            raise ValueError(f"Unsupported streaming outlier method {method}")
+        self.method = method
+        self.threshold = threshold
+        self.iqr_multiplier = iqr_multiplier
+        self.sketch_size = sketch_size
+        self.columns_: Optional[list] = None
+        self.moments_: Optional[RunningMoments] = None
+        self.sketches_: list = []
+
+    def partial_fit(self, df: pd.DataFrame) -> "StreamingOutlierDetection":
+        if self.columns_ is None:
+            self.columns_ = df.select_dtypes(include=["number"]).columns.tolist()
+            self.moments_ = RunningMoments(len(self.columns_))
+            self.sketches_ = [
+                KLLSketch(self.sketch_size, seed=i) for i in range(len(self.columns_))
+            ]
+        values = df[self.columns_].to_numpy(dtype=np.float64)
+        self.moments_.update(values)
+        for sketch, column in zip(self.sketches_, values.T):
+            sketch.update(column)
+        return self
+
+    def fit(
+        self, data: Union[pd.DataFrame, Iterable[pd.DataFrame]]
+    ) -> "StreamingOutlierDetection":
+        logging.info(f"Fitting streaming {self.method} outlier bounds")
+        self.columns_, self.moments_, self.sketches_ = None, None, []
+        chunks = [data] if isinstance(data, pd.DataFrame) else data
+        for chunk in chunks:
+            self.partial_fit(chunk)
+        return self
+
+    def merge(self, other: "StreamingOutlierDetection") -> "StreamingOutlierDetection":
+        if other.columns_ is None:
+            return self
+        if self.columns_ is None:
+            self.columns_ = list(other.columns_)
+            self.moments_ = RunningMoments(len(self.columns_))
+            self.sketches_ = [
+                KLLSketch(self.sketch_size, seed=i) for i in range(len(self.columns_))
+            ]
+        if other.columns_ != self.columns_:
+            raise ValueError("Cannot merge detectors fitted on different columns")
+        self.moments_.merge(other.moments_)
+        for sketch, other_sketch in zip(self.sketches_, other.sketches_):
+            sketch.merge(other_sketch)
+        return self
+
+    @property
+    def bounds_(self) -> pd.DataFrame:
+        self._check_is_fitted()
+        if self.method == "zscore":
+            mean, std = self.moments_.mean, self.moments_.std()
+            lower, upper = mean - self.threshold * std, mean + self.threshold * std
+        else:
+            Q1, Q3 = self.quantiles(None, [0.25, 0.75]).to_numpy()
+            IQR = Q3 - Q1
+            lower = Q1 - self.iqr_multiplier * IQR
+            upper = Q3 + self.iqr_multiplier * IQR
+        return pd.DataFrame(
+            [lower, upper], index=["lower", "upper"], columns=self.columns_
+        )
+
+    def quantiles(self, df: Optional[pd.DataFrame], q: Sequence[float]) -> pd.DataFrame:
+        if self.columns_ is None:
+            self.fit(df)
+        # Only the fitted columns present in df (all of them without one)
+        positions = [
+            i
+            for i, column in enumerate(self.columns_)
+            if df is None or column in df.columns
+        ]
+        return pd.DataFrame(
+            np.column_stack(
+                [self.sketches_[i].quantile(q) for i in positions]
+                or np.empty((len(q), 0))
+            ),
+            index=list(q),
+            columns=[self.columns_[i] for i in positions],
+        )
+
+    def detect_outliers(self, df: pd.DataFrame) -> pd.DataFrame:
+        if self.columns_ is None:
+            self.fit(df)
+        logging.info(f"Detecting outliers with fitted {self.method} bounds")
+        columns = [column for column in self.columns_ if column in df.columns]
+        lower, upper = self.bounds_[columns].to_numpy()
+        values = df[columns].to_numpy(dtype=np.float64)
+        outliers = (values < lower) | (values > upper)
+        return pd.DataFrame(outliers, index=df.index, columns=columns)
+
+    def save(self, path: str) -> None:
+        self._check_is_fitted()
+        state = {
+            "params": {
+                "method": self.method,
+                "threshold": self.threshold,
+                "iqr_multiplier": self.iqr_multiplier,
+                "sketch_size": self.sketch_size,
+            },
+            "columns": self.columns_,
+            "moments": self.moments_.to_dict(),
+            "sketches": [sketch.to_dict() for sketch in self.sketches_],
+        }
+        with open(path, "w") as f:
+            json.dump(state, f)
+
+    @classmethod
+    def load(cls, path: str) -> "StreamingOutlierDetection":
+        with open(path) as f:
+            state = json.load(f)
+        detector = cls(**state["params"])
+        detector.columns_ = state["columns"]
+        detector.moments_ = RunningMoments.from_dict(state["moments"])
+        detector.sketches_ = [
+            KLLSketch.from_dict(sketch, seed=i)
+            for i, sketch in enumerate(state["sketches"])
+        ]
+        return detector
+
+    def _check_is_fitted(self) -> None:
+        if self.columns_ is None:
+            raise ValueError(
+                "StreamingOutlierDetection is not fitted, call fit or partial_fit first"
+            )
+
+
+class MultivariateOutlierDetection(OutlierDetectionStrategy):
+    # Flags whole rows from the joint distribution of the numeric columns. The
+    # model is fitted on a uniform sample of at most sample_size rows (reservoir
+    # sampled across chunks) and rows are scored in batches across n_jobs
+    # threads. Missing values are filled with the sample medians. Returns a
+    # single boolean "outlier" column.
+    def __init__(
+        self,
+        sample_size: Optional[int] = 100_000,
+        batch_size: int = 100_000,
+        n_jobs: int = -1,
+        random_state: int = 42,
+    ) -> None:
+        if batch_size <= 0:
+            raise ValueError(f"Invalid batch_size {batch_size}. Must be positive.")
+        self.sample_size = sample_size
+        self.batch_size = batch_size
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+        self.columns_: Optional[list] = None
+
+    def fit(
+        self, data: Union[pd.DataFrame, Iterable[pd.DataFrame]]
+    ) -> "MultivariateOutlierDetection":
+        sample = reservoir_sample(
+            [data] if isinstance(data, pd.DataFrame) else data,
+            self.sample_size,
+            self.random_state,
+        )
+        logging.info(f"Fitting {type(self).__name__} on {len(sample)} sampled rows")
+        self.columns_ = sample.select_dtypes(include=["number"]).columns.tolist()
+        values = sample[self.columns_].to_numpy(dtype=np.float64)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            self.fill_values_ = np.nan_to_num(np.nanmedian(values, axis=0))
+        self._fit_model(self._fill(values))
+        return self
+
+    def detect_outliers(self, df: pd.DataFrame) -> pd.DataFrame:
+        if self.columns_ is None:
+            self.fit(df)
+        logging.info(f"Detecting outliers using {type(self).__name__}")
+        values = df[self.columns_].to_numpy(dtype=np.float64)
+        batches = Parallel(n_jobs=self.n_jobs, prefer="threads")(
+            delayed(self._is_outlier)(
+                self._fill(values[start : start + self.batch_size])
+            )
+            for start in range(0, len(values), self.batch_size)
+        )
+        outliers = np.concatenate(batches) if batches else np.zeros(0, dtype=bool)
+        return pd.DataFrame({"outlier": outliers}, index=df.index)
+
+    def save(self, path: str) -> None:
+        if self.columns_ is None:
+            raise ValueError(f"{type(self).__name__} is not fitted, call fit first")
+        joblib.dump(self, path)
+
+    @staticmethod
+    def load(path: str) -> "MultivariateOutlierDetection":
+        return joblib.load(path)
+
+    def _check_is_fitted(self) -> None:
+        if self.columns_ is None:
+            raise ValueError(f"{type(self).__name__} is not fitted, call fit first")
+
+    def _fill(self, values: np.ndarray) -> np.ndarray:
+        missing = np.isnan(values)
+        if missing.any():
+            values = np.where(missing, self.fill_values_, values)
+        return values
+
+    @abstractmethod
+    def _fit_model(self, values: np.ndarray) -> None:
+        pass
+
+    @abstractmethod
+    def _is_outlier(self, values: np.ndarray) -> np.ndarray:
+        pass
+
+
+class IsolationForestOutlierDetection(MultivariateOutlierDetection):
+    def __init__(
+        self,
+        n_estimators: int = 100,
+        contamination: Union[str, float] = "auto",
+        sample_size: Optional[int] = 100_000,
+        batch_size: int = 100_000,
+        n_jobs: int = -1,
+        random_state: int = 42,
+    ) -> None:
+        super().__init__(sample_size, batch_size, n_jobs, random_state)
+        self.n_estimators = n_estimators
+        self.contamination = contamination
+
+    def _fit_model(self, values: np.ndarray) -> None:
+        self.model_ = IsolationForest(
+            n_estimators=self.n_estimators,
+            contamination=self.contamination,
+            random_state=self.random_state,
+            n_jobs=self.n_jobs,
+        ).fit(values)
+
+    def _is_outlier(self, values: np.ndarray) -> np.ndarray:
+        return self.model_.decision_function(values) < 0
+
+
+class RobustCovarianceOutlierDetection(MultivariateOutlierDetection):
+    # Minimum Covariance Determinant fit, a row is an outlier when its squared
+    # robust Mahalanobis distance exceeds the chi2 quantile at confidence
+    def __init__(
+        self,
+        confidence: float = 0.975,
+        support_fraction: Optional[float] = None,
+        sample_size: Optional[int] = 100_000,
+        batch_size: int = 100_000,
+        n_jobs: int = -1,
+        random_state: int = 42,
+    ) -> None:
+        if not 0 < confidence < 1:
+            raise ValueError(f"Invalid confidence {confidence}. Must be in (0, 1).")
+        super().__init__(sample_size, batch_size, n_jobs, random_state)
+        self.confidence = confidence
+        self.support_fraction = support_fraction
+
+    def _fit_model(self, values: np.ndarray) -> None:
+        self.model_ = MinCovDet(
+            support_fraction=self.support_fraction, random_state=self.random_state
+        ).fit(values)
+        self.threshold_ = chi2.ppf(self.confidence, df=values.shape[1])
+
+    def _is_outlier(self, values: np.ndarray) -> np.ndarray:
+        return self.model_.mahalanobis(values) > self.threshold_
+
+
 class OutlierDetector:
-    def __init__(self, strategy: OutlierDetectionStrategy) -> None:
+    def __init__(
+        self,
+        strategy: OutlierDetectionStrategy,
+        executor: Optional[ColumnParallelExecutor] = None,
+    ) -> None:
         self.strategy = strategy
+        self.executor = executor
 
     def set_strategey(self, strategy: OutlierDetectionStrategy) -> None:
         self.strategy = strategy
 
+    @instrumented
+    def fit(
+        self, data: Union[pd.DataFrame, Iterable[pd.DataFrame]]
+    ) -> "OutlierDetector":
+        self.strategy.fit(data)
+        return self
+
+    @instrumented
     def detect_outliers(self, df: pd.DataFrame) -> pd.DataFrame:
+        if self._parallel():
+            self._fit_unfitted(df)
+            return self.executor.map_frame(self.strategy.detect_outliers, df)
         return self.strategy.detect_outliers(df)
 
+    @instrumented
     def handle_outliers(self, df: pd.DataFrame, method="remove"):
-        outliers = self.detect_outliers(df)
         if method == "remove":
+            outliers = self.detect_outliers(df)
             df_cleaned = df[(~outliers).all(axis=1)]
         elif method == "cap":
-            df_cleaned = df.clip(
-                lower=df.to_xarray().quantile(0.01),
-                upper=df.to_xarray().quantile(0.99),
-                axis=1,
-            )
+            # Both caps come out of one quantile pass (or the fitted sketches)
+            quantiles = functools.partial(self.strategy.quantiles, q=[0.01, 0.99])
+            if self._parallel():
+                self._fit_unfitted(df)
+                caps = self.executor.map_frame(quantiles, df)
+            else:
+                caps = quantiles(df)
+            df_cleaned = df.clip(lower=caps.iloc[0], upper=caps.iloc[1], axis=1)
         else:
             logging.warning(f"Unknown method {method} for outlier detection")
             return df
 
         logging.info("Outlier detection completed")
         return df_cleaned
+
+    def handle_outliers_chunks(
+        self, chunks: Iterable[pd.DataFrame], method="remove"
+    ) -> Iterator[pd.DataFrame]:
+        # Stateless strategies compute statistics per chunk. Fitted strategies
+        # apply the same bounds to every chunk and must be fitted over the
+        # stream beforehand (see fit), fitting on the first chunk would not
+        self.strategy._check_is_fitted()
+        return (self.handle_outliers(chunk, method) for chunk in chunks)
+
+    def _parallel(self) -> bool:
+        return self.executor is not None and self.strategy.columnwise
+
+    def _fit_unfitted(self, df: pd.DataFrame) -> None:
+        # A detector fitting itself would fit on every block on its own, fit
+        # it on the whole frame before it is shared between the blocks
+        try:
+            self.strategy._check_is_fitted()
+        except ValueError:
+            self.strategy.fit(df)
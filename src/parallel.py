@@ -0,0 +1,182 @@
+import logging
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+from typing import Callable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+BACKENDS = ["threads", "processes"]
+
+
+def _shared_block_task(
+    name: str,
+    shape: tuple,
+    dtype: str,
+    columns: slice,
+    write: bool,
+    func: Callable,
+    args: tuple,
+):
+    # Runs in a worker process on its columns of the shared buffer. Every view
+    # of the buffer has to be gone before it can be closed
+    shm = shared_memory.SharedMemory(name=name)
+    values = block = None
+    try:
+        values = np.ndarray(shape, dtype=dtype, buffer=shm.buf, order="F")
+        block = values[:, columns]
+        result = func(block, columns, *args)
+        if write:
+            if result is not block:
+                block[...] = result
+            return None
+        if isinstance(result, np.ndarray) and np.may_share_memory(result, values):
+            result = result.copy()
+        return result
+    finally:
+        values = block = None
+        shm.close()
+
+
+class ColumnParallelExecutor:
+    # Runs a column-independent function over blocks of columns, in a thread
+    # pool (NumPy and most pandas reductions release the GIL) or a process
+    # pool. Arrays are column-major so every block is a contiguous view: with
+    # threads the blocks are transformed in place, with processes they go
+    # through one shared memory buffer. Frames are split with iloc and the
+    # results concatenated without copying, a process pool pickles them.
+    def __init__(
+        self,
+        n_workers: Optional[int] = None,
+        backend: str = "threads",
+        min_block_columns: int = 8,
+    ) -> None:
+        if backend not in BACKENDS:
+            raise ValueError(f"Invalid backend {backend}. Must be one of {BACKENDS}")
+        if min_block_columns < 1:
+            raise ValueError(
+                f"Invalid min_block_columns {min_block_columns}. Must be positive."
+            )
+        self.n_workers = n_workers or os.cpu_count()
+        self.backend = backend
+        self.min_block_columns = min_block_columns
+        self._pool: Optional[Executor] = None
+
+    def __enter__(self) -> "ColumnParallelExecutor":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __getstate__(self) -> dict:
+        # Context classes holding an executor stay picklable, the pool is
+        # recreated on first use
+        state = dict(self.__dict__)
+        state["_pool"] = None
+        return state
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def column_blocks(self, n_columns: int) -> List[slice]:
+        # At most one block per worker, none narrower than min_block_columns
+        n_blocks = max(1, min(self.n_workers, n_columns // self.min_block_columns))
+        bounds = np.linspace(0, n_columns, n_blocks + 1).astype(int)
+        return [slice(start, stop) for start, stop in zip(bounds[:-1], bounds[1:])]
+
+    def map_frame(
+        self, func: Callable[[pd.DataFrame], pd.DataFrame], df: pd.DataFrame
+    ) -> pd.DataFrame:
+        # func maps a frame to a frame of the same columns (or an aligned
+        # subset of them), the block results are put side by side
+        blocks = self.column_blocks(df.shape[1])
+        if len(blocks) == 1:
+            return func(df)
+        logging.info(
+            f"Running {getattr(func, '__qualname__', 'function')} over "
+            f"{len(blocks)} column blocks on {self.n_workers} {self.backend}"
+        )
+        results = list(
+            self._get_pool().map(func, [df.iloc[:, columns] for columns in blocks])
+        )
+        return pd.concat(results, axis=1, copy=False)
+
+    def map_blocks(self, func: Callable, values: np.ndarray, *args) -> list:
+        # func(block, columns, *args) per column block, e.g. to fit per column
+        # statistics. Results come back in column order
+        return self._run(func, values, args, write=False)
+
+    def apply_blocks(self, func: Callable, values: np.ndarray, *args) -> np.ndarray:
+        # Replaces every column block of values with func(block, columns, *args),
+        # values must be a writable column-major array
+        if not values.flags.f_contiguous:
+            raise ValueError("apply_blocks needs a column-major (Fortran) array")
+        self._run(func, values, args, write=True)
+        return values
+
+    def _run(self, func: Callable, values: np.ndarray, args: tuple, write: bool):
+        blocks = self.column_blocks(values.shape[1])
+        if len(blocks) == 1 or self.backend == "threads":
+            return self._run_in_place(func, values, args, write, blocks)
+        return self._run_shared(func, values, args, write, blocks)
+
+    def _run_in_place(self, func, values, args, write, blocks) -> list:
+        def task(columns: slice):
+            block = values[:, columns]
+            result = func(block, columns, *args)
+            if write and result is not block:
+                block[...] = result
+            return None if write else result
+
+        if len(blocks) == 1:
+            return [task(blocks[0])]
+        return list(self._get_pool().map(task, blocks))
+
+    def _run_shared(self, func, values, args, write, blocks) -> list:
+        shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+        shared = None
+        try:
+            shared = np.ndarray(
+                values.shape, dtype=values.dtype, buffer=shm.buf, order="F"
+            )
+            shared[...] = values
+            futures = [
+                self._get_pool().submit(
+                    _shared_block_task,
+                    shm.name,
+                    values.shape,
+                    values.dtype.str,
+                    columns,
+                    write,
+                    func,
+                    args,
+                )
+                for columns in blocks
+            ]
+            results = [future.result() for future in futures]
+            if write:
+                values[...] = shared
+            return results
+        finally:
+            shared = None
+            shm.close()
+            shm.unlink()
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            if self.backend == "threads":
+                self._pool = ThreadPoolExecutor(max_workers=self.n_workers)
+            else:
+                # Workers attaching to a buffer register it with the resource
+                # tracker, they have to share ours or theirs would report it as
+                # leaked (and unlink it) when they exit
+                resource_tracker.ensure_running()
+                self._pool = ProcessPoolExecutor(max_workers=self.n_workers)
+        return self._pool
@@ -0,0 +1,302 @@
+import json
+import logging
+import queue
+import threading
+import time
+import warnings
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+ARROW_STREAM_CONTENT_TYPE = "application/vnd.apache.arrow.stream"
+
+
+def parse_payload(body: bytes, content_type: str = "application/json") -> pd.DataFrame:
+    if content_type.startswith(ARROW_STREAM_CONTENT_TYPE):
+        return pa.ipc.open_stream(body).read_pandas()
+
+    payload = json.loads(body)
+    # Row oriented: [{...}, ...] or {"instances": [{...}, ...]}
+    if isinstance(payload, list):
+        return pd.DataFrame.from_records(payload)
+    if not isinstance(payload, dict):
+        raise ValueError(
+            f"Unsupported payload of type {type(payload).__name__}, expected an "
+            "object or a list of records"
+        )
+    if "instances" in payload:
+        return pd.DataFrame.from_records(payload["instances"])
+    # Column oriented: {"columns": [...], "data": [[...]]} or {"inputs": {col: [...]}}
+    if "columns" in payload and "data" in payload:
+        return pd.DataFrame(payload["data"], columns=payload["columns"])
+    if "inputs" in payload:
+        return pd.DataFrame(payload["inputs"])
+    raise ValueError(
+        "Unsupported payload, expected 'instances', 'columns'/'data' or 'inputs'"
+    )
+
+
+def input_columns(model) -> Optional[list]:
+    # Feature names the model was fitted on: a pipeline fitted on a frame, or
+    # a compiled model
+    columns = getattr(model, "feature_names_in_", None)
+    if columns is None:
+        columns = getattr(model, "columns", None)
+    return None if columns is None else list(columns)
+
+
+class LatencyStats:
+    def __init__(self, window: int = 10_000) -> None:
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self._started = time.monotonic()
+        self.requests = 0
+        self.rows = 0
+        self.batches = 0
+        self.errors = 0
+
+    def record_request(self, latency: float, rows: int) -> None:
+        with self._lock:
+            self._latencies.append(latency)
+            self.requests += 1
+            self.rows += rows
+
+    def record_batch(self) -> None:
+        with self._lock:
+            self.batches += 1
+
+    def record_error(self) -> None:
+        with self._lock:
+            self.errors += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            latencies = np.array(self._latencies)
+            elapsed = time.monotonic() - self._started
+            p50, p99 = (
+                np.percentile(latencies, [50, 99]) * 1000
+                if len(latencies)
+                else (float("nan"), float("nan"))
+            )
+            return {
+                "requests": self.requests,
+                "rows": self.rows,
+                "batches": self.batches,
+                "errors": self.errors,
+                "p50_latency_ms": float(p50),
+                "p99_latency_ms": float(p99),
+                "requests_per_second": self.requests / elapsed,
+                "rows_per_second": self.rows / elapsed,
+                "mean_batch_rows": self.rows / self.batches if self.batches else 0.0,
+            }
+
+
+class MicroBatcher:
+    # Concurrent requests are queued and coalesced into one vectorized predict
+    # call, a batch closes when it reaches max_batch_size rows or when
+    # batch_window_ms has passed since its first request arrived
+    def __init__(
+        self,
+        model,
+        max_batch_size: int = 1024,
+        batch_window_ms: float = 5.0,
+        stats: Optional[LatencyStats] = None,
+    ) -> None:
+        if max_batch_size <= 0:
+            raise ValueError(
+                f"Invalid max_batch_size {max_batch_size}. Must be positive."
+            )
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.batch_window = batch_window_ms / 1000
+        self.stats = stats or LatencyStats()
+        self.input_columns = input_columns(model)
+        self._queue: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def validate(self, df: pd.DataFrame) -> None:
+        # A request is checked on its own before it joins a batch, concatenating
+        # it with the others would fill its missing features with NaN
+        if self.input_columns is None:
+            return
+        missing = [column for column in self.input_columns if column not in df]
+        if missing:
+            raise ValueError(f"Missing input features {missing}")
+
+    def submit(self, df: pd.DataFrame) -> Future:
+        self.validate(df)
+        future: Future = Future()
+        with self._lock:
+            if self._closed.is_set():
+                raise RuntimeError("MicroBatcher is closed")
+            self._queue.put((df, future))
+        return future
+
+    def predict(self, df: pd.DataFrame, timeout: Optional[float] = None) -> np.ndarray:
+        return self.submit(df).result(timeout)
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed.set()
+        self._worker.join()
+        # Requests still queued when the worker stopped would never resolve
+        while True:
+            try:
+                _, future = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            future.set_exception(RuntimeError("MicroBatcher is closed"))
+
+    def _run(self) -> None:
+        while not self._closed.is_set():
+            try:
+                batch = [self._queue.get(timeout=0.1)]
+            except queue.Empty:
+                continue
+            rows = len(batch[0][0])
+            deadline = time.monotonic() + self.batch_window
+            while rows < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(item)
+                rows += len(item[0])
+            self._predict_batch(batch)
+
+    def _predict_batch(self, batch: list) -> None:
+        frames = [df for df, _ in batch]
+        try:
+            with warnings.catch_warnings():
+                # Single row requests often carry all-NA columns, their dtype
+                # is settled by the rest of the batch
+                warnings.simplefilter("ignore", FutureWarning)
+                X = pd.concat(frames, ignore_index=True)
+            predictions = np.asarray(self.model.predict(X))
+        except Exception as e:
+            if len(batch) > 1:
+                # Retry the requests one by one so only the bad ones fail
+                logging.warning(
+                    f"Batch prediction failed, retrying {len(batch)} requests "
+                    f"separately: {e}"
+                )
+                for item in batch:
+                    self._predict_batch([item])
+                return
+            logging.error(f"Batch prediction failed: {e}")
+            self.stats.record_error()
+            batch[0][1].set_exception(e)
+            return
+        self.stats.record_batch()
+        offset = 0
+        for df, future in batch:
+            future.set_result(predictions[offset : offset + len(df)])
+            offset += len(df)
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    # The default listen backlog of 5 resets connections under concurrent load
+    request_queue_size = 1024
+    daemon_threads = True
+
+
+class PredictionServer:
+    def __init__(
+        self,
+        model,
+        host: str = "127.0.0.1",
+        port: int = 8000,
+        max_batch_size: int = 1024,
+        batch_window_ms: float = 5.0,
+    ) -> None:
+        self.stats = LatencyStats()
+        self.batcher = MicroBatcher(model, max_batch_size, batch_window_ms, self.stats)
+        self.httpd = _HTTPServer((host, port), self._handler())
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "PredictionServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        logging.info(f"Prediction service listening on {self.url}")
+        return self
+
+    def serve_forever(self) -> None:
+        logging.info(f"Prediction service listening on {self.url}")
+        self.httpd.serve_forever()
+
+    def shutdown(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.batcher.close()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/health":
+                    self._send(200, {"status": "ok"})
+                elif self.path == "/metrics":
+                    self._send(200, server.stats.snapshot())
+                else:
+                    self._send(404, {"error": f"Unknown path {self.path}"})
+
+            def do_POST(self):
+                if self.path != "/predict":
+                    self._send(404, {"error": f"Unknown path {self.path}"})
+                    return
+                start = time.perf_counter()
+                try:
+                    body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                    df = parse_payload(
+                        body, self.headers.get("Content-Type", "application/json")
+                    )
+                    future = server.batcher.submit(df)
+                except ValueError as e:
+                    server.stats.record_error()
+                    self._send(400, {"error": str(e)})
+                    return
+                except RuntimeError as e:
+                    self._send(503, {"error": str(e)})
+                    return
+                try:
+                    predictions = future.result()
+                except Exception as e:
+                    # Already counted by the batcher
+                    self._send(500, {"error": str(e)})
+                    return
+                server.stats.record_request(time.perf_counter() - start, len(df))
+                self._send(200, {"predictions": predictions.tolist()})
+
+            def _send(self, status: int, payload: dict) -> None:
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args) -> None:
+                pass
+
+        return Handler
@@ -0,0 +1,33 @@
+import os
+import shutil
+import tempfile
+from typing import Dict, Optional
+
+import numpy as np
+
+
+class SharedArrays:
+    # Spills arrays to .npy files once so worker processes can open them as
+    # read-only memory maps instead of receiving a pickled copy each
+    def __init__(self, arrays: Dict[str, np.ndarray], dir: Optional[str] = None):
+        self.arrays = arrays
+        self.dir = dir
+        self.paths: Dict[str, str] = {}
+        self._tmp_dir = None
+
+    def __enter__(self) -> Dict[str, str]:
+        self._tmp_dir = tempfile.mkdtemp(prefix="shared-arrays-", dir=self.dir)
+        for name, array in self.arrays.items():
+            path = os.path.join(self._tmp_dir, f"{name}.npy")
+            np.save(path, np.ascontiguousarray(array))
+            self.paths[name] = path
+        # Only the files are needed from here on
+        self.arrays = None
+        return self.paths
+
+    def __exit__(self, *exc_info) -> None:
+        shutil.rmtree(self._tmp_dir, ignore_errors=True)
+
+
+def load_shared(paths: Dict[str, str]) -> Dict[str, np.ndarray]:
+    return {name: np.load(path, mmap_mode="r") for name, path in paths.items()}
@@ -0,0 +1,153 @@
+import functools
+import hashlib
+import logging
+import os
+import sys
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from src.artifact_cache import DEFAULT_CACHE_DIR, ArtifactCache
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+
+def fingerprint_frame(df: pd.DataFrame) -> str:
+    # Numpy backed columns hash their raw buffers, object, string and extension
+    # columns go through hash_pandas_object. Nothing is pickled or copied
+    # beyond what a non-contiguous column needs
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(repr((list(df.columns), [str(t) for t in df.dtypes])).encode())
+    digest.update(
+        pd.util.hash_pandas_object(df.index, index=False).to_numpy().tobytes()
+        if not isinstance(df.index, pd.RangeIndex)
+        else repr(df.index).encode()
+    )
+    for _, column in df.items():
+        values = column.to_numpy() if isinstance(column.dtype, np.dtype) else None
+        if values is not None and values.dtype.kind in "biufcmM":
+            digest.update(np.ascontiguousarray(values).view(np.uint8).data)
+        else:
+            digest.update(
+                pd.util.hash_pandas_object(column, index=False).to_numpy().data
+            )
+    return digest.hexdigest()
+
+
+def _describe(value):
+    # Parameters of a strategy, recursively. Fitted attributes (trailing
+    # underscore) are left out, the key describes what the stage will compute
+    if isinstance(value, (str, int, float, bool, type(None))):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [_describe(item) for item in value]
+    if isinstance(value, dict):
+        return sorted((str(key), _describe(item)) for key, item in value.items())
+    if isinstance(value, np.ndarray):
+        return hashlib.blake2b(value.tobytes(), digest_size=20).hexdigest()
+    if hasattr(value, "__dict__"):
+        return (
+            type(value).__name__,
+            _describe(
+                {
+                    name: item
+                    for name, item in vars(value).items()
+                    if not name.endswith("_")
+                }
+            ),
+        )
+    return type(value).__name__
+
+
+def _modules(value, found: set, seen: set) -> set:
+    # Modules defining the components and everything they hold, the same walk
+    # as _describe
+    if isinstance(value, (str, int, float, bool, type(None), np.ndarray)):
+        return found
+    if id(value) in seen:
+        return found
+    seen.add(id(value))
+    if isinstance(value, (list, tuple)):
+        for item in value:
+            _modules(item, found, seen)
+        return found
+    if isinstance(value, dict):
+        for item in value.values():
+            _modules(item, found, seen)
+        return found
+    found.add(getattr(value, "__module__", None) or type(value).__module__)
+    if hasattr(value, "__dict__"):
+        for name, item in vars(value).items():
+            if not name.endswith("_"):
+                _modules(item, found, seen)
+    return found
+
+
+@functools.lru_cache(maxsize=None)
+def _hash_source(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.blake2b(f.read(), digest_size=20).hexdigest()
+
+
+def fingerprint_code(*components) -> str:
+    # Source of every module the components come from, so editing a strategy
+    # invalidates the outputs it cached
+    digest = hashlib.blake2b(digest_size=20)
+    for module in sorted(_modules(list(components), set(), set())):
+        path = getattr(sys.modules.get(module), "__file__", None)
+        if path and os.path.exists(path):
+            digest.update(f"{module}:{_hash_source(path)}".encode())
+    return digest.hexdigest()
+
+
+def fingerprint_params(*components) -> str:
+    return hashlib.blake2b(
+        repr([_describe(component) for component in components]).encode(),
+        digest_size=20,
+    ).hexdigest()
+
+
+class StepCache:
+    # Stage outputs keyed on the input frame's content and the parameters of the
+    # strategies producing them, stored in an LRU ArtifactCache. Only stages
+    # that fit on the frame they transform are safe to cache, a stage reusing
+    # previously fitted state must not go through here. Keys include the source
+    # of the strategy modules, a code change never reuses stale outputs.
+    def __init__(
+        self,
+        cache_dir: str = os.path.join(DEFAULT_CACHE_DIR, "steps"),
+        max_bytes: int = 4 << 30,
+    ) -> None:
+        self.cache = ArtifactCache(cache_dir, max_bytes)
+
+    def key(self, stage: str, df: pd.DataFrame, *components) -> str:
+        return hashlib.blake2b(
+            f"{stage}:{fingerprint_frame(df)}:{fingerprint_params(*components)}:"
+            f"{fingerprint_code(*components)}".encode(),
+            digest_size=20,
+        ).hexdigest()
+
+    def run(
+        self,
+        stage: str,
+        df: pd.DataFrame,
+        compute: Callable[[pd.DataFrame], pd.DataFrame],
+        *components,
+    ) -> pd.DataFrame:
+        # compute salts the key with its own module, e.g. a step's local function
+        key = self.key(stage, df, compute, *components)
+        result = self.cache.get(key)
+        if result is not None:
+            logging.info(f"Reusing cached output of {stage}")
+            return result
+        result = compute(df)
+        try:
+            self.cache.put(key, result)
+        except (ValueError, TypeError, pa.ArrowException) as e:
+            # e.g. sparse columns, which parquet cannot store
+            logging.warning(f"Output of {stage} is not cacheable: {e}")
+        return result
@@ -0,0 +1,213 @@
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+# Mergeable one-pass statistics. Every summary can be updated chunk by chunk,
+# combined with the summary of another chunk or worker, and round-tripped
+# through to_dict/from_dict as plain JSON types.
+
+
+class RunningMoments:
+    # Per-column count, mean and M2 (Welford), batches and partial results are
+    # combined with Chan's parallel update. NaNs are skipped.
+    def __init__(self, n_columns: int) -> None:
+        self.count = np.zeros(n_columns)
+        self.mean = np.zeros(n_columns)
+        self.m2 = np.zeros(n_columns)
+
+    def update(self, values: np.ndarray) -> "RunningMoments":
+        values = np.asarray(values, dtype=np.float64)
+        if values.ndim == 1:
+            values = values[:, None]
+        count = np.count_nonzero(~np.isnan(values), axis=0).astype(np.float64)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.nan_to_num(np.nansum(values, axis=0) / count)
+        m2 = np.nansum((values - mean) ** 2, axis=0)
+        self._combine(count, mean, m2)
+        return self
+
+    def merge(self, other: "RunningMoments") -> "RunningMoments":
+        self._combine(other.count, other.mean, other.m2)
+        return self
+
+    def variance(self, ddof: int = 1) -> np.ndarray:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.count > ddof, self.m2 / (self.count - ddof), np.nan)
+
+    def std(self, ddof: int = 1) -> np.ndarray:
+        return np.sqrt(self.variance(ddof))
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count.tolist(),
+            "mean": self.mean.tolist(),
+            "m2": self.m2.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "RunningMoments":
+        moments = cls(len(state["count"]))
+        moments.count = np.asarray(state["count"], dtype=np.float64)
+        moments.mean = np.asarray(state["mean"], dtype=np.float64)
+        moments.m2 = np.asarray(state["m2"], dtype=np.float64)
+        return moments
+
+    def _combine(self, count: np.ndarray, mean: np.ndarray, m2: np.ndarray) -> None:
+        total = self.count + count
+        safe_total = np.where(total > 0, total, 1)
+        delta = mean - self.mean
+        self.m2 = self.m2 + m2 + delta**2 * self.count * count / safe_total
+        self.mean = self.mean + delta * count / safe_total
+        self.count = total
+
+
+class KLLSketch:
+    # Quantile sketch of Karnin, Lang and Liberty. Level h holds items of weight
+    # 2**h, a level over capacity is sorted and every other item (random offset)
+    # is promoted, so memory stays around 3k items for any stream length. Until
+    # the first compaction every item is kept and quantiles are exact.
+    def __init__(self, k: int = 400, seed: int = 0) -> None:
+        if k < 2:
+            raise ValueError(f"Invalid k {k}. Must be at least 2.")
+        self.k = k
+        self.n = 0
+        self.levels: List[np.ndarray] = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, values: np.ndarray) -> "KLLSketch":
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if len(values):
+            self.n += len(values)
+            self.levels[0] = np.concatenate([self.levels[0], values])
+            self._compress()
+        return self
+
+    def merge(self, other: "KLLSketch") -> "KLLSketch":
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def quantile(self, q: Sequence[float]) -> np.ndarray:
+        q = np.asarray(q, dtype=np.float64)
+        if self.n == 0:
+            return np.full(q.shape, np.nan)
+        if len(self.levels) == 1:
+            return np.quantile(self.levels[0], q)
+        items = np.concatenate(self.levels)
+        weights = np.concatenate(
+            [np.full(len(level), 2.0**h) for h, level in enumerate(self.levels)]
+        )
+        order = np.argsort(items, kind="stable")
+        cumulative = np.cumsum(weights[order])
+        positions = np.searchsorted(cumulative, q * cumulative[-1], side="left")
+        return items[order][np.minimum(positions, len(items) - 1)]
+
+    def to_dict(self) -> dict:
+        return {
+            "k": self.k,
+            "n": self.n,
+            "levels": [level.tolist() for level in self.levels],
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict, seed: int = 0) -> "KLLSketch":
+        sketch = cls(state["k"], seed)
+        sketch.n = state["n"]
+        sketch.levels = [
+            np.asarray(level, dtype=np.float64) for level in state["levels"]
+        ]
+        return sketch
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self) -> None:
+        level = 0
+        while level < len(self.levels):
+            if len(self.levels[level]) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(self.levels[level])
+                # An odd item out stays behind so the total weight is preserved
+                keep, items = items[: len(items) % 2], items[len(items) % 2 :]
+                promoted = items[self._rng.integers(2) :: 2]
+                self.levels[level] = keep
+                self.levels[level + 1] = np.concatenate(
+                    [self.levels[level + 1], promoted]
+                )
+            level += 1
+
+
+class HeavyHitters:
+    # Misra-Gries frequent items summary. At most capacity counters are kept,
+    # each undercounting its item by no more than n / (capacity + 1), and merged
+    # summaries keep the same guarantee. Missing values are not counted.
+    def __init__(self, capacity: int = 1000) -> None:
+        if capacity < 1:
+            raise ValueError(f"Invalid capacity {capacity}. Must be positive.")
+        self.capacity = capacity
+        self.counts: Dict = {}
+
+    def update(self, values) -> "HeavyHitters":
+        counts = pd.Series(values).value_counts(dropna=True)
+        self._add(zip(counts.index.tolist(), counts.tolist()))
+        return self
+
+    def merge(self, other: "HeavyHitters") -> "HeavyHitters":
+        self._add(other.counts.items())
+        return self
+
+    def most_common(self):
+        if not self.counts:
+            return None
+        return max(self.counts, key=self.counts.get)
+
+    def to_dict(self) -> dict:
+        return {"capacity": self.capacity, "counts": list(self.counts.items())}
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "HeavyHitters":
+        heavy_hitters = cls(state["capacity"])
+        heavy_hitters.counts = {value: count for value, count in state["counts"]}
+        return heavy_hitters
+
+    def _add(self, items) -> None:
+        for value, count in items:
+            self.counts[value] = self.counts.get(value, 0) + count
+        if len(self.counts) > self.capacity:
+            # Keep the top capacity counters, all lowered by the first count
+            # that was cut. Zero counters are kept so a stream of distinct
+            # values still has a most common item.
+            ranked = sorted(self.counts.items(), key=lambda item: item[1], reverse=True)
+            cut = ranked[self.capacity][1]
+            self.counts = {
+                value: count - cut for value, count in ranked[: self.capacity]
+            }
+
+
+def reservoir_sample(
+    chunks: Iterable[pd.DataFrame], sample_size: Optional[int], random_state: int = 42
+) -> pd.DataFrame:
+    # Every row draws a random key and the rows with the smallest keys are
+    # kept, a uniform sample of the whole stream in bounded memory. A
+    # sample_size of None keeps every row.
+    rng = np.random.default_rng(random_state)
+    sample, keys = None, np.empty(0)
+    for chunk in chunks:
+        sample = chunk if sample is None else pd.concat([sample, chunk])
+        if sample_size is None:
+            continue
+        keys = np.concatenate([keys, rng.random(len(chunk))])
+        if len(keys) > sample_size:
+            keep = np.argpartition(keys, sample_size)[:sample_size]
+            sample, keys = sample.iloc[keep], keys[keep]
+    if sample is None:
+        raise ValueError("Cannot sample from empty input")
+    return sample
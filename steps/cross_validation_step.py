@@ -0,0 +1,27 @@
+from typing import Optional
+
+import pandas as pd
+from zenml import step
+
+from src.cross_validation import CrossValidator
+from src.data_splitter import DataSplitter
+from src.model_building import LinearRegressionStrategy
+from steps.data_splitter_step import get_data_splitter_strategy
+
+
+@step
+def cross_validation_step(
+    df: pd.DataFrame,
+    target_column: str,
+    n_folds: int = 5,
+    split_strategy: str = "simple",
+    n_workers: Optional[int] = None,
+) -> dict:
+    # Mean and std per metric over the folds of split_strategy
+    validator = CrossValidator(
+        LinearRegressionStrategy(),
+        splitter=DataSplitter(get_data_splitter_strategy(split_strategy)),
+        n_folds=n_folds,
+        n_workers=n_workers,
+    )
+    return validator.cross_validate(df, target_column)
@@ -1,12 +1,39 @@
+import logging
+import os
+from typing import List, Optional
+
 import pandas as pd
 from zenml import step
 
-from src.ingest_data import DataIngestorFactory
+from src.dtype_optimization import DtypeOptimizer
+from src.ingest_data import CachedDataIngestor, DataIngestorFactory
 
 
 @step
-def data_ingestion_step(file_path: str) -> pd.DataFrame:
-    file_extension = ".zip"
-    data_ingestor = DataIngestorFactory.get_data_ingestor(file_extension)
+def data_ingestion_step(
+    file_path: str,
+    columns: Optional[List[str]] = None,
+    filters: Optional[List[List]] = None,
+    use_cache: bool = True,
+    optimize_dtypes: bool = False,
+    schema_path: Optional[str] = None,
+) -> pd.DataFrame:
+    # Partitioned parquet datasets are directories without an extension
+    file_extension = os.path.splitext(file_path)[1] or ".parquet"
+    data_ingestor = DataIngestorFactory.get_data_ingestor(
+        file_extension, columns=columns, filters=filters
+    )
+    if use_cache:
+        data_ingestor = CachedDataIngestor(data_ingestor)
     df = data_ingestor.ingest(file_path)
+    if optimize_dtypes:
+        # A stored schema skips inference, otherwise infer it and store it
+        if schema_path and os.path.exists(schema_path):
+            optimizer = DtypeOptimizer.from_schema_file(schema_path)
+        else:
+            optimizer = DtypeOptimizer()
+        df, report = optimizer.optimize(df)
+        logging.info(f"Bytes saved per column:\n{report['bytes_saved']}")
+        if schema_path and not os.path.exists(schema_path):
+            optimizer.save_schema(schema_path)
     return df
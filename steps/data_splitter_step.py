@@ -3,13 +3,41 @@ from typing import Tuple
 import pandas as pd
 from zenml import step
 
-from data_splitter import DataSplitter, SimpleTrainTestSplitStrategy
+from data_splitter import (
+    DataSplitter,
+    DataSplitterStrategy,
+    GroupTrainTestSplitStrategy,
+    SimpleTrainTestSplitStrategy,
+    StratifiedTrainTestSplitStrategy,
+    TimeBasedTrainTestSplitStrategy,
+)
+
+
+def get_data_splitter_strategy(
+    strategy: str = "simple", group_column: str = "PID", time_column: str = "Yr Sold"
+) -> DataSplitterStrategy:
+    if strategy == "simple":
+        return SimpleTrainTestSplitStrategy()
+    elif strategy == "stratified":
+        return StratifiedTrainTestSplitStrategy()
+    elif strategy == "group":
+        return GroupTrainTestSplitStrategy(group_column=group_column)
+    elif strategy == "time":
+        return TimeBasedTrainTestSplitStrategy(time_column=time_column)
+    else:
+        raise ValueError(f"Unsupported data splitting strategy {strategy}")
 
 
 @step
 def data_splitter_step(
-    df: pd.DataFrame, target_column: str
+    df: pd.DataFrame,
+    target_column: str,
+    strategy: str = "simple",
+    group_column: str = "PID",
+    time_column: str = "Yr Sold",
 ) -> Tuple[pd.DataFrame, pd.DataFrame, pd.Series, pd.Series]:
-    splitter = DataSplitter(strategy=SimpleTrainTestSplitStrategy())
+    splitter = DataSplitter(
+        strategy=get_data_splitter_strategy(strategy, group_column, time_column)
+    )
     X_train, X_test, y_train, y_test = splitter.apply_split(df, target_column)
     return X_train, X_test, y_train, y_test
@@ -1,31 +1,65 @@
-from typing import List
+from typing import Dict, List, Optional
 
 import pandas as pd
 from zenml import step
 
 from feature_engineering import (
     FeatureEngineer,
+    FeatureEngineerStrategy,
     LogTransformation,
     MinMaxSclaing,
     OneHotEncoding,
     StandardScaling,
 )
+from src.step_cache import StepCache
 
 
-@step
-def feature_engineering_step(
-    df: pd.DataFrame, strategy="log", features: List[str] = []
-) -> pd.DataFrame:
+def get_feature_engineering_strategy(
+    strategy="log", features: List[str] = []
+) -> FeatureEngineerStrategy:
     if strategy == "log":
-        handler = FeatureEngineer(LogTransformation(features=features))
+        return LogTransformation(features=features)
     elif strategy == "standard_scalar":
-        handler = FeatureEngineer(StandardScaling(features=features))
+        return StandardScaling(features=features)
     elif strategy == "min_max_scalar":
-        handler = FeatureEngineer(MinMaxSclaing(features=features))
+        return MinMaxSclaing(features=features)
     elif strategy == "one_hot_encoding":
-        handler = FeatureEngineer(OneHotEncoding(features=features))
-
+        return OneHotEncoding(features=features)
     else:
         raise ValueError(f"Unsupported Feature Engineering strategy {strategy}")
+
+
+def get_feature_engineer(
+    strategy="log", features: List[str] = [], plan: Optional[List[Dict]] = None
+) -> FeatureEngineer:
+    # plan is an ordered list of {"strategy": ..., "features": [...]} run fused
+    if plan:
+        return FeatureEngineer(
+            [
+                get_feature_engineering_strategy(stage["strategy"], stage["features"])
+                for stage in plan
+            ]
+        )
+    return FeatureEngineer(get_feature_engineering_strategy(strategy, features))
+
+
+@step
+def feature_engineering_step(
+    df: pd.DataFrame,
+    strategy="log",
+    features: List[str] = [],
+    fitted_strategy_path: Optional[str] = None,
+    plan: Optional[List[Dict]] = None,
+    use_cache: bool = True,
+) -> pd.DataFrame:
+    handler = get_feature_engineer(strategy, features, plan)
+    # A cache hit has nothing fitted to save, so saving bypasses the cache
+    if use_cache and not fitted_strategy_path:
+        return StepCache().run(
+            "feature_engineering", df, handler.apply_feature_engineering, handler
+        )
     cleaned_df = handler.apply_feature_engineering(df)
+    # Persist the fitted statistics so serving transforms without refitting
+    if fitted_strategy_path:
+        handler.save(fitted_strategy_path)
     return cleaned_df
@@ -1,22 +1,51 @@
+from typing import Optional
+
 import pandas as pd
 from zenml import step
 
 from handle_missing_values import (
     DropMissingValuesStrategy,
     FillMissingValuesStrategy,
+    IterativeImputationStrategy,
+    KNNImputationStrategy,
     MissingValuesHandler,
+    StreamingImputer,
 )
+from src.step_cache import StepCache
 
 
-@step
-def handle_missing_values_step(
-    df: pd.DataFrame, strategy: str = "mean"
-) -> pd.DataFrame:
+def get_missing_values_handler(strategy: str = "mean") -> MissingValuesHandler:
     if strategy == "drop":
-        handler = MissingValuesHandler(DropMissingValuesStrategy(axis=0))
+        return MissingValuesHandler(DropMissingValuesStrategy(axis=0))
     elif strategy in ["mean", "median", "mode", "constant"]:
-        handler = MissingValuesHandler(FillMissingValuesStrategy(method=strategy))
+        return MissingValuesHandler(FillMissingValuesStrategy(method=strategy))
+    elif strategy in ["streaming_mean", "streaming_median", "streaming_mode"]:
+        return MissingValuesHandler(
+            StreamingImputer(method=strategy.removeprefix("streaming_"))
+        )
+    elif strategy == "knn":
+        return MissingValuesHandler(KNNImputationStrategy())
+    elif strategy == "iterative":
+        return MissingValuesHandler(IterativeImputationStrategy())
     else:
         raise ValueError(f"Unsupported Missing Value handling strategy {strategy}")
+
+
+@step
+def handle_missing_values_step(
+    df: pd.DataFrame,
+    strategy: str = "mean",
+    fitted_imputer_path: Optional[str] = None,
+    use_cache: bool = True,
+) -> pd.DataFrame:
+    handler = get_missing_values_handler(strategy)
+    # A cache hit has nothing fitted to save, so saving bypasses the cache
+    if use_cache and not fitted_imputer_path:
+        return StepCache().run(
+            "handle_missing_values", df, handler.handle_missing_values, handler
+        )
     cleaned_df = handler.handle_missing_values(df)
+    # Persist the fitted fill values so serving fills batches the same way
+    if fitted_imputer_path:
+        handler.save(fitted_imputer_path)
     return cleaned_df
@@ -0,0 +1,39 @@
+import os
+from typing import Annotated, List
+
+from sklearn.pipeline import Pipeline
+from zenml import ArtifactConfig, step
+
+from src.ingest_data import DataIngestorFactory
+from src.model_building import IncrementalLinearRegressionStrategy, ModelBuilder
+
+
+@step(enable_cache=False)
+def incremental_model_building_step(
+    file_path: str,
+    target_column: str,
+    feature_columns: List[str],
+    method: str = "normal_equation",
+    batch_size: int = 100_000,
+) -> Annotated[
+    Pipeline, ArtifactConfig(name="sklearn_pipeline", is_model_artifact=True)
+]:
+    # Reads only the needed columns batch by batch, the full training matrix is
+    # never held in memory. Zip archives can't be projected, their chunks are
+    # narrowed after reading
+    file_extension = os.path.splitext(file_path)[1] or ".parquet"
+    ingestor = DataIngestorFactory.get_data_ingestor(
+        file_extension,
+        columns=(
+            None if file_extension == ".zip" else feature_columns + [target_column]
+        ),
+    )
+
+    def chunks():
+        for chunk in ingestor.ingest_chunks(file_path, batch_size):
+            yield chunk[feature_columns], chunk[target_column]
+
+    builder = ModelBuilder(
+        IncrementalLinearRegressionStrategy(method=method, batch_size=batch_size)
+    )
+    return builder.build_model_from_chunks(chunks)
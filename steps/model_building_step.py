@@ -8,10 +8,12 @@ from sklearn.compose import ColumnTransformer
 from sklearn.impute import SimpleImputer
 from sklearn.linear_model import LinearRegression
 from sklearn.pipeline import Pipeline
-from sklearn.preprocessing import OneHotEncoder
+from sklearn.preprocessing import FunctionTransformer, OneHotEncoder
 from zenml import ArtifactConfig, step
 from zenml.client import Client
 
+from src.feature_engineering import sparse_columns, to_csr
+
 experiment_tracker = Client().active_stack.experiment_tracker
 
 from zenml import Model
@@ -35,9 +37,13 @@ def model_building_step(
     if not isinstance(y_train, pd.Series):
         raise TypeError("X_train must be a pd.Series")
     categorical_cols = X_train.select_dtypes(include=["object", "category"]).columns
-    numerical_cols = X_train.select_dtypes(exclude=["object", "category"]).columns
+    sparse_cols = sparse_columns(X_train)
+    numerical_cols = X_train.select_dtypes(
+        exclude=["object", "category"]
+    ).columns.difference(sparse_cols, sort=False)
     logging.info(f"Categorical columns: {categorical_cols.tolist()}")
     logging.info(f"Numerical columns: {numerical_cols.tolist()}")
+    logging.info(f"Sparse columns: {sparse_cols}")
     numerical_transformer = SimpleImputer(strategy="mean")
     categorical_transformer = Pipeline(
         steps=[
@@ -45,11 +51,15 @@ def model_building_step(
             ("onehot", OneHotEncoder(handle_unknown="ignore")),
         ]
     )
+    # Already encoded sparse columns are passed through as CSR, and a threshold
+    # of 1.0 keeps the stacked output sparse so the model never sees it dense
     preprocessor = ColumnTransformer(
         transformers=[
             ("num", numerical_transformer, numerical_cols),
             ("cat", categorical_transformer, categorical_cols),
-        ]
+            ("sparse", FunctionTransformer(to_csr, accept_sparse=True), sparse_cols),
+        ],
+        sparse_threshold=1.0 if sparse_cols else 0.3,
     )
     pipeline = Pipeline(
         steps=[("preprocessor", preprocessor), ("model", LinearRegression())]
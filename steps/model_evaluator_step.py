@@ -0,0 +1,24 @@
+from typing import Annotated, Tuple
+
+import pandas as pd
+from sklearn.pipeline import Pipeline
+from zenml import step
+
+from src.model_evaluator import ModelEvaluator, RegressionModelEvaluationStrategy
+
+
+@step(enable_cache=False)
+def model_evaluator_step(
+    trained_model: Pipeline,
+    X_test: pd.DataFrame,
+    y_test: pd.Series,
+    batch_size: int = 100_000,
+    n_bootstrap: int = 1000,
+) -> Tuple[Annotated[dict, "evaluation_metrics"], Annotated[float, "mse"]]:
+    evaluator = ModelEvaluator(
+        RegressionModelEvaluationStrategy(
+            batch_size=batch_size, n_bootstrap=n_bootstrap
+        )
+    )
+    metrics = evaluator.evaluate(trained_model, X_test, y_test)
+    return metrics, metrics["mse"]
@@ -0,0 +1,21 @@
+import logging
+
+import pandas as pd
+from sklearn.pipeline import Pipeline
+from zenml import step
+
+from src.compiled_model import check_parity, compile_pipeline
+
+
+@step(enable_cache=False)
+def model_export_step(
+    trained_model: Pipeline,
+    X_sample: pd.DataFrame,
+    output_path: str = "compiled_model.npz",
+) -> str:
+    compiled = compile_pipeline(trained_model)
+    # Refuse to export a scorer that does not reproduce the pipeline
+    max_error = check_parity(trained_model, compiled, X_sample)
+    logging.info(f"Compiled model matches the pipeline, max abs error {max_error}")
+    compiled.save(output_path)
+    return output_path
@@ -0,0 +1,10 @@
+from sklearn.pipeline import Pipeline
+from zenml import Model, step
+from zenml.enums import ModelStages
+
+
+@step
+def model_loader(model_name: str = "prices_prediction") -> Pipeline:
+    # The sklearn_pipeline artifact registered by model_building_step
+    model = Model(name=model_name, version=ModelStages.LATEST)
+    return model.load_artifact("sklearn_pipeline")
@@ -0,0 +1,29 @@
+from typing import Annotated, List, Optional, Tuple
+
+import pandas as pd
+from sklearn.pipeline import Pipeline
+from zenml import ArtifactConfig, step
+
+from src.model_building import ModelBuilder
+from src.model_search import ModelSearchStrategy
+
+
+@step(enable_cache=False)
+def model_search_step(
+    X_train: pd.DataFrame,
+    y_train: pd.Series,
+    families: Optional[List[str]] = None,
+    search: str = "grid",
+    n_iter: int = 20,
+    n_workers: Optional[int] = None,
+) -> Tuple[
+    Annotated[
+        Pipeline, ArtifactConfig(name="sklearn_pipeline", is_model_artifact=True)
+    ],
+    Annotated[pd.DataFrame, "leaderboard"],
+]:
+    strategy = ModelSearchStrategy(
+        families=families, search=search, n_iter=n_iter, n_workers=n_workers
+    )
+    pipeline = ModelBuilder(strategy).build_model(X_train, y_train)
+    return pipeline, strategy.leaderboard_
@@ -1,25 +1,62 @@
+from typing import Optional
+
 import pandas as pd
 from zenml import step
 
 from outlier_detection import (
     IQROutlierDetection,
+    IsolationForestOutlierDetection,
+    MultivariateOutlierDetection,
     OutlierDetector,
+    RobustCovarianceOutlierDetection,
+    StreamingOutlierDetection,
     ZScoreOutlierDetection,
 )
+from src.step_cache import StepCache
+
+
+def get_outlier_detector(strategy) -> OutlierDetector:
+    if strategy == "zscore":
+        return OutlierDetector(ZScoreOutlierDetection())
+    elif strategy == "iqr":
+        return OutlierDetector(IQROutlierDetection())
+    elif strategy == "streaming_zscore":
+        return OutlierDetector(StreamingOutlierDetection(method="zscore"))
+    elif strategy == "streaming_iqr":
+        return OutlierDetector(StreamingOutlierDetection(method="iqr"))
+    elif strategy == "isolation_forest":
+        return OutlierDetector(IsolationForestOutlierDetection())
+    elif strategy == "robust_covariance":
+        return OutlierDetector(RobustCovarianceOutlierDetection())
+    else:
+        raise ValueError(f"Unsupported outlier detection strategy {strategy}")
 
 
 @step
 def outlier_detection_step(
-    df: pd.DataFrame, column_name: str, strategy
+    df: pd.DataFrame,
+    column_name: str,
+    strategy,
+    fitted_detector_path: Optional[str] = None,
+    use_cache: bool = True,
 ) -> pd.DataFrame:
+    outlier_detector = get_outlier_detector(strategy)
 
-    if strategy == "zscore":
-        outlier_detector = OutlierDetector(ZScoreOutlierDetection())
-    elif strategy == "iqr":
-        outlier_detector = OutlierDetector(IQROutlierDetection())
+    def remove_outliers(df: pd.DataFrame) -> pd.DataFrame:
+        df_numeric = df.select_dtypes(include=["number"])
+        return outlier_detector.handle_outliers(df_numeric, "remove")
 
-    else:
-        raise ValueError(f"Unsupported outlier detection strategy {strategy}")
-    df_numeric = df.select_dtypes(include=[int, float])
-    cleaned_df = outlier_detector.handle_outliers(df_numeric, "remove")
+    # A cache hit has nothing fitted to save, so saving bypasses the cache
+    if use_cache and not fitted_detector_path:
+        return StepCache().run(
+            "outlier_detection", df, remove_outliers, outlier_detector
+        )
+    cleaned_df = remove_outliers(df)
+    # Streaming and multivariate detectors keep their fitted state, persist it
+    # so inference flags outliers without the training data
+    if fitted_detector_path and isinstance(
+        outlier_detector.strategy,
+        (StreamingOutlierDetection, MultivariateOutlierDetection),
+    ):
+        outlier_detector.strategy.save(fitted_detector_path)
     return cleaned_df
@@ -0,0 +1,32 @@
+from typing import Optional
+
+from src.compiled_model import CompiledLinearModel
+from src.prediction_service import PredictionServer
+
+
+def prediction_service_loader(
+    model_name: str = "prices_prediction",
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    max_batch_size: int = 1024,
+    batch_window_ms: float = 5.0,
+    compiled_model_path: Optional[str] = None,
+) -> PredictionServer:
+    # Loads the model once, every request is served from memory. A compiled
+    # model from model_export_step serves without importing sklearn or zenml
+    if compiled_model_path:
+        model = CompiledLinearModel.load(compiled_model_path)
+    else:
+        from zenml import Model
+        from zenml.enums import ModelStages
+
+        model = Model(name=model_name, version=ModelStages.LATEST).load_artifact(
+            "sklearn_pipeline"
+        )
+    return PredictionServer(
+        model,
+        host=host,
+        port=port,
+        max_batch_size=max_batch_size,
+        batch_window_ms=batch_window_ms,
+    )
@@ -0,0 +1,18 @@
+import json
+import urllib.request
+
+import numpy as np
+from zenml import step
+
+
+@step(enable_cache=False)
+def predictor(service_url: str, input_data: str) -> np.ndarray:
+    # input_data is a JSON payload in any format the prediction service accepts
+    request = urllib.request.Request(
+        f"{service_url}/predict",
+        data=input_data.encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(request) as response:
+        predictions = json.loads(response.read())["predictions"]
+    return np.array(predictions)
@@ -0,0 +1,73 @@
+import glob
+import os
+from typing import List, Optional
+
+from zenml import step
+
+from handle_missing_values import MissingValuesHandler, StreamingImputer
+from ingest_data import ZipDataIngestor
+from outlier_detection import OutlierDetector, StreamingOutlierDetection
+from steps.feature_engineering_step import get_feature_engineer
+from steps.handling_missing_values_step import get_missing_values_handler
+from steps.outlier_detection_step import get_outlier_detector
+
+
+@step
+def streaming_preprocessing_step(
+    file_path: str,
+    output_dir: str,
+    chunk_size: int = 100_000,
+    missing_values_strategy: str = "mean",
+    feature_strategy: str = "log",
+    features: List[str] = [],
+    outlier_strategy: str = "zscore",
+    fitted_imputer_path: Optional[str] = None,
+) -> str:
+    # Every stage is fitted over the whole stream before anything is
+    # transformed, so the output does not depend on chunk_size: one pass fits
+    # the imputer, one the feature strategy (if it has state) on imputed
+    # chunks, one the outlier bounds on engineered chunks, and a last pass
+    # transforms chunk by chunk into parquet parts under output_dir. Only a
+    # single chunk is in memory at a time
+    def read():
+        return ZipDataIngestor().ingest_chunks(file_path, chunk_size)
+
+    if fitted_imputer_path:
+        missing_values_handler = MissingValuesHandler.load(fitted_imputer_path)
+    else:
+        # Fill statistics come from the streaming imputer, dropping rows is
+        # local to every chunk
+        missing_values_handler = (
+            MissingValuesHandler(
+                StreamingImputer(method=missing_values_strategy, fill_categorical=False)
+            )
+            if missing_values_strategy in ["mean", "median", "mode"]
+            else get_missing_values_handler(missing_values_strategy)
+        )
+        missing_values_handler.fit(read())
+
+    feature_engineer = get_feature_engineer(feature_strategy, features)
+    if feature_engineer.strategy.requires_fit:
+        feature_engineer.fit(
+            missing_values_handler.handle_missing_values_chunks(read())
+        )
+
+    def engineered():
+        chunks = missing_values_handler.handle_missing_values_chunks(read())
+        chunks = feature_engineer.apply_feature_engineering_chunks(chunks)
+        return (chunk.select_dtypes(include=["number"]) for chunk in chunks)
+
+    outlier_detector = (
+        OutlierDetector(StreamingOutlierDetection(method=outlier_strategy))
+        if outlier_strategy in ["zscore", "iqr"]
+        else get_outlier_detector(outlier_strategy)
+    )
+    outlier_detector.fit(engineered())
+
+    os.makedirs(output_dir, exist_ok=True)
+    for stale_part in glob.glob(os.path.join(output_dir, "part-*.parquet")):
+        os.remove(stale_part)
+    chunks = outlier_detector.handle_outliers_chunks(engineered(), "remove")
+    for index, chunk in enumerate(chunks):
+        chunk.to_parquet(os.path.join(output_dir, f"part-{index:08d}.parquet"))
+    return output_dir
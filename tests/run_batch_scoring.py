@@ -0,0 +1,53 @@
+import os
+import tempfile
+
+import click
+import joblib
+
+from src.batch_scoring import BatchScorer
+
+
+@click.command()
+@click.argument("input_path")
+@click.argument("output_path")
+@click.option(
+    "--model-path",
+    default=None,
+    help="Joblib pipeline or compiled .npz model, defaults to the latest registered model",
+)
+@click.option("--model-name", default="prices_prediction", help="Registered model")
+@click.option("--chunk-size", default=500_000, type=int)
+@click.option("--workers", default=None, type=int)
+@click.option("--id-column", "id_columns", multiple=True, help="Copied to the output")
+def main(
+    input_path, output_path, model_path, model_name, chunk_size, workers, id_columns
+):
+    # Rerunning with the same arguments after a crash only scores missing chunks
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if model_path is None:
+            from zenml import Model
+            from zenml.enums import ModelStages
+
+            model = Model(name=model_name, version=ModelStages.LATEST).load_artifact(
+                "sklearn_pipeline"
+            )
+            model_path = os.path.join(tmp_dir, "model.joblib")
+            joblib.dump(model, model_path)
+
+        scorer = BatchScorer(
+            model_path,
+            n_workers=workers,
+            chunk_size=chunk_size,
+            id_columns=list(id_columns),
+        )
+        stats = scorer.score(input_path, output_path)
+    print(
+        f"Scored {stats['rows']} rows in {stats['seconds']:.1f}s "
+        f"({stats['rows_per_second']:.0f} rows/s), "
+        f"{stats['skipped_chunks']} chunks reused from a previous run.\n"
+        f"Predictions written to {output_path}"
+    )
+
+
+if __name__ == "__main__":
+    main()
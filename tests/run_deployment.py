@@ -0,0 +1,37 @@
+import click
+
+from steps.prediction_service_load import prediction_service_loader
+
+
+@click.command()
+@click.option("--model-name", default="prices_prediction", help="Registered model")
+@click.option("--host", default="127.0.0.1")
+@click.option("--port", default=8000, type=int)
+@click.option("--max-batch-size", default=1024, type=int)
+@click.option("--batch-window-ms", default=5.0, type=float)
+@click.option(
+    "--compiled-model",
+    default=None,
+    help="Serve a compiled .npz model from model_export_step instead",
+)
+def main(model_name, host, port, max_batch_size, batch_window_ms, compiled_model):
+    service = prediction_service_loader(
+        model_name=model_name,
+        host=host,
+        port=port,
+        max_batch_size=max_batch_size,
+        batch_window_ms=batch_window_ms,
+        compiled_model_path=compiled_model,
+    )
+    print(
+        f"Serving predictions on {service.url}/predict\n"
+        f"Latency and throughput counters are at {service.url}/metrics"
+    )
+    try:
+        service.serve_forever()
+    finally:
+        service.shutdown()
+
+
+if __name__ == "__main__":
+    main()
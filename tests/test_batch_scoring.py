@@ -0,0 +1,50 @@
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression
+
+from src.batch_scoring import BatchScorer
+
+
+def test_rerun_after_interruption_skips_finished_parts(tmp_path, monkeypatch):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"id": range(100), "x": rng.normal(size=100)})
+    input_path = str(tmp_path / "input.csv")
+    df.to_csv(input_path, index=False)
+    output_path = str(tmp_path / "predictions.parquet")
+    model = LinearRegression().fit(df, 3 * df["x"])
+
+    # Interrupt the first run before its parts are merged, with the last chunk
+    # not yet written
+    first_model_path = str(tmp_path / "first" / "model.joblib")
+    os.makedirs(os.path.dirname(first_model_path))
+    joblib.dump(model, first_model_path)
+
+    def crash(parts_dir, output_path):
+        os.remove(os.path.join(parts_dir, "part-00000003.parquet"))
+        raise KeyboardInterrupt
+
+    with monkeypatch.context() as patch:
+        patch.setattr(BatchScorer, "_merge", staticmethod(crash))
+        with pytest.raises(KeyboardInterrupt):
+            BatchScorer(
+                first_model_path, n_workers=1, chunk_size=25, id_columns=["id"]
+            ).score(input_path, output_path)
+
+    # The rerun gets the same model at another path, as the CLI dumps it to a
+    # new temporary directory every time
+    second_model_path = str(tmp_path / "second" / "model.joblib")
+    os.makedirs(os.path.dirname(second_model_path))
+    joblib.dump(model, second_model_path)
+    stats = BatchScorer(
+        second_model_path, n_workers=1, chunk_size=25, id_columns=["id"]
+    ).score(input_path, output_path)
+
+    assert stats["skipped_chunks"] == 3
+    assert stats["rows"] == 25
+    result = pd.read_parquet(output_path)
+    assert result["id"].tolist() == list(range(100))
+    np.testing.assert_allclose(result["prediction"], model.predict(df))
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.impute import SimpleImputer
+from sklearn.linear_model import LinearRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import FunctionTransformer, OneHotEncoder
+
+from src.compiled_model import CompiledLinearModel, check_parity, compile_pipeline
+from src.feature_engineering import (
+    FeatureEngineer,
+    OneHotEncoding,
+    sparse_columns,
+    to_csr,
+)
+
+
+def _training_pipeline(numerical_cols, categorical_cols, sparse_cols) -> Pipeline:
+    # The pipeline model_building_step trains
+    categorical_transformer = Pipeline(
+        steps=[
+            ("imputer", SimpleImputer(strategy="most_frequent")),
+            ("onehot", OneHotEncoder(handle_unknown="ignore")),
+        ]
+    )
+    preprocessor = ColumnTransformer(
+        transformers=[
+            ("num", SimpleImputer(strategy="mean"), numerical_cols),
+            ("cat", categorical_transformer, categorical_cols),
+            ("sparse", FunctionTransformer(to_csr, accept_sparse=True), sparse_cols),
+        ],
+        sparse_threshold=1.0 if sparse_cols else 0.3,
+    )
+    return Pipeline(
+        steps=[("preprocessor", preprocessor), ("model", LinearRegression())]
+    )
+
+
+def _frame(n_rows: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    area = rng.normal(size=n_rows)
+    area[rng.random(n_rows) < 0.1] = np.nan
+    street = rng.choice(np.array(["Pave", "Grvl", None], dtype=object), size=n_rows)
+    street[rng.random(n_rows) < 0.1] = np.nan
+    return pd.DataFrame(
+        {
+            "area": area,
+            "street": street,
+            "zone": rng.choice(["A", "B", "C"], size=n_rows),
+        }
+    )
+
+
+def test_compiled_model_matches_pipeline_on_nan_none_and_unseen(tmp_path):
+    train = _frame(500, seed=0)
+    y = np.random.default_rng(1).normal(size=len(train))
+    pipeline = _training_pipeline(["area"], ["street", "zone"], [])
+    pipeline.fit(train, y)
+    path = str(tmp_path / "model.npz")
+    compile_pipeline(pipeline).save(path)
+    compiled = CompiledLinearModel.load(path)
+
+    check_parity(pipeline, compiled, train)
+    test = pd.DataFrame(
+        {
+            "area": [np.nan, 1.0, 0.5, -2.0],
+            "street": [np.nan, None, "Pave", "Unseen"],
+            "zone": ["A", "Unseen", None, np.nan],
+        }
+    )
+    check_parity(pipeline, compiled, test)
+
+
+def test_compiled_model_supports_sparse_one_hot_columns():
+    train = FeatureEngineer(
+        OneHotEncoding(features=["zone"], sparse=True)
+    ).apply_feature_engineering(_frame(500, seed=2))
+    y = np.random.default_rng(3).normal(size=len(train))
+    sparse_cols = sparse_columns(train)
+    assert sparse_cols
+    pipeline = _training_pipeline(["area"], ["street"], sparse_cols)
+    pipeline.fit(train, y)
+
+    check_parity(pipeline, compile_pipeline(pipeline), train)
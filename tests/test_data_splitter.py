@@ -0,0 +1,20 @@
+import pandas as pd
+import pytest
+
+from src.data_splitter import TimeBasedTrainTestSplitStrategy
+
+
+def test_time_based_split_keeps_cutoff_time_on_the_test_side():
+    df = pd.DataFrame({"Yr Sold": [2006, 2007, 2008, 2008, 2009], "y": range(5)})
+
+    train, test = TimeBasedTrainTestSplitStrategy().split_indices(df, "y", 0.4)
+
+    assert df["Yr Sold"].iloc[train].max() < df["Yr Sold"].iloc[test].min()
+
+
+@pytest.mark.parametrize("years", [[2008, 2008, 2008, 2008], [2006, 2006, 2006, 2010]])
+def test_time_based_split_rejects_an_empty_train_set(years):
+    df = pd.DataFrame({"Yr Sold": years, "y": range(len(years))})
+
+    with pytest.raises(ValueError, match="Both sides must be non-empty"):
+        TimeBasedTrainTestSplitStrategy().split_indices(df, "y", 0.5)
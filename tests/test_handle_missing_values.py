@@ -0,0 +1,16 @@
+import numpy as np
+import pandas as pd
+
+from src.handle_missing_values import FillMissingValuesStrategy
+
+
+def test_mode_fill_skips_columns_without_a_mode():
+    strategy = FillMissingValuesStrategy(method="mode")
+    df = pd.DataFrame({"empty": [np.nan, np.nan], "area": [1.0, np.nan]})
+
+    filled = strategy.handle(df)
+
+    assert filled["empty"].isna().all()
+    assert filled["area"].tolist() == [1.0, 1.0]
+    assert strategy.handle(df[["empty"]])["empty"].isna().all()
+    assert strategy.handle(pd.DataFrame({"street": ["Pave", None]})).shape == (2, 1)
@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+
+from src.feature_engineering import FeatureEngineer, OneHotEncoding
+from src.model_building import NormalEquationRegressor
+
+
+def test_normal_equation_matches_linear_regression_on_sparse_one_hot():
+    # Over 256 rows per category, uint8 products of the one hot block would wrap
+    rng = np.random.default_rng(0)
+    n_rows = 2000
+    df = pd.DataFrame(
+        {
+            "area": rng.normal(size=n_rows),
+            "zone": rng.choice(["A", "B", "C"], size=n_rows),
+        }
+    )
+    y = pd.Series(
+        2 * df["area"] + df["zone"].map({"A": 0.0, "B": 3.0, "C": -1.0}).to_numpy()
+    )
+    X = FeatureEngineer(
+        OneHotEncoding(features=["zone"], sparse=True)
+    ).apply_feature_engineering(df)
+
+    model = NormalEquationRegressor()
+    for batch in range(0, n_rows, 1000):
+        model.partial_fit(X.iloc[batch : batch + 1000], y.iloc[batch : batch + 1000])
+    dense = X.to_numpy(dtype=np.float64)
+    expected = LinearRegression().fit(dense, y)
+
+    np.testing.assert_allclose(model.predict(X), expected.predict(dense), atol=1e-8)
+    np.testing.assert_allclose(model.coef_[0], 2.0, atol=1e-8)